@@ -0,0 +1,35 @@
+from redis.asyncio import Redis
+
+from auth_api.data.entities.data_user_credentials import DataUserCredentials
+from auth_api.data.mapper_utils import data_user_credentials_to_model
+from auth_api.data.redis_query_utils import add_cached_user_credentials_many_async
+from shared.lib.cache_warmup import warm_cache_async
+
+
+async def warm_user_credentials_cache_async(
+    redis_client: Redis, chunk_size: int, keys_per_second: float
+) -> int | None:
+    """
+    Caches the user credentials missing from Redis, the most recently active first.
+    """
+    return await warm_cache_async(
+        redis_client,
+        "user_credentials",
+        # Without the password hashes and salts, which aren't cached.
+        DataUserCredentials.all().only("id", "user_ulid", "email", "updated_at"),
+        _add_cached_data_user_credentials_async,
+        chunk_size,
+        keys_per_second,
+    )
+
+
+async def _add_cached_data_user_credentials_async(
+    redis_client: Redis, data_user_credentials_list: list[DataUserCredentials]
+) -> int:
+    return await add_cached_user_credentials_many_async(
+        redis_client,
+        [
+            data_user_credentials_to_model(data_user_credentials)
+            for data_user_credentials in data_user_credentials_list
+        ],
+    )
@@ -1,6 +1,8 @@
 from auth_api.data.entities.data_user_credentials import DataUserCredentials
+from shared.lib.metrics.app_metrics import observe_db_query
 
 
+@observe_db_query
 async def select_user_credentials_by_user_ulid_async(
     ulid: str,
 ) -> DataUserCredentials | None:
@@ -10,6 +12,7 @@ async def select_user_credentials_by_user_ulid_async(
         return None
 
 
+@observe_db_query
 async def select_user_credentials_by_email_async(
     email: str,
 ) -> DataUserCredentials | None:
@@ -17,3 +20,10 @@ async def select_user_credentials_by_email_async(
         return await DataUserCredentials.filter(email=email).first()
     except Exception:
         return None
+
+
+@observe_db_query
+async def select_user_credentials_by_user_ulids_async(
+    ulids: list[str],
+) -> list[DataUserCredentials]:
+    return await DataUserCredentials.filter(user_ulid__in=ulids)
@@ -0,0 +1,8 @@
+from shared.lib.constants import APP_NAME_AUTH_API
+
+# The models of the service, for its app and its migrations.
+DB_MODULES = {
+    "entities": [
+        f"{APP_NAME_AUTH_API}.data.entities.data_user_credentials",
+    ]
+}
@@ -11,3 +11,7 @@ class DataUserCredentials(Model):
     salt = fields.CharField(max_length=150, unique=True)
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        # The cache warm-up's order, the most recently active first.
+        indexes = (("updated_at", "id"),)
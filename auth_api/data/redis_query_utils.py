@@ -1,11 +1,36 @@
-from redis.asyncio import Redis
+from redis.asyncio import Redis, RedisCluster
 
-from shared.lib.constants import ONE_DAY_IN_SECONDS
+from shared.lib.cache_warmup import spread_ttl_seconds
+from shared.lib.constants import REDIS_CHANNEL_REGISTRATIONS
+from shared.lib.metrics.app_metrics import cache_lookups_total
+from shared.lib.redis_client_cache import (
+    get_through_client_cache_async,
+    invalidate_client_cache,
+)
+from shared.lib.redis_pubsub_utils import (
+    publish_notification,
+    publish_notifications_async,
+)
+from shared.lib.settings import get_settings
 from shared.models.auth_dtos import UserCredentials
 
+_cache_hits_total = cache_lookups_total.labels("user_credentials", "hit")
+_cache_misses_total = cache_lookups_total.labels("user_credentials", "miss")
 
-async def get_cached_user_credentials_async(redis_client: Redis, user_ulid: str):
-    return await redis_client.get(f"user_credentials:{user_ulid}")
+
+async def get_cached_user_credentials_async(
+    redis_client: Redis, user_ulid: str
+) -> UserCredentials | None:
+    cached_user_credentials = await get_through_client_cache_async(
+        redis_client, f"user_credentials:{user_ulid}"
+    )
+
+    if not cached_user_credentials:
+        _cache_misses_total.inc()
+        return None
+
+    _cache_hits_total.inc()
+    return UserCredentials.model_validate_json(cached_user_credentials)
 
 
 async def set_cached_user_credentials_async(
@@ -14,9 +39,115 @@ async def set_cached_user_credentials_async(
     await redis_client.set(
         f"user_credentials:{user_ulid}",
         user_credentials.model_dump_json(),
-        ex=ONE_DAY_IN_SECONDS,
+        ex=get_settings().user_credentials_cache_ttl_seconds,
     )
+    invalidate_client_cache(f"user_credentials:{user_ulid}")
 
 
 async def delete_cached_user_credentials_async(redis_client: Redis, user_ulid: str):
     await redis_client.delete(f"user_credentials:{user_ulid}")
+    invalidate_client_cache(f"user_credentials:{user_ulid}")
+
+
+async def set_cached_user_credentials_many_async(
+    redis_client: Redis, user_credentials_list: list[UserCredentials]
+):
+    ttl_seconds = get_settings().user_credentials_cache_ttl_seconds
+    async with redis_client.pipeline(transaction=False) as pipeline:
+        for user_credentials in user_credentials_list:
+            pipeline.set(
+                f"user_credentials:{user_credentials.user_ulid}",
+                user_credentials.model_dump_json(),
+                ex=ttl_seconds,
+            )
+
+        await pipeline.execute()
+
+    invalidate_client_cache(
+        *(
+            f"user_credentials:{user_credentials.user_ulid}"
+            for user_credentials in user_credentials_list
+        )
+    )
+
+
+async def add_cached_user_credentials_many_async(
+    redis_client: Redis, user_credentials_list: list[UserCredentials]
+) -> int:
+    """
+    Caches the user credentials not cached yet, keeping the cached ones, which may be
+    fresher.
+
+    Returns:
+        int: The number of user credentials added.
+    """
+    ttl_seconds = get_settings().user_credentials_cache_ttl_seconds
+    async with redis_client.pipeline(transaction=False) as pipeline:
+        for user_credentials in user_credentials_list:
+            pipeline.set(
+                f"user_credentials:{user_credentials.user_ulid}",
+                user_credentials.model_dump_json(),
+                ex=spread_ttl_seconds(ttl_seconds),
+                nx=True,
+            )
+
+        results = await pipeline.execute()
+
+    invalidate_client_cache(
+        *(
+            f"user_credentials:{user_credentials.user_ulid}"
+            for user_credentials in user_credentials_list
+        )
+    )
+    return sum(1 for result in results if result)
+
+
+async def delete_cached_user_credentials_many_async(
+    redis_client: Redis, user_ulids: list[str]
+):
+    keys = [f"user_credentials:{user_ulid}" for user_ulid in user_ulids]
+    await redis_client.delete(*keys)
+    invalidate_client_cache(*keys)
+
+
+async def get_completed_registration_async(
+    redis_client: Redis, temp_user_ulid: str
+) -> bytes | None:
+    """
+    Returns the final user ULID of a recently completed registration.
+    """
+    return await redis_client.get(f"registration:{temp_user_ulid}")
+
+
+async def set_completed_registrations_async(
+    redis_client: Redis, final_user_ulids: dict[str, str]
+):
+    """
+    Records the completed registrations, for a short while, and notifies their waiters.
+
+    Args:
+        final_user_ulids (dict[str, str]): The final user ULIDs by temp user ULID.
+    """
+    ttl_seconds = get_settings().registration_completed_ttl_seconds
+    # Cluster pipelines can't publish.
+    is_cluster = isinstance(redis_client, RedisCluster)
+
+    async with redis_client.pipeline(transaction=False) as pipeline:
+        for temp_user_ulid, final_user_ulid in final_user_ulids.items():
+            pipeline.set(
+                f"registration:{temp_user_ulid}", final_user_ulid, ex=ttl_seconds
+            )
+            if not is_cluster:
+                publish_notification(
+                    pipeline,
+                    REDIS_CHANNEL_REGISTRATIONS,
+                    temp_user_ulid,
+                    final_user_ulid,
+                )
+
+        await pipeline.execute()
+
+    if is_cluster:
+        await publish_notifications_async(
+            redis_client, REDIS_CHANNEL_REGISTRATIONS, final_user_ulids
+        )
@@ -1,41 +1,76 @@
-from dotenv import load_dotenv
 from fastapi import FastAPI
 from tortoise.contrib.fastapi import tortoise_exception_handlers
 
-from auth_api.queuing.user_handlers import handle_user_created_async
+from auth_api.data.cache_warmup_utils import warm_user_credentials_cache_async
+from auth_api.data.entities import DB_MODULES
+from auth_api.queuing.user_handlers import handle_user_created_batch_async
 from auth_api.routers.auth import api_auth_router
-from shared.lib.constants import APP_NAME_AUTH_API, EXCHANGE_USER_CREDENTIALS
-from shared.lib.fastapi_utils import app_add_cors, app_lifespan
+from shared.lib.constants import (
+    APP_NAME_AUTH_API,
+    EXCHANGE_USER_CREDENTIALS,
+    REDIS_CHANNEL_REGISTRATIONS,
+)
+from shared.lib.fastapi_utils import (
+    app_add_admission_control,
+    app_add_compression,
+    app_add_cors,
+    app_add_db_read_routing,
+    app_add_metrics,
+    app_add_request_deadline,
+    app_add_tracing,
+    app_lifespan,
+)
 from shared.lib.rabbitmq_client.rabbitmq_exchange_client import (
     get_rabbit_mq_exchange_client,
 )
-from shared.queue_consumers.user_consumers import consume_user_created_async
+from shared.lib.redis_pubsub_utils import (
+    start_redis_notification_listener_async,
+    stop_redis_notification_listeners_async,
+)
+from shared.lib.redis_utils import get_redis_client
+from shared.lib.settings import init_settings
+from shared.queue_consumers.user_consumers import consume_user_created_batch_async
 
 
 async def app_on_init_async(_: FastAPI):
+    # One subscription per process, for all the registration waits.
+    await start_redis_notification_listener_async(
+        get_redis_client(), REDIS_CHANNEL_REGISTRATIONS
+    )
+
     rabbit_mq_exchange_client = get_rabbit_mq_exchange_client()
     await rabbit_mq_exchange_client.declare_exchange_async(EXCHANGE_USER_CREDENTIALS)
 
-    await consume_user_created_async(
-        app_name=APP_NAME_AUTH_API, async_handler=handle_user_created_async
+    await consume_user_created_batch_async(
+        app_name=APP_NAME_AUTH_API,
+        async_batch_handler=handle_user_created_batch_async,
     )
 
 
-load_dotenv()
+async def app_on_exit_async(_: FastAPI):
+    await stop_redis_notification_listeners_async()
+
+
+init_settings()
 
 app = FastAPI(
     lifespan=app_lifespan(
         app_folder="auth_api",
-        modules={
-            "entities": [
-                f"{APP_NAME_AUTH_API}.data.entities.data_user_credentials",
-            ]
-        },
+        modules=DB_MODULES,
         use_redis=True,
         use_rabbit_mq=True,
+        use_outbox=True,
+        warm_cache_async=warm_user_credentials_cache_async,
         additional_app_on_init_async=app_on_init_async,
+        additional_app_on_exit_async=app_on_exit_async,
     ),
     exception_handlers=tortoise_exception_handlers(),
 )
 app_add_cors(app)
+app_add_request_deadline(app)
+app_add_db_read_routing(app)
+app_add_compression(app)
+app_add_admission_control(app)
+app_add_tracing(app, APP_NAME_AUTH_API)
+app_add_metrics(app)
 app.include_router(api_auth_router, prefix="/api/v1")
@@ -0,0 +1,18 @@
+"""
+Creates the missing tables and indexes of auth_api. Run it once before starting the
+workers, with `DB_GENERATE_SCHEMAS=false` so that they skip it.
+
+Usage (from the repository root): `python -m auth_api.migrate`
+"""
+
+from auth_api.data.entities import DB_MODULES
+from shared.lib.constants import APP_NAME_AUTH_API
+from shared.lib.schema_migrations import run_schema_migrations
+
+
+def main():
+    run_schema_migrations(APP_NAME_AUTH_API, DB_MODULES, use_outbox=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,17 @@
 from shared.event_models.user_credentials import UserCredentialsCreated
 from shared.lib.constants import (
+    EXCHANGE_USER_CREDENTIALS,
     TOPIC_USER_CREDENTIALS_CREATED,
 )
-from shared.lib.rabbitmq_client.rabbitmq_exchange_client import (
-    get_rabbit_mq_exchange_client,
-)
-
+from shared.lib.outbox.outbox_relay import enqueue_outbox_event_async
 
-async def publish_user_credentials_created_async(dto: UserCredentialsCreated):
-    rabbit_mq_exchange_client = get_rabbit_mq_exchange_client()
 
-    await rabbit_mq_exchange_client.publish_async(
-        topic_name=TOPIC_USER_CREDENTIALS_CREATED, dto=dto
+async def enqueue_user_credentials_created_async(dto: UserCredentialsCreated):
+    """
+    Must be called inside the transaction creating the user credentials.
+    """
+    await enqueue_outbox_event_async(
+        exchange_name=EXCHANGE_USER_CREDENTIALS,
+        topic_name=TOPIC_USER_CREDENTIALS_CREATED,
+        dto=dto,
     )
@@ -1,12 +1,21 @@
 from tortoise.transactions import in_transaction
 
-from auth_api.data.db_query_utils import select_user_credentials_by_user_ulid_async
+from auth_api.data.db_query_utils import (
+    select_user_credentials_by_user_ulid_async,
+    select_user_credentials_by_user_ulids_async,
+)
+from auth_api.data.entities.data_user_credentials import DataUserCredentials
 from auth_api.data.mapper_utils import data_user_credentials_to_model
 from auth_api.data.redis_query_utils import (
     delete_cached_user_credentials_async,
+    delete_cached_user_credentials_many_async,
     set_cached_user_credentials_async,
+    set_cached_user_credentials_many_async,
+    set_completed_registrations_async,
 )
 from shared.event_models.users import UserCreated
+from shared.lib.constants import DB_CONNECTION_DEFAULT
+from shared.lib.date_utils import now_utc
 from shared.lib.HTTPException_utils import user_not_found_exception
 from shared.lib.redis_utils import get_redis_client
 
@@ -20,7 +29,7 @@ async def handle_user_created_async(dto: UserCreated):
     if data_user_credentials is None:
         raise user_not_found_exception(dto.temp_user_ulid + " [TEMP]")
 
-    async with in_transaction():
+    async with in_transaction(DB_CONNECTION_DEFAULT):
         data_user_credentials.user_ulid = dto.final_user_ulid
         await data_user_credentials.save()
 
@@ -30,3 +39,52 @@ async def handle_user_created_async(dto: UserCreated):
         await set_cached_user_credentials_async(
             redis_client, dto.final_user_ulid, user_credentials
         )
+
+    await set_completed_registrations_async(
+        redis_client, {dto.temp_user_ulid: dto.final_user_ulid}
+    )
+
+
+async def handle_user_created_batch_async(dtos: list[UserCreated]):
+    redis_client = get_redis_client()
+
+    final_user_ulids = {dto.temp_user_ulid: dto.final_user_ulid for dto in dtos}
+    all_data_user_credentials = await select_user_credentials_by_user_ulids_async(
+        list(final_user_ulids)
+    )
+    if len(all_data_user_credentials) != len(final_user_ulids):
+        found_temp_user_ulids = {
+            data_user_credentials.user_ulid
+            for data_user_credentials in all_data_user_credentials
+        }
+        missing_temp_user_ulid = next(
+            temp_user_ulid
+            for temp_user_ulid in final_user_ulids
+            if temp_user_ulid not in found_temp_user_ulids
+        )
+        raise user_not_found_exception(missing_temp_user_ulid + " [TEMP]")
+
+    updated_at = now_utc()
+    for data_user_credentials in all_data_user_credentials:
+        data_user_credentials.user_ulid = final_user_ulids[
+            data_user_credentials.user_ulid
+        ]
+        data_user_credentials.updated_at = updated_at
+
+    async with in_transaction(DB_CONNECTION_DEFAULT):
+        await DataUserCredentials.bulk_update(
+            all_data_user_credentials, fields=["user_ulid", "updated_at"]
+        )
+
+        await delete_cached_user_credentials_many_async(
+            redis_client, list(final_user_ulids)
+        )
+        await set_cached_user_credentials_many_async(
+            redis_client,
+            [
+                data_user_credentials_to_model(data_user_credentials)
+                for data_user_credentials in all_data_user_credentials
+            ],
+        )
+
+    await set_completed_registrations_async(redis_client, final_user_ulids)
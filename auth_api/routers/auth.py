@@ -1,3 +1,4 @@
+import asyncio
 from datetime import timedelta
 from typing import Annotated
 
@@ -18,26 +19,34 @@ from auth_api.data.mapper_utils import data_user_credentials_to_model
 from auth_api.data.redis_query_utils import (
     delete_cached_user_credentials_async,
     get_cached_user_credentials_async,
+    get_completed_registration_async,
     set_cached_user_credentials_async,
 )
 from auth_api.queuing.user_credentials_publisher import (
-    publish_user_credentials_created_async,
+    enqueue_user_credentials_created_async,
 )
 from shared.event_models.user_credentials import UserCredentialsCreated
-from shared.lib.application_variables import ApplicationVariables
+from shared.lib.constants import DB_CONNECTION_DEFAULT, REDIS_CHANNEL_REGISTRATIONS
 from shared.lib.crypto import hash_password, verify_password
+from shared.lib.db_config_utils import read_from_primary
+from shared.lib.fastapi_utils import FastStatusResponseRoute
 from shared.lib.HTTPException_utils import (
     email_already_exists_exception,
     invalid_credentials_exception,
     invalid_login_credentials_exception,
     raise_if_user_has_no_permissions,
 )
+from shared.lib.http_resilience.admission_control import without_admission_control
+from shared.lib.http_resilience.deadlines import get_remaining_budget_seconds
 from shared.lib.jwt_utils import (
     create_access_token,
     decode_token,
     is_user_jwt_admin,
 )
+from shared.lib.outbox.outbox_relay import notify_outbox_relay
+from shared.lib.redis_pubsub_utils import get_redis_notification_listener
 from shared.lib.redis_utils import get_redis_client
+from shared.lib.settings import Settings, get_settings
 from shared.lib.ulid_validators import validate_str_ulid
 from shared.models.auth_dtos import (
     LoginUser,
@@ -48,7 +57,7 @@ from shared.models.auth_dtos import (
 from shared.models.jwt_dtos import JwtToken, JwtTokenDataInput
 from shared.models.status_response_dto import StatusResponse
 
-api_auth_router = APIRouter(prefix="/auth")
+api_auth_router = APIRouter(prefix="/auth", route_class=FastStatusResponseRoute)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/logins/openapi")
 
@@ -91,17 +100,18 @@ async def get_user_credentials(
     ulid: Annotated[str, Path(), AfterValidator(validate_str_ulid)],
     x_internal_api_key: Annotated[str, Header()],
     redis: Annotated[Redis, Depends(get_redis_client)],
+    settings: Annotated[Settings, Depends(get_settings)],
 ) -> StatusResponse[UserCredentials]:
-    if x_internal_api_key != ApplicationVariables.INTERNAL_API_KEY():
+    if x_internal_api_key != settings.internal_api_key:
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    user_credentials_json = await get_cached_user_credentials_async(redis, ulid)
+    cached_user_credentials = await get_cached_user_credentials_async(redis, ulid)
 
-    if user_credentials_json:
+    if cached_user_credentials:
         return StatusResponse(
             status_code=200,
             message=f"User '{ulid}' found",
-            content=UserCredentials.model_validate_json(user_credentials_json),
+            content=cached_user_credentials,
         )
 
     data_user_credentials = await select_user_credentials_by_user_ulid_async(ulid)
@@ -133,8 +143,8 @@ async def create_user(
     if data_user_credentials is not None:
         raise email_already_exists_exception
 
-    async with in_transaction():
-        (hash, salt) = hash_password(register_user_model.password)
+    async with in_transaction(DB_CONNECTION_DEFAULT):
+        hash, salt = hash_password(register_user_model.password)
 
         temp_user_ulid = ULID()
         data_user_credentials = await DataUserCredentials.create(
@@ -152,18 +162,79 @@ async def create_user(
         )
 
         try:
-            await publish_user_credentials_created_async(
+            await enqueue_user_credentials_created_async(
                 UserCredentialsCreated(temp_user_ulid=temp_user_ulid_str)
             )
         except Exception as e:
             await delete_cached_user_credentials_async(redis, temp_user_ulid_str)
             raise e
 
+    notify_outbox_relay()
+
     return StatusResponse(
         status_code=201, message=f"User with temp ULID '{temp_user_ulid}' created"
     )
 
 
+@api_auth_router.get("/registrations/{temp_user_ulid}/wait")
+@without_admission_control
+async def wait_registration(
+    temp_user_ulid: Annotated[str, Path(), AfterValidator(validate_str_ulid)],
+    redis: Annotated[Redis, Depends(get_redis_client)],
+) -> StatusResponse[str]:
+    """
+    Long-polls the completion of a registration, instead of polling the login.
+    Returns the final user ULID, or a 202 status if the registration is still pending
+    when the wait times out, in which case the client should call it again.
+    """
+    redis_notification_listener = get_redis_notification_listener(
+        REDIS_CHANNEL_REGISTRATIONS
+    )
+    waiter = redis_notification_listener.register_waiter(temp_user_ulid)
+
+    try:
+        final_user_ulid = await get_completed_registration_async(redis, temp_user_ulid)
+        if final_user_ulid is not None:
+            return StatusResponse(
+                status_code=200,
+                message=f"Registration '{temp_user_ulid}' completed",
+                content=final_user_ulid.decode(),
+            )
+
+        # Registered without `Authorization`, so a replica may not have it yet.
+        with read_from_primary():
+            data_user_credentials = await select_user_credentials_by_user_ulid_async(
+                temp_user_ulid
+            )
+        if data_user_credentials is None:
+            return StatusResponse(
+                status_code=404,
+                message=f"Registration '{temp_user_ulid}' not found",
+            )
+
+        timeout_seconds = get_settings().registration_wait_timeout_seconds
+        remaining_budget_seconds = get_remaining_budget_seconds()
+        if remaining_budget_seconds is not None:
+            timeout_seconds = min(timeout_seconds, max(0, remaining_budget_seconds))
+
+        try:
+            final_user_ulid = await asyncio.wait_for(waiter, timeout_seconds)
+        except asyncio.TimeoutError:
+            return StatusResponse(
+                status_code=202,
+                message=f"Registration '{temp_user_ulid}' still pending",
+            )
+
+        return StatusResponse(
+            status_code=200,
+            message=f"Registration '{temp_user_ulid}' completed",
+            content=final_user_ulid,
+        )
+
+    finally:
+        redis_notification_listener.release_waiter(temp_user_ulid, waiter)
+
+
 @api_auth_router.put("/{user_ulid}/credentials")
 async def update_user_credentials(
     user_ulid: Annotated[str, Path(), AfterValidator(validate_str_ulid)],
@@ -178,11 +249,11 @@ async def update_user_credentials(
         request_user_ulid=user_ulid,
     )
 
-    (hash, salt) = hash_password(register_user_model.password)
+    hash, salt = hash_password(register_user_model.password)
     current_data_user_credentials.password_hash = hash
     current_data_user_credentials.salt = salt
 
-    async with in_transaction():
+    async with in_transaction(DB_CONNECTION_DEFAULT):
         try:
             await current_data_user_credentials.save()
 
@@ -250,6 +321,6 @@ async def login_async(email: str, password: str) -> tuple[DataUserCredentials, s
         data_user_credentials,
         create_access_token(
             JwtTokenDataInput(sub=data_user_credentials.user_ulid, admin=True),
-            expires_delta=timedelta(minutes=ApplicationVariables.JWT_EXPIRE_MINUTES()),
+            expires_delta=timedelta(minutes=get_settings().jwt_expire_minutes),
         ),
     )
@@ -0,0 +1,67 @@
+"""
+Compares the RabbitMQ message codecs on event payloads of growing size.
+
+Usage (from the repository root): `python -m benchmarks.event_codecs_benchmark`
+"""
+
+import argparse
+import timeit
+
+from pydantic import BaseModel
+from ulid import ULID
+
+from shared.event_models.users import UserCreated
+from shared.lib.constants import CONTENT_TYPE_JSON, CONTENT_TYPE_MSGPACK
+from shared.lib.rabbitmq_client.message_codecs import get_message_codec
+
+
+class _UserCreatedBatch(BaseModel):
+    events: list[UserCreated]
+
+
+def _new_batch(size: int) -> _UserCreatedBatch:
+    return _UserCreatedBatch(
+        events=[
+            UserCreated(final_user_ulid=str(ULID()), temp_user_ulid=str(ULID()))
+            for _ in range(size)
+        ]
+    )
+
+
+def _time_per_call_us(statement, repeat: int) -> float:
+    number = max(1, repeat)
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 1000, 5000])
+    args = parser.parse_args()
+
+    print(f"{'codec':<22}{'events':>8}{'bytes':>12}{'encode µs':>14}{'decode µs':>14}")
+
+    for size in args.sizes:
+        batch = _new_batch(size)
+        repeat = max(1, 20_000 // size)
+
+        for content_type in (CONTENT_TYPE_JSON, CONTENT_TYPE_MSGPACK):
+            try:
+                message_codec = get_message_codec(content_type)
+            except RuntimeError as e:
+                print(f"{content_type:<22}skipped: {e}")
+                continue
+
+            body = message_codec.encode(batch)
+            encode_us = _time_per_call_us(lambda: message_codec.encode(batch), repeat)
+            decode_us = _time_per_call_us(
+                lambda: message_codec.decode(body, _UserCreatedBatch), repeat
+            )
+
+            print(
+                f"{content_type:<22}{size:>8}{len(body):>12}"
+                f"{encode_us:>14.1f}{decode_us:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
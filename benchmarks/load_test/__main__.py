@@ -0,0 +1,288 @@
+"""
+Drives the three services, booted in process (see `services`), with virtual users that
+each register, wait for their registration, log in, then create, list, update and read
+their todo items. Reports the throughput and the p50/p95/p99 latencies of each
+endpoint, and saves them as JSON to compare them across commits.
+
+The numbers measure the services' own code (routing, validation, ORM, serialization,
+hashing, queues) on one event loop, without network or real Redis/RabbitMQ latencies.
+
+Requires `fakeredis`.
+
+Usage (from the repository root):
+    `python -m benchmarks.load_test --users 200 --concurrency 20`
+    `python -m benchmarks.load_test --output load_test.json`
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import re
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.load_test.services import SERVICE_URLS, run_services_async
+from shared.lib.constants import APP_NAME_AUTH_API, APP_NAME_TODO_API
+
+_TEMP_USER_ULID_PATTERN = re.compile(r"temp ULID '(\w+)'")
+_PASSWORD = "load-test-password"
+
+AUTH_API_URL = f"{SERVICE_URLS[APP_NAME_AUTH_API]}/api/v1/auth"
+TODO_API_URL = f"{SERVICE_URLS[APP_NAME_TODO_API]}/api/v1/users"
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.latencies_seconds: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    async def send_async(
+        self,
+        endpoint: str,
+        client: httpx.AsyncClient,
+        method: str,
+        url: str,
+        **kwargs,
+    ) -> httpx.Response:
+        started_at = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies_seconds.setdefault(endpoint, []).append(
+            time.perf_counter() - started_at
+        )
+
+        if response.status_code >= 400:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            raise RuntimeError(
+                f"{endpoint}: {response.status_code} {response.text[:200]}"
+            )
+
+        return response
+
+
+async def run_virtual_user_async(
+    client: httpx.AsyncClient,
+    recorder: LatencyRecorder,
+    email: str,
+    items_per_user: int,
+):
+    response = await recorder.send_async(
+        "register",
+        client,
+        "POST",
+        f"{AUTH_API_URL}/",
+        json={"email": email, "password": _PASSWORD},
+    )
+    temp_user_ulid = _TEMP_USER_ULID_PATTERN.search(response.json()["message"])[1]
+
+    while True:
+        response = await recorder.send_async(
+            "wait_registration",
+            client,
+            "GET",
+            f"{AUTH_API_URL}/registrations/{temp_user_ulid}/wait",
+        )
+        # 202: still pending when the wait timed out.
+        if response.json()["status_code"] == 200:
+            break
+
+    response = await recorder.send_async(
+        "login",
+        client,
+        "POST",
+        f"{AUTH_API_URL}/logins",
+        json={"email": email, "password": _PASSWORD},
+    )
+    login_user_response = response.json()["content"]
+    user_ulid = login_user_response["user_credentials"]["user_ulid"]
+    headers = {
+        "Authorization": f"Bearer {login_user_response['token']['access_token']}"
+    }
+    items_url = f"{TODO_API_URL}/{user_ulid}/items"
+
+    items = []
+    for item_index in range(items_per_user):
+        response = await recorder.send_async(
+            "create_item",
+            client,
+            "POST",
+            f"{items_url}/",
+            headers=headers,
+            json={
+                "user_ulid": user_ulid,
+                "title": f"Item {item_index}",
+                "description": "Created by the load test",
+            },
+        )
+        items.append(response.json()["content"])
+
+    await recorder.send_async(
+        "list_items", client, "GET", f"{items_url}/", headers=headers
+    )
+
+    for item in items:
+        await recorder.send_async(
+            "update_item",
+            client,
+            "PUT",
+            f"{items_url}/{item['ulid']}",
+            headers=headers,
+            json={**item, "done": True},
+        )
+        await recorder.send_async(
+            "get_item", client, "GET", f"{items_url}/{item['ulid']}", headers=headers
+        )
+
+
+async def run_load_async(
+    transport: httpx.AsyncBaseTransport,
+    users: int,
+    concurrency: int,
+    items_per_user: int,
+) -> tuple[LatencyRecorder, float, int]:
+    """
+    Runs `users` virtual users, `concurrency` at a time.
+
+    Returns:
+        tuple[LatencyRecorder, float, int]: The latencies, the duration in seconds
+            and the number of virtual users that failed.
+    """
+    recorder = LatencyRecorder()
+    run_id = int(time.time())
+    next_user_indexes = iter(range(users))
+    failed_users = 0
+
+    async def run_worker_async(client: httpx.AsyncClient):
+        nonlocal failed_users
+        for user_index in next_user_indexes:
+            try:
+                await run_virtual_user_async(
+                    client,
+                    recorder,
+                    f"load-test-{run_id}-{user_index}@example.com",
+                    items_per_user,
+                )
+            except Exception as e:
+                failed_users += 1
+                print(f"Virtual user {user_index} failed: {e}")
+
+    async with httpx.AsyncClient(transport=transport, timeout=60) as client:
+        started_at = time.perf_counter()
+        await asyncio.gather(*(run_worker_async(client) for _ in range(concurrency)))
+        duration_seconds = time.perf_counter() - started_at
+
+    return recorder, duration_seconds, failed_users
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    """
+    Nearest-rank percentile of already sorted values.
+    """
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def build_report(
+    args: argparse.Namespace,
+    recorder: LatencyRecorder,
+    duration_seconds: float,
+    failed_users: int,
+) -> dict:
+    endpoints = {}
+    for endpoint, latencies_seconds in recorder.latencies_seconds.items():
+        sorted_latencies_ms = sorted(latency * 1000 for latency in latencies_seconds)
+        endpoints[endpoint] = {
+            "requests": len(sorted_latencies_ms),
+            "errors": recorder.errors.get(endpoint, 0),
+            "throughput_rps": round(len(sorted_latencies_ms) / duration_seconds, 1),
+            "p50_ms": round(percentile(sorted_latencies_ms, 50), 2),
+            "p95_ms": round(percentile(sorted_latencies_ms, 95), 2),
+            "p99_ms": round(percentile(sorted_latencies_ms, 99), 2),
+            "max_ms": round(sorted_latencies_ms[-1], 2),
+        }
+
+    total_requests = sum(endpoint["requests"] for endpoint in endpoints.values())
+
+    return {
+        "commit": _git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "items_per_user": args.items_per_user,
+        "failed_users": failed_users,
+        "duration_seconds": round(duration_seconds, 2),
+        "throughput_rps": round(total_requests / duration_seconds, 1),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: dict):
+    print(
+        f"\n{report['users']} users, concurrency {report['concurrency']}, "
+        f"{report['duration_seconds']}s, {report['throughput_rps']} requests/s, "
+        f"{report['failed_users']} failed users\n"
+    )
+    print(
+        f"{'endpoint':<20}{'requests':>10}{'errors':>8}{'req/s':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for endpoint, stats in report["endpoints"].items():
+        print(
+            f"{endpoint:<20}{stats['requests']:>10}{stats['errors']:>8}"
+            f"{stats['throughput_rps']:>10}{stats['p50_ms']:>10}"
+            f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+        )
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main_async(args: argparse.Namespace):
+    with tempfile.TemporaryDirectory() as db_folder:
+        async with run_services_async(
+            os.path.join(db_folder, "db.sqlite3")
+        ) as transport:
+            recorder, duration_seconds, failed_users = await run_load_async(
+                transport, args.users, args.concurrency, args.items_per_user
+            )
+
+    report = build_report(args, recorder, duration_seconds, failed_users)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"\nSaved to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--items-per-user", type=int, default=5)
+    parser.add_argument("--output", help="The JSON file to save the report to")
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+A minimal in-memory stand-in for the RabbitMQ broker, implementing the part of the
+aio_pika API that `RabbitMqExchangeClient` and the topic consumers use: topic exchanges,
+durable queues shared by name, prefetch, acks (multiple included), nacks and rejects.
+
+Rejected and nacked messages without requeue are dropped, as there is no dead letter
+exchange. Publishes are confirmed as soon as the message is queued.
+"""
+
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
+
+import aio_pika
+
+
+def topic_matches(binding_key: str, routing_key: str) -> bool:
+    """
+    AMQP topic matching: `*` matches one word, `#` zero or more words.
+    """
+    return _words_match(binding_key.split("."), routing_key.split("."))
+
+
+def _words_match(pattern_words: list[str], words: list[str]) -> bool:
+    if not pattern_words:
+        return not words
+
+    first_pattern_word, *other_pattern_words = pattern_words
+    if first_pattern_word == "#":
+        return any(
+            _words_match(other_pattern_words, words[skipped_count:])
+            for skipped_count in range(len(words) + 1)
+        )
+
+    if not words:
+        return False
+
+    return first_pattern_word in ("*", words[0]) and _words_match(
+        other_pattern_words, words[1:]
+    )
+
+
+class InMemoryBroker:
+    def __init__(self):
+        self.exchanges: dict[str, "InMemoryExchange"] = {}
+        self.queues: dict[str, "InMemoryQueue"] = {}
+        self.published_count = 0
+        self.dropped_count = 0
+
+
+class InMemoryIncomingMessage:
+    def __init__(
+        self,
+        message: aio_pika.Message,
+        channel: "InMemoryChannel",
+        delivery_tag: int,
+    ):
+        self.body = message.body
+        self.content_type = message.content_type
+        self.headers = message.headers
+        self.message_id = message.message_id
+        self.channel = channel
+        self.delivery_tag = delivery_tag
+        self._message = message
+        self.processed = False
+
+    async def ack(self, multiple: bool = False):
+        self.channel.settle(self, multiple)
+
+    async def nack(self, requeue: bool = True):
+        self.channel.settle(self, multiple=False, requeue=requeue)
+
+    async def reject(self, requeue: bool = False):
+        self.channel.settle(self, multiple=False, requeue=requeue)
+
+    @asynccontextmanager
+    async def process(self, requeue: bool = False):
+        try:
+            yield self
+        except BaseException:
+            if not self.processed:
+                await self.reject(requeue=requeue)
+            raise
+        else:
+            if not self.processed:
+                await self.ack()
+
+
+class InMemoryQueue:
+    def __init__(self, broker: InMemoryBroker, name: str):
+        self.broker = broker
+        self.name = name
+        self.bindings: list[tuple[str, str]] = []
+        self.pending: asyncio.Queue[aio_pika.Message] = asyncio.Queue()
+        self._consumers: dict[str, asyncio.Task] = {}
+        self._consumer_tags = itertools.count(1)
+
+    async def bind(self, exchange, routing_key: str):
+        exchange_name = exchange if isinstance(exchange, str) else exchange.name
+        self.bindings.append((exchange_name, routing_key))
+
+    async def consume(
+        self,
+        callback: Callable[[InMemoryIncomingMessage], Awaitable[None]],
+        channel: "InMemoryChannel",
+    ) -> str:
+        consumer_tag = f"{self.name}.{next(self._consumer_tags)}"
+        self._consumers[consumer_tag] = asyncio.create_task(
+            self._deliver_async(callback, channel)
+        )
+
+        return consumer_tag
+
+    async def cancel(self, consumer_tag: str):
+        consumer = self._consumers.pop(consumer_tag, None)
+        if consumer:
+            consumer.cancel()
+
+    def routes(self, exchange_name: str, routing_key: str) -> bool:
+        return any(
+            bound_exchange_name == exchange_name
+            and topic_matches(binding_key, routing_key)
+            for bound_exchange_name, binding_key in self.bindings
+        )
+
+    async def _deliver_async(
+        self,
+        callback: Callable[[InMemoryIncomingMessage], Awaitable[None]],
+        channel: "InMemoryChannel",
+    ):
+        while not channel.is_closed:
+            await channel.wait_for_prefetch_window_async()
+            message = await self.pending.get()
+            if channel.is_closed:
+                self.pending.put_nowait(message)
+                return
+
+            incoming_message = channel.track(message, self)
+            await callback(incoming_message)
+
+
+class InMemoryExchange:
+    def __init__(self, broker: InMemoryBroker, name: str):
+        self.broker = broker
+        self.name = name
+
+    async def publish(self, message: aio_pika.Message, routing_key: str):
+        self.broker.published_count += 1
+
+        routed = False
+        for queue in self.broker.queues.values():
+            if queue.routes(self.name, routing_key):
+                queue.pending.put_nowait(message)
+                routed = True
+
+        if not routed:
+            self.broker.dropped_count += 1
+
+
+class InMemoryChannel:
+    def __init__(self, broker: InMemoryBroker):
+        self.broker = broker
+        self.is_closed = False
+        self.prefetch_count = 0
+        self._delivery_tags = itertools.count(1)
+        self._unacked: dict[int, tuple[InMemoryIncomingMessage, InMemoryQueue]] = {}
+        self._prefetch_window_open = asyncio.Event()
+        self._prefetch_window_open.set()
+
+    async def set_qos(self, prefetch_count: int):
+        self.prefetch_count = prefetch_count
+        self._update_prefetch_window()
+
+    async def declare_exchange(self, name: str, *_, **__) -> InMemoryExchange:
+        return self.broker.exchanges.setdefault(
+            name, InMemoryExchange(self.broker, name)
+        )
+
+    async def get_exchange(self, name: str, ensure: bool = True) -> InMemoryExchange:
+        if name not in self.broker.exchanges:
+            raise KeyError(f"Exchange '{name}' not declared")
+
+        return self.broker.exchanges[name]
+
+    async def declare_queue(self, name: str, *_, **__) -> "_ChannelQueue":
+        queue = self.broker.queues.setdefault(name, InMemoryQueue(self.broker, name))
+        return _ChannelQueue(queue, self)
+
+    async def close(self):
+        self.is_closed = True
+
+        # Unacked messages go back to their queue, like on a real broker.
+        for incoming_message, queue in self._unacked.values():
+            queue.pending.put_nowait(incoming_message._message)
+        self._unacked.clear()
+        self._prefetch_window_open.set()
+
+    def track(
+        self, message: aio_pika.Message, queue: InMemoryQueue
+    ) -> InMemoryIncomingMessage:
+        incoming_message = InMemoryIncomingMessage(
+            message, self, next(self._delivery_tags)
+        )
+        self._unacked[incoming_message.delivery_tag] = (incoming_message, queue)
+        self._update_prefetch_window()
+
+        return incoming_message
+
+    def settle(
+        self,
+        incoming_message: InMemoryIncomingMessage,
+        multiple: bool,
+        requeue: bool = False,
+    ):
+        delivery_tags = (
+            [
+                delivery_tag
+                for delivery_tag in self._unacked
+                if delivery_tag <= incoming_message.delivery_tag
+            ]
+            if multiple
+            else [incoming_message.delivery_tag]
+        )
+
+        for delivery_tag in delivery_tags:
+            settled = self._unacked.pop(delivery_tag, None)
+            if settled is None:
+                continue
+
+            settled_message, queue = settled
+            settled_message.processed = True
+            if requeue:
+                queue.pending.put_nowait(settled_message._message)
+
+        self._update_prefetch_window()
+
+    async def wait_for_prefetch_window_async(self):
+        await self._prefetch_window_open.wait()
+
+    def _update_prefetch_window(self):
+        if self.prefetch_count and len(self._unacked) >= self.prefetch_count:
+            self._prefetch_window_open.clear()
+        else:
+            self._prefetch_window_open.set()
+
+
+class _ChannelQueue:
+    """
+    A queue as seen from a channel, which its consumers deliver on.
+    """
+
+    def __init__(self, queue: InMemoryQueue, channel: InMemoryChannel):
+        self.queue = queue
+        self.channel = channel
+        self.name = queue.name
+
+    async def bind(self, exchange, routing_key: str):
+        await self.queue.bind(exchange, routing_key)
+
+    async def consume(self, callback) -> str:
+        return await self.queue.consume(callback, self.channel)
+
+    async def cancel(self, consumer_tag: str):
+        await self.queue.cancel(consumer_tag)
+
+
+class InMemoryConnection:
+    def __init__(self, broker: InMemoryBroker | None = None):
+        self.broker = broker or InMemoryBroker()
+        self.is_closed = False
+
+    async def channel(self, *_, **__) -> InMemoryChannel:
+        return InMemoryChannel(self.broker)
+
+    async def close(self):
+        self.is_closed = True
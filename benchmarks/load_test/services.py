@@ -0,0 +1,151 @@
+"""
+Boots auth_api, users_api and todo_api in this process, wired together like in
+production except for the network:
+
+- HTTP calls between the services go through ASGI transports, routed by host.
+- Redis is fakeredis, shared by the services like the real global cache.
+- RabbitMQ is the in-memory broker of `in_memory_amqp`.
+- The three services share one SQLite file, each with its own tables, through a single
+  Tortoise init (Tortoise state is process-wide).
+
+The outbox relay, the consumers and the registration notification listener run as in
+the services, so a registration goes through both queues.
+"""
+
+import importlib
+import os
+from contextlib import asynccontextmanager
+from types import ModuleType
+
+import httpx
+from fakeredis import FakeAsyncRedis
+from tortoise import Tortoise
+
+from benchmarks.load_test.in_memory_amqp import InMemoryConnection
+from shared.lib.constants import (
+    APP_NAME_AUTH_API,
+    APP_NAME_TODO_API,
+    APP_NAME_USERS_API,
+)
+
+SERVICE_URLS = {
+    APP_NAME_AUTH_API: "http://auth-api",
+    APP_NAME_USERS_API: "http://users-api",
+    APP_NAME_TODO_API: "http://todo-api",
+}
+
+_DEFAULT_ENVIRONMENT = {
+    "JWT_SECRET_KEY": "load-test-secret-key-of-at-least-32-bytes",
+    "JWT_ALGORITHM": "HS256",
+    "INTERNAL_API_KEY": "load-test-internal-api-key",
+    "AUTH_API_PRIVATE_URL": SERVICE_URLS[APP_NAME_AUTH_API],
+    "USERS_API_PRIVATE_URL": SERVICE_URLS[APP_NAME_USERS_API],
+}
+
+_SERVICE_MODULES = {
+    APP_NAME_AUTH_API: [f"{APP_NAME_AUTH_API}.data.entities.data_user_credentials"],
+    APP_NAME_USERS_API: [f"{APP_NAME_USERS_API}.data.entities.data_user"],
+    APP_NAME_TODO_API: [f"{APP_NAME_TODO_API}.data.entities.data_item"],
+}
+
+
+class HostRoutingTransport(httpx.AsyncBaseTransport):
+    """
+    Sends each request to the in-process app of its host.
+    """
+
+    def __init__(self, apps_by_host: dict[str, object]):
+        self._transports = {
+            host: httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            for host, app in apps_by_host.items()
+        }
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        transport = self._transports.get(request.url.host)
+        if transport is None:
+            raise httpx.ConnectError(
+                f"Unknown host '{request.url.host}'", request=request
+            )
+
+        return await transport.handle_async_request(request)
+
+
+@asynccontextmanager
+async def run_services_async(db_path: str):
+    """
+    Starts the three services, and yields the transport to call them with, at their
+    `SERVICE_URLS`.
+    """
+    for name, value in _DEFAULT_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+
+    # Imported once the environment is set, as the apps read it at import.
+    from shared.lib.db_config_utils import build_tortoise_config
+    from shared.lib.http_resilience.resilient_http_client import (
+        close_http_client_async,
+        init_http_client,
+    )
+    from shared.lib.outbox.outbox_relay import (
+        OUTBOX_ENTITIES_MODULE,
+        start_outbox_relay,
+        stop_outbox_relay_async,
+    )
+    from shared.lib.rabbitmq_client.rabbitmq_connection import (
+        close_rabbit_mq_connection_async,
+        set_rabbit_mq_connection,
+    )
+    from shared.lib.rabbitmq_client.rabbitmq_exchange_client import (
+        close_rabbit_mq_exchange_client_async,
+        init_rabbit_mq_exchange_client,
+    )
+    from shared.lib.rabbitmq_utils import stop_consumers_async
+    from shared.lib.redis_utils import close_redis_async, set_redis_client
+
+    main_modules: dict[str, ModuleType] = {
+        app_name: importlib.import_module(f"{app_name}.main")
+        for app_name in SERVICE_URLS
+    }
+
+    transport = HostRoutingTransport(
+        {
+            httpx.URL(SERVICE_URLS[app_name]).host: main_module.app
+            for app_name, main_module in main_modules.items()
+        }
+    )
+
+    init_http_client(transport)
+    set_redis_client(FakeAsyncRedis())
+
+    rabbit_mq_connection = InMemoryConnection()
+    set_rabbit_mq_connection(rabbit_mq_connection)
+    await init_rabbit_mq_exchange_client().connect_async(rabbit_mq_connection)
+
+    await Tortoise.init(
+        config=build_tortoise_config(
+            f"sqlite:///{db_path}",
+            {**_SERVICE_MODULES, "outbox": [OUTBOX_ENTITIES_MODULE]},
+        )
+    )
+
+    try:
+        await Tortoise.generate_schemas()
+
+        start_outbox_relay()
+        for main_module in main_modules.values():
+            await main_module.app_on_init_async(main_module.app)
+
+        yield transport
+
+    finally:
+        await stop_consumers_async()
+        await stop_outbox_relay_async()
+        for main_module in main_modules.values():
+            app_on_exit_async = getattr(main_module, "app_on_exit_async", None)
+            if app_on_exit_async:
+                await app_on_exit_async(main_module.app)
+
+        await close_redis_async()
+        await close_rabbit_mq_exchange_client_async()
+        await close_rabbit_mq_connection_async()
+        await close_http_client_async()
+        await Tortoise.close_connections()
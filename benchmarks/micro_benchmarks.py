@@ -0,0 +1,212 @@
+"""
+Times the shared helpers that run several times per request (JWT, ULID validation,
+password hashing, `StatusResponse` models, mappers), and compares them to a saved
+baseline: exits with 1 if one of them got slower than the threshold allows.
+
+Each helper is timed with `timeit` (auto-ranged, best of `--repeat`), and reported per
+call. Baselines only compare on the same machine, so they are not committed: the first
+run saves one, as does `--save-baseline` before a change, then runs after it compare.
+
+Usage (from the repository root):
+    `python -m benchmarks.micro_benchmarks --save-baseline`
+    `python -m benchmarks.micro_benchmarks --threshold 0.2`
+    `python -m benchmarks.micro_benchmarks --filter jwt`
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import timedelta
+from typing import Callable
+
+os.environ.setdefault("JWT_SECRET_KEY", "micro-benchmarks-secret-key-of-32-bytes")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+
+from auth_api.data.entities.data_user_credentials import DataUserCredentials
+from auth_api.data.mapper_utils import data_user_credentials_to_model
+from shared.lib.crypto import hash_password, verify_password
+from shared.lib.jwt_utils import create_access_token, decode_token
+from shared.lib.ulid_utils import new_ulid_str
+from shared.lib.ulid_validators import validate_str_ulid
+from shared.models.items_dtos import Item, NewItem
+from shared.models.jwt_dtos import JwtTokenDataInput
+from shared.models.status_response_dto import StatusResponse
+from shared.models.user_dto import User
+from todo_api.data.entities.data_item import DataItem
+from todo_api.data.mapper_utils import data_item_to_model, update_data_item_from_model
+from users_api.data.entities.data_user import DataUser
+from users_api.data.mapper_utils import data_user_to_model
+
+DEFAULT_BASELINE_PATH = os.path.join(
+    os.path.dirname(__file__), "micro_benchmarks_baseline.json"
+)
+DEFAULT_THRESHOLD = 0.25
+
+
+def build_benchmarks() -> dict[str, Callable[[], object]]:
+    user_ulid = new_ulid_str()
+    password = "micro-benchmarks-password"
+    password_hash, salt = hash_password(password)
+    token = create_access_token(
+        JwtTokenDataInput(sub=user_ulid, admin=False), timedelta(minutes=15)
+    )
+
+    item = Item(
+        ulid=new_ulid_str(),
+        user_ulid=user_ulid,
+        title="Title",
+        description="Description",
+    )
+    items = [item] * 20
+    new_item = NewItem(user_ulid=user_ulid, title="Title", description="Description")
+    item_response = StatusResponse[Item](status_code=200, message="Found", content=item)
+    item_response_json = item_response.model_dump_json()
+    items_response = StatusResponse[list[Item]](
+        status_code=200, message="Found", content=items
+    )
+
+    user = User(ulid=user_ulid, first_name="First", last_name="Last", credentials=None)
+    user_response_bytes = (
+        StatusResponse[User](status_code=200, message="Found", content=user)
+        .model_dump_json()
+        .encode()
+    )
+    # Specialized once, like in the HTTP clients.
+    user_status_response = StatusResponse[User]
+
+    data_item = DataItem(
+        ulid=item.ulid,
+        user_ulid=user_ulid,
+        title="Title",
+        description="Description",
+        done=False,
+    )
+    data_user = DataUser(ulid=user_ulid, first_name="First", last_name="Last")
+    data_user_credentials = DataUserCredentials(
+        user_ulid=user_ulid, email="user@example.com", password_hash="", salt=""
+    )
+
+    return {
+        "jwt.create_access_token": lambda: create_access_token(
+            JwtTokenDataInput(sub=user_ulid, admin=False), timedelta(minutes=15)
+        ),
+        "jwt.decode_token": lambda: decode_token(token),
+        "ulid.validate_str_ulid": lambda: validate_str_ulid(user_ulid),
+        "crypto.hash_password": lambda: hash_password(password),
+        "crypto.verify_password": lambda: verify_password(
+            password_hash, password, salt
+        ),
+        "status_response.parametrize": lambda: StatusResponse[Item],
+        "status_response.create": lambda: StatusResponse[Item](
+            status_code=200, message="Found", content=item
+        ),
+        "status_response.dump_json": item_response.model_dump_json,
+        "status_response.dump_json_list_20": items_response.model_dump_json,
+        "status_response.validate_json": lambda: StatusResponse[
+            Item
+        ].model_validate_json(item_response_json),
+        "status_response.validate_json_specialized": lambda: user_status_response.model_validate_json(
+            user_response_bytes
+        ),
+        "mapper.data_item_to_model": lambda: data_item_to_model(data_item),
+        "mapper.update_data_item_from_model": lambda: update_data_item_from_model(
+            data_item, new_item
+        ),
+        "mapper.data_user_to_model": lambda: data_user_to_model(data_user),
+        "mapper.data_user_credentials_to_model": lambda: data_user_credentials_to_model(
+            data_user_credentials
+        ),
+        "model.user_validate": lambda: User.model_validate(
+            {
+                "ulid": user_ulid,
+                "first_name": "First",
+                "last_name": "Last",
+                "credentials": None,
+            }
+        ),
+    }
+
+
+def time_per_call_us(benchmark: Callable[[], object], repeat: int) -> float:
+    """
+    The best time per call, in microseconds, of `repeat` auto-ranged runs.
+    """
+    timer = timeit.Timer(benchmark)
+    number, _ = timer.autorange()
+
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Save the results as the new baseline, instead of comparing them",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="The allowed slowdown over the baseline, e.g. 0.25 for 25%%",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="Only run the benchmarks containing this")
+    args = parser.parse_args()
+
+    baseline_us = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline_us = json.load(baseline_file)
+
+    results_us = {}
+    regressions = []
+
+    print(f"{'benchmark':<42}{'baseline µs':>14}{'current µs':>14}{'change':>10}")
+    for name, benchmark in build_benchmarks().items():
+        if args.filter and args.filter not in name:
+            continue
+
+        results_us[name] = round(time_per_call_us(benchmark, args.repeat), 3)
+
+        change = ""
+        if name in baseline_us:
+            ratio = results_us[name] / baseline_us[name]
+            change = f"{(ratio - 1) * 100:+.1f}%"
+            if ratio > 1 + args.threshold:
+                regressions.append(name)
+                change += " !"
+
+        print(
+            f"{name:<42}{baseline_us.get(name, ''):>14}{results_us[name]:>14}{change:>10}"
+        )
+
+    if args.save_baseline or not baseline_us:
+        # Keeps the baseline of the benchmarks filtered out.
+        saved_baseline_us = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baseline_file:
+                saved_baseline_us = json.load(baseline_file)
+
+        with open(args.baseline, "w") as baseline_file:
+            json.dump({**saved_baseline_us, **results_us}, baseline_file, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if regressions:
+        print(
+            f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: "
+            + ", ".join(regressions)
+        )
+        sys.exit(1)
+
+    print(f"\nNo regression over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
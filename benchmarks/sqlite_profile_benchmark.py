@@ -0,0 +1,150 @@
+"""
+Compares the concurrent read and write throughput of one SQLite file, shared by several
+processes (like the uvicorn workers of a service), with the pragmas Tortoise sets by
+itself, and with the performance profile `build_tortoise_config` applies on top.
+
+Usage (from the repository root): `python -m benchmarks.sqlite_profile_benchmark`
+"""
+
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from ulid import ULID
+
+from shared.lib.db_config_utils import sqlite_pragmas
+
+# Set by Tortoise's SQLite client on every connection, unless configured otherwise.
+_TORTOISE_PROFILE = {
+    "journal_mode": "WAL",
+    "journal_size_limit": 16384,
+    "foreign_keys": "ON",
+}
+
+
+def _connect(db_path: str, pragmas: dict) -> sqlite3.Connection:
+    # Autocommit, so that every write is its own transaction, like a request.
+    connection = sqlite3.connect(db_path, timeout=5.0, isolation_level=None)
+    for pragma, value in pragmas.items():
+        connection.execute(f"PRAGMA {pragma}={value}")
+
+    return connection
+
+
+def _create_db(db_path: str, pragmas: dict, rows: int):
+    connection = _connect(db_path, pragmas)
+    connection.execute(
+        "CREATE TABLE item (id INTEGER PRIMARY KEY, user_ulid TEXT, title TEXT)"
+    )
+    connection.execute("CREATE INDEX idx_item_user_ulid ON item (user_ulid)")
+    connection.executemany(
+        "INSERT INTO item (user_ulid, title) VALUES (?, ?)",
+        ((str(ULID()), "title") for _ in range(rows)),
+    )
+    connection.close()
+
+
+def _run_writer(db_path: str, pragmas: dict, start_at: float, deadline: float, results):
+    connection = _connect(db_path, pragmas)
+    operations = errors = 0
+
+    time.sleep(max(0, start_at - time.time()))
+
+    while time.time() < deadline:
+        try:
+            connection.execute(
+                "INSERT INTO item (user_ulid, title) VALUES (?, ?)",
+                (str(ULID()), "title"),
+            )
+            operations += 1
+        except sqlite3.OperationalError:
+            errors += 1
+
+    connection.close()
+    results.put(("write", operations, errors))
+
+
+def _run_reader(db_path: str, pragmas: dict, start_at: float, deadline: float, results):
+    connection = _connect(db_path, pragmas)
+    operations = errors = 0
+
+    time.sleep(max(0, start_at - time.time()))
+
+    while time.time() < deadline:
+        try:
+            connection.execute(
+                "SELECT id, user_ulid, title FROM item ORDER BY id DESC LIMIT 20"
+            ).fetchall()
+            operations += 1
+        except sqlite3.OperationalError:
+            errors += 1
+
+    connection.close()
+    results.put(("read", operations, errors))
+
+
+def _run_profile(pragmas: dict, args) -> dict[str, tuple[int, int]]:
+    db_path = os.path.join(tempfile.mkdtemp(), "db.sqlite3")
+    _create_db(db_path, pragmas, args.rows)
+
+    results = multiprocessing.Queue()
+    # Every process starts at the same time, once all are up.
+    start_at = time.time() + 1
+    deadline = start_at + args.duration
+    processes = [
+        multiprocessing.Process(
+            target=_run_writer, args=(db_path, pragmas, start_at, deadline, results)
+        )
+        for _ in range(args.writers)
+    ] + [
+        multiprocessing.Process(
+            target=_run_reader, args=(db_path, pragmas, start_at, deadline, results)
+        )
+        for _ in range(args.readers)
+    ]
+    for process in processes:
+        process.start()
+
+    totals = {"write": (0, 0), "read": (0, 0)}
+    for _ in processes:
+        kind, operations, errors = results.get()
+        totals[kind] = (totals[kind][0] + operations, totals[kind][1] + errors)
+
+    for process in processes:
+        process.join()
+
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(
+        f"{args.writers} writer and {args.readers} reader processes, "
+        f"{args.duration}s each profile"
+    )
+    print(f"{'profile':<10}{'writes/s':>12}{'reads/s':>12}{'errors':>10}")
+
+    for profile_name, pragmas in (
+        ("tortoise", _TORTOISE_PROFILE),
+        ("tuned", {**_TORTOISE_PROFILE, **sqlite_pragmas()}),
+    ):
+        totals = _run_profile(pragmas, args)
+        print(
+            f"{profile_name:<10}"
+            f"{totals['write'][0] / args.duration:>12.0f}"
+            f"{totals['read'][0] / args.duration:>12.0f}"
+            f"{totals['write'][1] + totals['read'][1]:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+#!/bin/sh
+# Runs once, when the primary's data directory is created.
+set -e
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<-SQL
+    CREATE ROLE replicator WITH REPLICATION LOGIN PASSWORD 'replicator';
+    CREATE DATABASE auth_api;
+    CREATE DATABASE users_api;
+    CREATE DATABASE todo_api;
+SQL
+
+echo "host replication replicator all scram-sha-256" >> "$PGDATA/pg_hba.conf"
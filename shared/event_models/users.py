@@ -6,3 +6,7 @@ from shared.lib.types import UlidStr
 class UserCreated(BaseModel):
     final_user_ulid: UlidStr
     temp_user_ulid: UlidStr
+
+
+class UserDeleted(BaseModel):
+    user_ulid: UlidStr
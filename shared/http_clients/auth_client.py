@@ -1,25 +1,32 @@
-import httpx
 from fastapi import HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 
 from shared.lib.application_variables import ApplicationVariables
-from shared.lib.constants import INTERNAL_API_KEY_HEADER_NAME
+from shared.lib.constants import APP_NAME_AUTH_API, INTERNAL_API_KEY_HEADER_NAME
+from shared.lib.http_resilience.resilient_http_client import send_request_async
 from shared.models.auth_dtos import LoginUserResponse, UserCredentials
 from shared.models.status_response_dto import StatusResponse
 
+# Specialized once, and validated straight from the response bytes.
+_UserCredentialsStatusResponse = StatusResponse[UserCredentials]
+_LoginUserStatusResponse = StatusResponse[LoginUserResponse]
+
 
 async def get_user_credentials_async(user_ulid: str) -> UserCredentials:
-    async with httpx.AsyncClient() as client:
-        user_credentials_response = await client.get(
-            f"{ApplicationVariables.AUTH_API_PRIVATE_URL()}/api/v1/auth/{user_ulid}",
-            headers={
-                INTERNAL_API_KEY_HEADER_NAME: ApplicationVariables.INTERNAL_API_KEY()
-                or ""
-            },
-        )
+    user_credentials_response = await send_request_async(
+        APP_NAME_AUTH_API,
+        "GET",
+        f"{ApplicationVariables.AUTH_API_PRIVATE_URL()}/api/v1/auth/{user_ulid}",
+        headers={
+            INTERNAL_API_KEY_HEADER_NAME: ApplicationVariables.INTERNAL_API_KEY() or ""
+        },
+        hedge=True,
+    )
 
     user_credentials_response.raise_for_status()
-    response = StatusResponse[UserCredentials](**user_credentials_response.json())
+    response = _UserCredentialsStatusResponse.model_validate_json(
+        user_credentials_response.content
+    )
 
     if response.content is None:
         raise HTTPException(status_code=500)
@@ -30,15 +37,16 @@ async def get_user_credentials_async(user_ulid: str) -> UserCredentials:
 async def login_user_async(
     login_form_data: OAuth2PasswordRequestForm,
 ) -> StatusResponse[LoginUserResponse]:
-    async with httpx.AsyncClient() as client:
-        create_response = await client.post(
-            f"{ApplicationVariables.AUTH_API_PRIVATE_URL()}/api/v1/auth/logins",
-            json={
-                "email": login_form_data.username,
-                "password": login_form_data.password,
-            },
-        )
+    create_response = await send_request_async(
+        APP_NAME_AUTH_API,
+        "POST",
+        f"{ApplicationVariables.AUTH_API_PRIVATE_URL()}/api/v1/auth/logins",
+        json={
+            "email": login_form_data.username,
+            "password": login_form_data.password,
+        },
+    )
 
     create_response.raise_for_status()
 
-    return StatusResponse[LoginUserResponse](**create_response.json())
+    return _LoginUserStatusResponse.model_validate_json(create_response.content)
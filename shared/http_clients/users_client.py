@@ -1,29 +1,34 @@
-import httpx
-
 from shared.lib.application_variables import ApplicationVariables
 from shared.lib.constants import (
+    APP_NAME_USERS_API,
     INTERNAL_API_KEY_HEADER_NAME,
 )
+from shared.lib.http_resilience.resilient_http_client import send_request_async
 from shared.models.status_response_dto import StatusResponse
 from shared.models.user_dto import User
 
+# Specialized once, and validated straight from the response bytes.
+_UserStatusResponse = StatusResponse[User]
+
 
 async def get_user_by_ulid_async(user_ulid: str, token: str) -> StatusResponse[User]:
-    async with httpx.AsyncClient() as client:
-        user_response = await client.get(
-            f"{ApplicationVariables.USERS_API_PRIVATE_URL()}/api/v1/users/{user_ulid}",
-            headers={"Authorization": f"Bearer {token}"},
-        )
+    user_response = await send_request_async(
+        APP_NAME_USERS_API,
+        "GET",
+        f"{ApplicationVariables.USERS_API_PRIVATE_URL()}/api/v1/users/{user_ulid}",
+        headers={"Authorization": f"Bearer {token}"},
+        hedge=True,
+    )
 
-        user_response.raise_for_status()
+    user_response.raise_for_status()
 
-        return StatusResponse[User](**user_response.json())
+    return _UserStatusResponse.model_validate_json(user_response.content)
 
 
-async def delete_user_with_client_async(
-    client: httpx.AsyncClient, user_ulid: str
-) -> StatusResponse:
-    delete_response = await client.delete(
+async def delete_user_async(user_ulid: str) -> StatusResponse:
+    delete_response = await send_request_async(
+        APP_NAME_USERS_API,
+        "DELETE",
         f"{ApplicationVariables.USERS_API_PRIVATE_URL()}/api/v1/users/{user_ulid}/",
         headers={
             INTERNAL_API_KEY_HEADER_NAME: ApplicationVariables.INTERNAL_API_KEY() or ""
@@ -32,4 +37,4 @@ async def delete_user_with_client_async(
 
     delete_response.raise_for_status()
 
-    return StatusResponse(**delete_response.json())
+    return StatusResponse.model_validate_json(delete_response.content)
@@ -36,7 +36,32 @@ def raise_if_user_has_no_permissions(token_user_ulid, request_user_ulid):
         raise user_has_no_permissions_exception
 
 
+def raise_if_item_of_another_user(item_user_ulid, request_user_ulid):
+    # Its shard is the request user's, so the item would be lost for its own user.
+    if item_user_ulid != request_user_ulid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The item's user must be '{request_user_ulid}'",
+        )
+
+
 email_already_exists_exception = HTTPException(
     status_code=status.HTTP_409_CONFLICT,
     detail="Email already exists",
 )
+
+
+deadline_exceeded_exception = HTTPException(
+    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+    detail="Request deadline exceeded",
+)
+
+
+def service_unavailable_exception(
+    target: str, retry_after_seconds: float
+) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"Service '{target}' unavailable",
+        headers={"Retry-After": str(max(1, round(retry_after_seconds)))},
+    )
@@ -1,37 +1,184 @@
-from os import getenv
-
-from shared.lib.constants import DEFAULT_JWT_EXPIRE_MINUTES
+from shared.lib.settings import get_settings
 
 
 class ApplicationVariables:
+    """
+    The settings, by their environment variable names, read from the current
+    `Settings` snapshot rather than from the environment on each call.
+    """
+
     @staticmethod
     def JWT_ALGORITHM():
-        return getenv("JWT_ALGORITHM")
+        return get_settings().jwt_algorithm
 
     @staticmethod
     def JWT_EXPIRE_MINUTES() -> float:
-        return float(getenv("JWT_EXPIRE_MINUTES") or DEFAULT_JWT_EXPIRE_MINUTES)
+        return get_settings().jwt_expire_minutes
 
     @staticmethod
     def AUTH_API_PRIVATE_URL():
-        return getenv("AUTH_API_PRIVATE_URL")
+        return get_settings().auth_api_private_url
 
     @staticmethod
     def USERS_API_PRIVATE_URL():
-        return getenv("USERS_API_PRIVATE_URL")
+        return get_settings().users_api_private_url
 
     @staticmethod
     def INTERNAL_API_KEY():
-        return getenv("INTERNAL_API_KEY")
+        return get_settings().internal_api_key
 
     @staticmethod
     def JWT_SECRET_KEY():
-        return getenv("JWT_SECRET_KEY")
+        return get_settings().jwt_secret_key
 
     @staticmethod
-    def REDIS_HOST() -> str | None:
-        return getenv("REDIS_HOST")
+    def REDIS_HOST() -> str:
+        return get_settings().redis_host
 
     @staticmethod
     def RABBIT_MQ_URL() -> str | None:
-        return getenv("RABBIT_MQ_URL")
+        return get_settings().rabbit_mq_url
+
+    @staticmethod
+    def RABBIT_MQ_PREFETCH_COUNT() -> int:
+        return get_settings().rabbit_mq_prefetch_count
+
+    @staticmethod
+    def RABBIT_MQ_CONTENT_TYPE() -> str:
+        return get_settings().rabbit_mq_content_type
+
+    @staticmethod
+    def RABBIT_MQ_PUBLISHER_CHANNELS() -> int:
+        return get_settings().rabbit_mq_publisher_channels
+
+    @staticmethod
+    def RABBIT_MQ_BATCH_SIZE() -> int:
+        return get_settings().rabbit_mq_batch_size
+
+    @staticmethod
+    def RABBIT_MQ_BATCH_TIMEOUT_MS() -> int:
+        return get_settings().rabbit_mq_batch_timeout_ms
+
+    @staticmethod
+    def RABBIT_MQ_CONSUMER_CONCURRENCY() -> int:
+        return get_settings().rabbit_mq_consumer_concurrency
+
+    @staticmethod
+    def REQUEST_BUDGET_SECONDS() -> float:
+        return get_settings().request_budget_seconds
+
+    @staticmethod
+    def HTTP_CLIENT_TIMEOUT_SECONDS() -> float:
+        return get_settings().http_client_timeout_seconds
+
+    @staticmethod
+    def HTTP_CLIENT_HEDGING_ENABLED() -> bool:
+        return get_settings().http_client_hedging_enabled
+
+    @staticmethod
+    def CIRCUIT_BREAKER_FAILURE_THRESHOLD() -> int:
+        return get_settings().circuit_breaker_failure_threshold
+
+    @staticmethod
+    def CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS() -> float:
+        return get_settings().circuit_breaker_reset_timeout_seconds
+
+    @staticmethod
+    def OUTBOX_BATCH_SIZE() -> int:
+        return get_settings().outbox_batch_size
+
+    @staticmethod
+    def OUTBOX_POLL_INTERVAL_MS() -> int:
+        return get_settings().outbox_poll_interval_ms
+
+    @staticmethod
+    def OUTBOX_CLAIM_LEASE_SECONDS() -> float:
+        return get_settings().outbox_claim_lease_seconds
+
+    @staticmethod
+    def REGISTRATION_WAIT_TIMEOUT_SECONDS() -> float:
+        return get_settings().registration_wait_timeout_seconds
+
+    @staticmethod
+    def SQLITE_SYNCHRONOUS() -> str:
+        return get_settings().sqlite_synchronous
+
+    @staticmethod
+    def SQLITE_MMAP_SIZE() -> int:
+        return get_settings().sqlite_mmap_size
+
+    @staticmethod
+    def SQLITE_CACHE_SIZE() -> int:
+        return get_settings().sqlite_cache_size
+
+    @staticmethod
+    def SQLITE_BUSY_TIMEOUT_MS() -> int:
+        return get_settings().sqlite_busy_timeout_ms
+
+    @staticmethod
+    def SQLITE_READ_CONNECTIONS() -> int:
+        return get_settings().sqlite_read_connections
+
+    @staticmethod
+    def DB_URL() -> str | None:
+        return get_settings().db_url
+
+    @staticmethod
+    def DB_GENERATE_SCHEMAS() -> bool:
+        return get_settings().db_generate_schemas
+
+    @staticmethod
+    def DB_REPLICA_URLS() -> list[str]:
+        return list(get_settings().db_replica_urls)
+
+    @staticmethod
+    def DB_POOL_MIN_SIZE() -> int:
+        return get_settings().db_pool_min_size
+
+    @staticmethod
+    def DB_POOL_MAX_SIZE() -> int:
+        return get_settings().db_pool_max_size
+
+    @staticmethod
+    def DB_REPLICA_POOL_MIN_SIZE() -> int:
+        return get_settings().db_replica_pool_min_size
+
+    @staticmethod
+    def DB_REPLICA_POOL_MAX_SIZE() -> int:
+        return get_settings().db_replica_pool_max_size
+
+    @staticmethod
+    def DB_READ_YOUR_WRITES_SECONDS() -> float:
+        return get_settings().db_read_your_writes_seconds
+
+    @staticmethod
+    def TODO_API_SHARD_URLS() -> list[str]:
+        return list(get_settings().todo_api_shard_urls)
+
+    @staticmethod
+    def TRACING_EXPORTER() -> str:
+        return get_settings().tracing_exporter
+
+    @staticmethod
+    def TRACING_SAMPLE_RATIO() -> float:
+        return get_settings().tracing_sample_ratio
+
+    @staticmethod
+    def TRACING_FILE_PATH() -> str:
+        return get_settings().tracing_file_path
+
+    @staticmethod
+    def COMPRESSION_MINIMUM_SIZE() -> int:
+        return get_settings().compression_minimum_size
+
+    @staticmethod
+    def COMPRESSION_GZIP_LEVEL() -> int:
+        return get_settings().compression_gzip_level
+
+    @staticmethod
+    def COMPRESSION_ZSTD_LEVEL() -> int:
+        return get_settings().compression_zstd_level
+
+    @staticmethod
+    def COMPRESSION_THREAD_MINIMUM_SIZE() -> int:
+        return get_settings().compression_thread_minimum_size
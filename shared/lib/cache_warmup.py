@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import random
+import time
+from types import ModuleType
+from typing import AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+from redis.asyncio import Redis
+from redis.exceptions import LockError
+from tortoise import Model, Tortoise
+from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+
+from shared.lib.db_config_utils import build_tortoise_config, get_app_db_url
+from shared.lib.redis_utils import (
+    close_redis_async,
+    get_redis_client,
+    init_redis_client,
+)
+from shared.lib.settings import get_settings, init_settings
+
+TModel = TypeVar("TModel", bound=Model)
+WarmCacheAsync = Callable[[Redis, int, float], Awaitable[int | None]]
+
+_LOCK_KEY_PREFIX = "cache_warmup_lock:"
+# Renewed after each chunk, so that it only expires if its holder is gone.
+_LOCK_TIMEOUT_SECONDS = 60
+_PROGRESS_INTERVAL_SECONDS = 5.0
+# The warmed keys' TTLs are spread over their last 10%, so that they don't all expire
+# at once.
+_TTL_SPREAD = 0.1
+
+
+def spread_ttl_seconds(ttl_seconds: int) -> int:
+    """
+    A TTL between 90% and 100% of `ttl_seconds`, for the keys cached together.
+    """
+    return random.randint(max(1, int(ttl_seconds * (1 - _TTL_SPREAD))), ttl_seconds)
+
+
+async def iterate_by_recent_activity_async(
+    query: QuerySet[TModel], chunk_size: int
+) -> AsyncIterator[list[TModel]]:
+    """
+    Streams the rows of a query in chunks, the most recently updated first, with keyset
+    pagination on (`updated_at`, `id`): each chunk starts where the previous one ended,
+    rather than skipping an ever larger offset.
+    """
+    last_row = None
+
+    while True:
+        chunk_query = query
+        if last_row is not None:
+            chunk_query = query.filter(
+                Q(updated_at__lt=last_row.updated_at)
+                | Q(updated_at=last_row.updated_at, id__lt=last_row.id)
+            )
+
+        rows = await chunk_query.order_by("-updated_at", "-id").limit(chunk_size)
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+
+        last_row = rows[-1]
+
+
+async def warm_cache_async(
+    redis_client: Redis,
+    name: str,
+    query: QuerySet[TModel],
+    add_cached_async: Callable[[Redis, list[TModel]], Awaitable[int]],
+    chunk_size: int,
+    keys_per_second: float,
+) -> int | None:
+    """
+    Caches the rows of `query` missing from Redis, the most recently active first, a
+    pipeline per chunk, at most `keys_per_second` (0 for no limit). The values already
+    cached are kept, as they may be fresher than the rows read.
+
+    Only one process warms the cache of `name` at a time, holding a lock in Redis.
+
+    Args:
+        add_cached_async: Caches the rows not cached yet, returning how many it added.
+
+    Returns:
+        int | None: The number of keys added, or None if another process is warming the
+            same cache.
+    """
+    lock = redis_client.lock(
+        f"{_LOCK_KEY_PREFIX}{name}", timeout=_LOCK_TIMEOUT_SECONDS, blocking=False
+    )
+    if not await lock.acquire():
+        print(f"{name} cache warm-up: already running elsewhere, skipped")
+        return None
+
+    try:
+        total_count = await query.count()
+        loaded_count = 0
+        added_count = 0
+        started_at = time.monotonic()
+        last_progress_at = started_at
+        print(f"{name} cache warm-up: {total_count} rows")
+
+        async for rows in iterate_by_recent_activity_async(query, chunk_size):
+            added_count += await add_cached_async(redis_client, rows)
+            loaded_count += len(rows)
+            await lock.reacquire()
+
+            now = time.monotonic()
+            if keys_per_second:
+                # Paced on average, so that Redis keeps serving the live traffic.
+                ahead_seconds = loaded_count / keys_per_second - (now - started_at)
+                if ahead_seconds > 0:
+                    await asyncio.sleep(ahead_seconds)
+                    now = time.monotonic()
+
+            if now - last_progress_at >= _PROGRESS_INTERVAL_SECONDS:
+                last_progress_at = now
+                _print_progress(
+                    name, loaded_count, total_count, added_count, now - started_at
+                )
+
+        _print_progress(
+            name,
+            loaded_count,
+            total_count,
+            added_count,
+            time.monotonic() - started_at,
+        )
+        return added_count
+
+    finally:
+        try:
+            await lock.release()
+        except LockError:
+            # Expired, then maybe taken by another process.
+            pass
+
+
+def _print_progress(
+    name: str,
+    loaded_count: int,
+    total_count: int,
+    added_count: int,
+    elapsed_seconds: float,
+):
+    percent = 100 * loaded_count / total_count if total_count else 100
+    keys_per_second = loaded_count / elapsed_seconds if elapsed_seconds else 0
+    print(
+        f"{name} cache warm-up: {loaded_count}/{total_count} ({percent:.0f}%), "
+        f"{added_count} added, {keys_per_second:.0f} keys/s, "
+        f"{elapsed_seconds:.1f}s"
+    )
+
+
+_cache_warmup_task: asyncio.Task | None = None
+
+
+def start_cache_warmup(warm_cache_async: WarmCacheAsync):
+    """
+    Warms the cache in the background, with the `CACHE_WARMUP_*` settings, while the
+    worker starts serving. To call from the running event loop.
+    """
+    global _cache_warmup_task
+    if _cache_warmup_task is not None:
+        return
+
+    settings = get_settings()
+    _cache_warmup_task = asyncio.create_task(
+        _warm_cache_in_background_async(
+            warm_cache_async,
+            settings.cache_warmup_chunk_size,
+            settings.cache_warmup_keys_per_second,
+        )
+    )
+
+
+async def stop_cache_warmup_async():
+    global _cache_warmup_task
+    if _cache_warmup_task:
+        _cache_warmup_task.cancel()
+        try:
+            await _cache_warmup_task
+        except asyncio.CancelledError:
+            pass
+        _cache_warmup_task = None
+
+
+async def _warm_cache_in_background_async(
+    warm_cache_async: WarmCacheAsync, chunk_size: int, keys_per_second: float
+):
+    try:
+        await warm_cache_async(get_redis_client(), chunk_size, keys_per_second)
+    except Exception as e:
+        # The cache fills up with the traffic anyway.
+        print(f"Cache warm-up failed: {e}")
+
+
+def run_cache_warmup(
+    app_folder: str,
+    modules: dict[str, Iterable[str | ModuleType]] | None,
+    warm_cache_async: WarmCacheAsync,
+    description: str | None = None,
+):
+    """
+    The entry point of the services' `warm_cache` module, e.g. after a Redis flush or
+    failover, before the traffic is sent back to the service.
+
+    Example Usage:
+        if __name__ == "__main__":
+            run_cache_warmup(APP_NAME_USERS_API, DB_MODULES, warm_user_cache_async, __doc__)
+    """
+    settings = init_settings()
+
+    parser = argparse.ArgumentParser(
+        description=description, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=settings.cache_warmup_chunk_size
+    )
+    parser.add_argument(
+        "--keys-per-second",
+        type=float,
+        default=settings.cache_warmup_keys_per_second,
+        help="0 for no limit",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(
+        _run_cache_warmup_async(
+            app_folder, modules, warm_cache_async, args.chunk_size, args.keys_per_second
+        )
+    )
+
+
+async def _run_cache_warmup_async(
+    app_folder: str,
+    modules: dict[str, Iterable[str | ModuleType]] | None,
+    warm_cache_async: WarmCacheAsync,
+    chunk_size: int,
+    keys_per_second: float,
+):
+    await Tortoise.init(
+        config=build_tortoise_config(get_app_db_url(app_folder), modules)
+    )
+    init_redis_client(get_settings())
+
+    try:
+        if (
+            await warm_cache_async(get_redis_client(), chunk_size, keys_per_second)
+            is None
+        ):
+            raise SystemExit(1)
+
+    finally:
+        await close_redis_async()
+        await Tortoise.close_connections()
@@ -0,0 +1,281 @@
+import asyncio
+import zlib
+from abc import ABC, abstractmethod
+from typing import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from shared.lib.constants import CONTENT_ENCODING_GZIP, CONTENT_ENCODING_ZSTD
+
+_COMPRESSIBLE_CONTENT_TYPE_PARTS = ("json", "xml", "javascript")
+# Its events must reach the client as soon as they are sent.
+_EVENT_STREAM_CONTENT_TYPE = "text/event-stream"
+
+
+class ResponseCompressor(ABC):
+    """
+    Compresses one response body, chunk by chunk.
+    """
+
+    content_encoding: str
+
+    @abstractmethod
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        """
+        Args:
+            data (bytes): The next chunk of the body.
+            finish (bool): Whether it is the last one. Otherwise, what was compressed so
+                far is flushed, so that the client can decode it right away.
+        """
+
+
+class GzipResponseCompressor(ResponseCompressor):
+    content_encoding = CONTENT_ENCODING_GZIP
+
+    def __init__(self, level: int):
+        # 16 + MAX_WBITS: the gzip container.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH
+        )
+
+
+class ZstdResponseCompressor(ResponseCompressor):
+    """
+    Requires Python 3.14 (`compression.zstd`) or the optional `zstandard` package.
+    """
+
+    content_encoding = CONTENT_ENCODING_ZSTD
+
+    def __init__(self, level: int):
+        try:
+            from compression import zstd
+
+            self._compressor = zstd.ZstdCompressor(level=level)
+            self._compress = self._compressor.compress
+            self._flush_block = lambda: self._compressor.flush(
+                zstd.ZstdCompressor.FLUSH_BLOCK
+            )
+            self._finish = self._compressor.flush
+            return
+        except ImportError:
+            pass
+
+        try:
+            import zstandard
+        except ImportError as e:
+            raise RuntimeError(
+                f"'{CONTENT_ENCODING_ZSTD}' responses require Python 3.14 "
+                "or the 'zstandard' package"
+            ) from e
+
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        self._compress = self._compressor.compress
+        self._flush_block = lambda: self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+        self._finish = self._compressor.flush
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        return self._compress(data) + (
+            self._finish() if finish else self._flush_block()
+        )
+
+
+class CompressionMiddleware:
+    """
+    Compresses the response bodies of at least `minimum_size` bytes, with the best
+    encoding the client accepts (`Accept-Encoding`): zstd, then gzip.
+
+    Streamed bodies are buffered until they reach `minimum_size`, then compressed chunk
+    by chunk, each chunk flushed so that the client gets it right away. Bodies and
+    chunks of at least `thread_minimum_size` bytes are compressed in a worker thread,
+    so that they don't block the event loop.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int,
+        gzip_level: int,
+        zstd_level: int,
+        thread_minimum_size: int,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_minimum_size = thread_minimum_size
+        self.compressor_factories: dict[str, Callable[[], ResponseCompressor]] = {}
+
+        try:
+            ZstdResponseCompressor(zstd_level)
+            self.compressor_factories[CONTENT_ENCODING_ZSTD] = (
+                lambda: ZstdResponseCompressor(zstd_level)
+            )
+        except RuntimeError as e:
+            print(f"Compression: {e}, only gzip is used")
+
+        self.compressor_factories[CONTENT_ENCODING_GZIP] = (
+            lambda: GzipResponseCompressor(gzip_level)
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_encoding = negotiate_content_encoding(
+            Headers(scope=scope).get("accept-encoding", ""),
+            list(self.compressor_factories),
+        )
+        if content_encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(
+            self, self.compressor_factories[content_encoding], send
+        )
+        await self.app(scope, receive, responder.send_async)
+
+
+def negotiate_content_encoding(
+    accept_encoding: str, supported_encodings: list[str]
+) -> str | None:
+    """
+    The supported encoding the client prefers (highest `q`), the first supported one on
+    a tie, or None if it accepts none of them.
+
+    Example Usage:
+        negotiate_content_encoding("gzip, zstd;q=0.5", ["zstd", "gzip"])  # "gzip"
+    """
+    qualities: dict[str, float] = {}
+    for accepted in accept_encoding.split(","):
+        name, _, parameters = accepted.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+
+        quality = 1.0
+        parameter_name, _, value = parameters.partition("=")
+        if parameter_name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[name] = quality
+
+    best_encoding = None
+    best_quality = 0.0
+    for encoding in supported_encodings:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best_encoding = encoding
+            best_quality = quality
+
+    return best_encoding
+
+
+def _is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    if content_type.startswith(_EVENT_STREAM_CONTENT_TYPE):
+        return False
+
+    return content_type.startswith("text/") or any(
+        part in content_type for part in _COMPRESSIBLE_CONTENT_TYPE_PARTS
+    )
+
+
+class _CompressingResponder:
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        compressor_factory: Callable[[], ResponseCompressor],
+        send: Send,
+    ):
+        self.middleware = middleware
+        self.compressor_factory = compressor_factory
+        self.send = send
+        self.start_message: Message | None = None
+        self.compressor: ResponseCompressor | None = None
+        self.passthrough = False
+        self.pending_chunks: list[bytes] = []
+        self.pending_size = 0
+
+    async def send_async(self, message: Message):
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if "content-encoding" in headers or not _is_compressible(
+                headers.get("content-type", "")
+            ):
+                self.passthrough = True
+                await self.send(message)
+                return
+
+            # Sent with the first chunk, once it is known whether it is compressed.
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            self.pending_chunks.append(body)
+            self.pending_size += len(body)
+
+            if self.pending_size < self.middleware.minimum_size:
+                if more_body:
+                    return
+
+                # Too small to be worth it: sent as it is.
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(
+                    {
+                        "type": "http.response.body",
+                        "body": b"".join(self.pending_chunks),
+                    }
+                )
+                return
+
+            self.compressor = self.compressor_factory()
+            body = b"".join(self.pending_chunks)
+            self.pending_chunks.clear()
+
+        compressed_body = await self._compress_async(body, finish=not more_body)
+
+        if self.start_message is not None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["content-encoding"] = self.compressor.content_encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                # Streamed, so its compressed length is unknown yet.
+                del headers["content-length"]
+            else:
+                headers["content-length"] = str(len(compressed_body))
+
+            await self.send(self.start_message)
+            self.start_message = None
+
+        await self.send(
+            {
+                "type": "http.response.body",
+                "body": compressed_body,
+                "more_body": more_body,
+            }
+        )
+
+    async def _compress_async(self, data: bytes, finish: bool) -> bytes:
+        if len(data) >= self.middleware.thread_minimum_size:
+            return await asyncio.to_thread(self.compressor.compress, data, finish)
+
+        return self.compressor.compress(data, finish)
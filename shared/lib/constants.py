@@ -8,3 +8,84 @@ TOPIC_USER_CREATED = "user.created"
 INTERNAL_API_KEY_HEADER_NAME = "x-internal-api-key"
 DEFAULT_JWT_EXPIRE_MINUTES = 1440  # 1 day.
 ONE_DAY_IN_SECONDS = 86400
+DEFAULT_USER_CACHE_TTL_SECONDS = ONE_DAY_IN_SECONDS
+DEFAULT_USER_CREDENTIALS_CACHE_TTL_SECONDS = ONE_DAY_IN_SECONDS
+DEFAULT_REDIS_HOST = "127.0.0.1"
+DEFAULT_REDIS_PORT = 6379
+REDIS_MODE_STANDALONE = "standalone"
+REDIS_MODE_SENTINEL = "sentinel"
+REDIS_MODE_CLUSTER = "cluster"
+DEFAULT_REDIS_SENTINEL_SERVICE_NAME = "mymaster"
+DEFAULT_REDIS_PROTOCOL = 2
+DEFAULT_REDIS_MAX_CONNECTIONS = 50
+DEFAULT_REDIS_POOL_TIMEOUT_SECONDS = 5.0
+DEFAULT_REDIS_SOCKET_TIMEOUT_SECONDS = 5.0
+DEFAULT_REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS = 2.0
+DEFAULT_REDIS_HEALTH_CHECK_INTERVAL_SECONDS = 30
+# The keys kept in the process, invalidated by Redis, with `REDIS_CLIENT_CACHE_ENABLED`.
+REDIS_CLIENT_CACHE_KEY_PREFIXES = ("user:", "user_credentials:")
+DEFAULT_REDIS_CLIENT_CACHE_MAX_KEYS = 10000
+DEFAULT_REDIS_CLIENT_CACHE_TTL_SECONDS = 60.0
+DEFAULT_CACHE_WARMUP_CHUNK_SIZE = 1000
+DEFAULT_CACHE_WARMUP_KEYS_PER_SECOND = 5000.0
+REQUEST_DEADLINE_HEADER_NAME = "x-request-deadline"
+DEFAULT_REQUEST_BUDGET_SECONDS = 10.0
+DEFAULT_HTTP_CLIENT_TIMEOUT_SECONDS = 5.0
+DEFAULT_CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS = 10.0
+DEFAULT_RABBIT_MQ_HEARTBEAT_SECONDS = 60
+DEFAULT_RABBIT_MQ_PREFETCH_COUNT = 32
+DEFAULT_RABBIT_MQ_CONSUMER_CONCURRENCY = 8
+DEFAULT_RABBIT_MQ_BATCH_SIZE = 100
+DEFAULT_RABBIT_MQ_BATCH_TIMEOUT_MS = 50
+DEFAULT_RABBIT_MQ_PUBLISHER_CHANNELS = 4
+DEFAULT_RABBIT_MQ_CONSUMER_DRAIN_TIMEOUT_SECONDS = 10.0
+CONTENT_TYPE_JSON = "application/json"
+CONTENT_TYPE_MSGPACK = "application/msgpack"
+DEFAULT_OUTBOX_BATCH_SIZE = 100
+DEFAULT_OUTBOX_POLL_INTERVAL_MS = 500
+DEFAULT_OUTBOX_CLAIM_LEASE_SECONDS = 30.0
+REDIS_CHANNEL_REGISTRATIONS = "registrations"
+DEFAULT_REGISTRATION_COMPLETED_TTL_SECONDS = 300
+DEFAULT_REGISTRATION_WAIT_TIMEOUT_SECONDS = 20.0
+TOPIC_USER_DELETED = "user.deleted"
+USER_ITEMS_DELETE_CHUNK_SIZE = 1000
+DB_CONNECTION_DEFAULT = "default"
+DB_CONNECTION_READ_PREFIX = "read_"
+DEFAULT_SQLITE_SYNCHRONOUS = "NORMAL"
+DEFAULT_SQLITE_MMAP_SIZE = 268435456  # 256 MiB.
+DEFAULT_SQLITE_CACHE_SIZE = -65536  # 64 MiB (negative values are in KiB).
+DEFAULT_SQLITE_BUSY_TIMEOUT_MS = 5000
+DEFAULT_SQLITE_READ_CONNECTIONS = 0
+DEFAULT_DB_POOL_MIN_SIZE = 1
+DEFAULT_DB_POOL_MAX_SIZE = 10
+DEFAULT_DB_REPLICA_POOL_MIN_SIZE = 1
+DEFAULT_DB_REPLICA_POOL_MAX_SIZE = 10
+DEFAULT_DB_READ_YOUR_WRITES_SECONDS = 5.0
+# Sent with the internal API key, by a request reading from the primary, so that the
+# services it calls do too.
+READ_FROM_PRIMARY_HEADER_NAME = "x-read-from-primary"
+DB_CONNECTION_SHARD_PREFIX = "shard_"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+TRACING_EXPORTER_NONE = "none"
+TRACING_EXPORTER_CONSOLE = "console"
+TRACING_EXPORTER_FILE = "file"
+TRACING_EXPORTER_OTLP = "otlp"
+DEFAULT_TRACING_SAMPLE_RATIO = 1.0
+DEFAULT_TRACING_FILE_PATH = "traces.jsonl"
+
+CONTENT_ENCODING_GZIP = "gzip"
+CONTENT_ENCODING_ZSTD = "zstd"
+DEFAULT_COMPRESSION_MINIMUM_SIZE = 1024
+DEFAULT_COMPRESSION_GZIP_LEVEL = 6
+DEFAULT_COMPRESSION_ZSTD_LEVEL = 3
+DEFAULT_COMPRESSION_THREAD_MINIMUM_SIZE = 256 * 1024
+
+DEFAULT_ADMISSION_INITIAL_LIMIT = 20
+DEFAULT_ADMISSION_MIN_LIMIT = 2
+DEFAULT_ADMISSION_MAX_LIMIT = 200
+DEFAULT_ADMISSION_QUEUE_SIZE = 50
+DEFAULT_ADMISSION_LATENCY_TARGET_SECONDS = 1.0
+DEFAULT_ADMISSION_QUEUE_TIMEOUT_SECONDS = 1.0
@@ -0,0 +1,351 @@
+import hashlib
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import ModuleType
+from typing import Iterable
+
+from redis.exceptions import RedisError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from tortoise import Model
+from tortoise.backends.base.config_generator import expand_db_url
+
+from shared.lib.application_variables import ApplicationVariables
+from shared.lib.constants import (
+    DB_CONNECTION_DEFAULT,
+    DB_CONNECTION_READ_PREFIX,
+    DB_CONNECTION_SHARD_PREFIX,
+    INTERNAL_API_KEY_HEADER_NAME,
+    READ_FROM_PRIMARY_HEADER_NAME,
+)
+from shared.lib.fs_utils import working_dir_endswith
+from shared.lib.redis_utils import get_redis_client
+from shared.lib.settings import get_settings
+from shared.lib.sharding_utils import set_shard_connection_names
+
+_READ_ONLY_HTTP_METHODS = ("GET", "HEAD")
+_INTERNAL_API_KEY_HEADER_NAME_BYTES = INTERNAL_API_KEY_HEADER_NAME.encode("latin-1")
+_READ_FROM_PRIMARY_HEADER_NAME_BYTES = READ_FROM_PRIMARY_HEADER_NAME.encode("latin-1")
+_POSTGRES_ENGINES = ("tortoise.backends.asyncpg", "tortoise.backends.psycopg")
+
+_reads_routed_to_read_connections: ContextVar[bool] = ContextVar(
+    "reads_routed_to_read_connections", default=False
+)
+_reads_pinned_to_primary: ContextVar[bool] = ContextVar(
+    "reads_pinned_to_primary", default=False
+)
+
+_read_connection_names: list[str] = []
+_next_read_connection_index = 0
+_read_connections_lag = False
+""" Whether the read connections are replicas, which may lag behind the primary. """
+
+
+def sqlite_pragmas() -> dict[str, str | int]:
+    """
+    The SQLite performance profile, applied by Tortoise on every new connection.
+
+    WAL, which Tortoise also defaults to, lets readers and the (single) writer work
+    concurrently. NORMAL synchronous, instead of FULL, only fsyncs at checkpoints,
+    which is still safe against corruption in WAL mode, and is where most of the
+    write throughput comes from. The busy timeout makes the workers of the same file
+    wait for the write lock instead of failing with "database is locked".
+    """
+    return {
+        "journal_mode": "WAL",
+        "synchronous": ApplicationVariables.SQLITE_SYNCHRONOUS(),
+        "mmap_size": ApplicationVariables.SQLITE_MMAP_SIZE(),
+        "cache_size": ApplicationVariables.SQLITE_CACHE_SIZE(),
+        "busy_timeout": ApplicationVariables.SQLITE_BUSY_TIMEOUT_MS(),
+        "temp_store": "MEMORY",
+    }
+
+
+def get_app_db_url(app_folder: str, db_url: str | None = None) -> str:
+    """
+    The database of a service: `db_url`, else `DB_URL`, else its local SQLite file.
+    """
+    # Different environments have different working directories.
+    # Docker doesn't need the app_folder, only in local mode.
+    needed_app_folder = "" if working_dir_endswith(app_folder) else app_folder
+
+    return (
+        db_url
+        or ApplicationVariables.DB_URL()
+        or f"sqlite:///{os.path.abspath(os.path.join(needed_app_folder, 'data', 'db', 'db.sqlite3'))}"
+    )
+
+
+def get_app_db_modules(
+    modules: dict[str, Iterable[str | ModuleType]] | None, use_outbox: bool
+) -> dict[str, Iterable[str | ModuleType]]:
+    """
+    The models of a service, with the outbox events' when it uses the outbox.
+    """
+    modules = modules or {}
+    if not use_outbox:
+        return modules
+
+    # Deferred, as only the services with an outbox need the relay.
+    from shared.lib.outbox.outbox_relay import OUTBOX_ENTITIES_MODULE
+
+    return {
+        **modules,
+        "entities": [*modules.get("entities", []), OUTBOX_ENTITIES_MODULE],
+    }
+
+
+def build_tortoise_config(
+    db_url: str,
+    modules: dict[str, Iterable[str | ModuleType]] | None,
+    replica_db_urls: list[str] | None = None,
+    shard_db_urls: list[str] | None = None,
+) -> dict:
+    """
+    Builds the Tortoise config of a service: its default (write) connection plus its
+    read connections, if any, with the router sending the reads of read-only requests
+    to them.
+
+    - SQLite: the connections get the performance profile, and the read connections
+    are read-only connections to the same file (`SQLITE_READ_CONNECTIONS`).
+    - PostgreSQL: the primary and each replica get their own pool
+    (`DB_POOL_MIN_SIZE`/`DB_POOL_MAX_SIZE` and `DB_REPLICA_POOL_*`), and the read
+    connections are the replicas.
+
+    A sharded service gets no read connections: its queries name their shard's
+    connection (`using_db`), which the router never sees, so they all go to the
+    shards' primaries.
+
+    Args:
+        db_url (str): The primary database, which is also the first shard.
+        modules (dict[str, Iterable[str | ModuleType]] | None): The models of each app.
+        replica_db_urls (list[str] | None): The read replicas of a PostgreSQL primary.
+        shard_db_urls (list[str] | None): The other shards, each SQLite or PostgreSQL,
+            used through `shared.lib.sharding_utils`. Not None for a sharded service,
+            even with a single shard.
+
+    Example Usage:
+        config = build_tortoise_config("sqlite:///data/db/db.sqlite3", modules)
+        async with RegisterTortoise(app=app, config=config, generate_schemas=True):
+            ...
+    """
+    global _read_connections_lag
+
+    default_connection = _expand_db_url(db_url)
+    connections = {DB_CONNECTION_DEFAULT: default_connection}
+    read_connection_names = []
+
+    if shard_db_urls is not None:
+        _read_connections_lag = False
+
+    elif default_connection["engine"] == "tortoise.backends.sqlite":
+        # An in-memory database is private to its connection.
+        if default_connection["credentials"]["file_path"] != ":memory:":
+            for i in range(ApplicationVariables.SQLITE_READ_CONNECTIONS()):
+                read_connection = _expand_db_url(db_url)
+                read_connection["credentials"].update(query_only="ON")
+                read_connection_names.append(f"{DB_CONNECTION_READ_PREFIX}{i}")
+                connections[read_connection_names[-1]] = read_connection
+
+        _read_connections_lag = False
+
+    elif default_connection["engine"] in _POSTGRES_ENGINES:
+        for i, replica_db_url in enumerate(replica_db_urls or []):
+            read_connection = _expand_db_url(replica_db_url, is_replica=True)
+            read_connection_names.append(f"{DB_CONNECTION_READ_PREFIX}{i}")
+            connections[read_connection_names[-1]] = read_connection
+
+        _read_connections_lag = True
+
+    shard_connection_names = [DB_CONNECTION_DEFAULT]
+    for i, shard_db_url in enumerate(shard_db_urls or [], start=1):
+        shard_connection_names.append(f"{DB_CONNECTION_SHARD_PREFIX}{i}")
+        connections[shard_connection_names[-1]] = _expand_db_url(shard_db_url)
+
+    _read_connection_names[:] = read_connection_names
+    set_shard_connection_names(shard_connection_names)
+
+    return {
+        "connections": connections,
+        "apps": {
+            app_name: {
+                "models": list(models),
+                "default_connection": DB_CONNECTION_DEFAULT,
+            }
+            for app_name, models in (modules or {}).items()
+        },
+        "routers": [DbConnectionRouter],
+        # Use UTC.
+        "use_tz": True,
+    }
+
+
+def _expand_db_url(db_url: str, is_replica: bool = False) -> dict:
+    connection = expand_db_url(db_url)
+
+    if connection["engine"] == "tortoise.backends.sqlite":
+        connection["credentials"].update(sqlite_pragmas())
+
+    elif connection["engine"] in _POSTGRES_ENGINES:
+        if is_replica:
+            connection["credentials"].update(
+                minsize=ApplicationVariables.DB_REPLICA_POOL_MIN_SIZE(),
+                maxsize=ApplicationVariables.DB_REPLICA_POOL_MAX_SIZE(),
+            )
+        else:
+            connection["credentials"].update(
+                minsize=ApplicationVariables.DB_POOL_MIN_SIZE(),
+                maxsize=ApplicationVariables.DB_POOL_MAX_SIZE(),
+            )
+
+    return connection
+
+
+def reads_pinned_to_primary() -> bool:
+    """
+    Whether the request being handled reads from the primary, to see its caller's
+    recent writes, which the services it calls must then do too.
+    """
+    return _reads_pinned_to_primary.get()
+
+
+@contextmanager
+def read_from_primary():
+    """
+    Sends the reads within to the primary, e.g. of a row the caller just created while
+    it can't be told apart (no `Authorization`), which a lagging replica may miss.
+
+    Example Usage:
+        with read_from_primary():
+            user_credentials = await select_user_credentials_by_user_ulid_async(ulid)
+    """
+    token = _reads_routed_to_read_connections.set(False)
+    try:
+        yield
+    finally:
+        _reads_routed_to_read_connections.reset(token)
+
+
+class DbConnectionRouter:
+    """
+    Sends the reads to the read-only connections, in turns, while handling a read-only
+    request. Everything else, including the reads of the queue consumers, uses the
+    default connection.
+    """
+
+    def db_for_read(self, _: type[Model]) -> str | None:
+        if not _read_connection_names or not _reads_routed_to_read_connections.get():
+            return None
+
+        global _next_read_connection_index
+        _next_read_connection_index = (_next_read_connection_index + 1) % len(
+            _read_connection_names
+        )
+
+        return _read_connection_names[_next_read_connection_index]
+
+    def db_for_write(self, _: type[Model]) -> str | None:
+        return None
+
+
+class DbReadRoutingMiddleware:
+    """
+    Marks the GET and HEAD requests, whose reads can go to the read connections.
+
+    When those are replicas, a caller that just wrote keeps reading from the primary
+    for `read_your_writes_seconds`, so it always sees its own writes. Callers are told
+    apart by their `Authorization` header, remembered in Redis (when the service uses
+    it) so that all the workers agree. The calls such a request makes to the other
+    services carry the `x-read-from-primary` header, honored with the internal API key,
+    so that they read from their primary too.
+
+    The writes without `Authorization` (e.g. a registration) aren't remembered: the
+    reads that must see them use `read_from_primary`. Neither are any writes when
+    `read_your_writes_seconds` is 0.
+    """
+
+    def __init__(self, app: ASGIApp, read_your_writes_seconds: float):
+        self.app = app
+        self.read_your_writes_ms = int(read_your_writes_seconds * 1000)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not _read_connection_names:
+            await self.app(scope, receive, send)
+            return
+
+        caller_key = (
+            self._get_caller_key(scope)
+            if _read_connections_lag and self.read_your_writes_ms > 0
+            else None
+        )
+
+        if scope["method"] not in _READ_ONLY_HTTP_METHODS:
+            if caller_key is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_marking_write_async(message: Message):
+                # Before the response reaches the caller, who may read right away.
+                if message["type"] == "http.response.start" and message["status"] < 400:
+                    await self._mark_write_async(caller_key)
+                await send(message)
+
+            await self.app(scope, receive, send_marking_write_async)
+            return
+
+        if _read_connections_lag and (
+            self._is_read_from_primary_requested(scope)
+            or (
+                caller_key is not None
+                and await self._has_recent_write_async(caller_key)
+            )
+        ):
+            token = _reads_pinned_to_primary.set(True)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _reads_pinned_to_primary.reset(token)
+            return
+
+        token = _reads_routed_to_read_connections.set(True)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _reads_routed_to_read_connections.reset(token)
+
+    @staticmethod
+    def _get_caller_key(scope: Scope) -> str | None:
+        for header_name, header_value in scope["headers"]:
+            if header_name == b"authorization":
+                return f"recent_write:{hashlib.sha256(header_value).hexdigest()}"
+
+        return None
+
+    @staticmethod
+    def _is_read_from_primary_requested(scope: Scope) -> bool:
+        internal_api_key = get_settings().internal_api_key
+        if not internal_api_key:
+            return False
+
+        headers = dict(scope["headers"])
+        return _READ_FROM_PRIMARY_HEADER_NAME_BYTES in headers and headers.get(
+            _INTERNAL_API_KEY_HEADER_NAME_BYTES
+        ) == internal_api_key.encode("latin-1")
+
+    async def _mark_write_async(self, caller_key: str):
+        try:
+            await get_redis_client().set(caller_key, 1, px=self.read_your_writes_ms)
+        except RuntimeError:
+            # Redis is not used by this service.
+            pass
+        except RedisError as e:
+            print(f"Could not record a write for read-your-writes: {e}")
+
+    async def _has_recent_write_async(self, caller_key: str) -> bool:
+        try:
+            return bool(await get_redis_client().exists(caller_key))
+        except RuntimeError:
+            return False
+        except RedisError:
+            # Unknown, so play safe and read from the primary.
+            return True
@@ -1,67 +1,178 @@
-import os
+import functools
+import inspect
 from contextlib import asynccontextmanager
 from types import ModuleType
-from typing import Awaitable, Callable, Iterable
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable
 
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.dependencies.models import Dependant
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+from fastapi.utils import is_body_allowed_for_status_code
+from pydantic import BaseModel
 from tortoise.contrib.fastapi import RegisterTortoise
 
 from shared.lib.application_variables import ApplicationVariables
-from shared.lib.constants import INTERNAL_API_KEY_HEADER_NAME
-from shared.lib.fs_utils import working_dir_endswith
+from shared.lib.constants import (
+    INTERNAL_API_KEY_HEADER_NAME,
+    PROMETHEUS_CONTENT_TYPE,
+    REDIS_CLIENT_CACHE_KEY_PREFIXES,
+    TRACING_EXPORTER_NONE,
+)
+from shared.lib.db_config_utils import (
+    DbReadRoutingMiddleware,
+    build_tortoise_config,
+    get_app_db_modules,
+    get_app_db_url,
+)
+from shared.lib.http_resilience.deadlines import RequestDeadlineMiddleware
+from shared.lib.http_resilience.resilient_http_client import (
+    close_http_client_async,
+    init_http_client,
+)
+from shared.lib.rabbitmq_client.rabbitmq_connection import (
+    close_rabbit_mq_connection_async,
+    connect_rabbit_mq_async,
+)
 from shared.lib.rabbitmq_client.rabbitmq_exchange_client import (
     close_rabbit_mq_exchange_client_async,
     init_rabbit_mq_exchange_client,
 )
-from shared.lib.redis_utils import close_redis_async, init_redis_client
+from shared.lib.rabbitmq_utils import stop_consumers_async
+from shared.lib.redis_utils import (
+    close_redis_async,
+    get_redis_client,
+    init_redis_client,
+)
+from shared.lib.settings import (
+    get_settings,
+    install_settings_reload_handler,
+    remove_settings_reload_handler,
+)
+from shared.lib.sharding_utils import generate_shard_schemas_async
+
+# The optional features are imported by the `app_add_*` and lifespan branches that
+# enable them, so that the workers of the services without them don't load them.
+if TYPE_CHECKING:
+    from shared.lib.cache_warmup import WarmCacheAsync
 
 
 def app_lifespan(
     app_folder: str,
     modules: dict[str, Iterable[str | ModuleType]] | None,
     db_url: str | None = None,
+    shard_db_urls: list[str] | None = None,
     use_redis: bool = False,
     use_rabbit_mq: bool = False,
+    use_outbox: bool = False,
+    warm_cache_async: "WarmCacheAsync | None" = None,
     additional_app_on_init_async: Callable[[FastAPI], Awaitable[None]] | None = None,
     additional_app_on_exit_async: Callable[[FastAPI], Awaitable[None]] | None = None,
 ):
+    """
+    Connects the service to its dependencies at startup, and closes them at shutdown.
+
+    With `DB_GENERATE_SCHEMAS` off, the workers don't create the missing tables: the
+    service's `migrate` did, once before they started. Each worker reloads its settings
+    on SIGHUP. With `CACHE_WARMUP_ON_STARTUP`, one of them runs `warm_cache_async` in the
+    background.
+    """
+    modules = get_app_db_modules(modules, use_outbox)
+    generate_schemas = ApplicationVariables.DB_GENERATE_SCHEMAS()
+
+    if use_outbox:
+        # Deferred, like the outbox models, for the services without an outbox.
+        from shared.lib.outbox.outbox_relay import (
+            start_outbox_relay,
+            stop_outbox_relay_async,
+        )
+
     @asynccontextmanager
     async def lifespan_async(app: FastAPI):
-        # Different environments have different working directories.
-        # Docker doesn't need the app_folder, only in local mode.
-        needed_app_folder = "" if working_dir_endswith(app_folder) else app_folder
+        settings = get_settings()
+        install_settings_reload_handler()
+        init_http_client()
+
+        use_tracing = settings.tracing_exporter != TRACING_EXPORTER_NONE
+        use_redis_client_cache = use_redis and settings.redis_client_cache_enabled
+        use_cache_warmup = (
+            use_redis
+            and warm_cache_async is not None
+            and settings.cache_warmup_on_startup
+        )
 
         if use_redis:
-            init_redis_client(ApplicationVariables.REDIS_HOST() or "127.0.0.1", 6379)
+            init_redis_client(settings)
+        if use_redis_client_cache:
+            from shared.lib.redis_client_cache import (
+                start_redis_client_cache,
+                stop_redis_client_cache_async,
+            )
+
+            start_redis_client_cache(
+                get_redis_client(), settings, REDIS_CLIENT_CACHE_KEY_PREFIXES
+            )
 
         if use_rabbit_mq:
-            rabbit_mq_exchange_client = init_rabbit_mq_exchange_client()
-            await rabbit_mq_exchange_client.connect_async(
-                ApplicationVariables.RABBIT_MQ_URL() or ""
+            # One connection per process, shared by the publishers and the consumers.
+            rabbit_mq_connection = await connect_rabbit_mq_async(
+                settings.rabbit_mq_url or "", settings.rabbit_mq_heartbeat_seconds
             )
+            rabbit_mq_exchange_client = init_rabbit_mq_exchange_client()
+            await rabbit_mq_exchange_client.connect_async(rabbit_mq_connection)
 
         async with RegisterTortoise(
             app=app,
-            modules=modules,
-            db_url=db_url
-            or f"sqlite:///{os.path.abspath(os.path.join(needed_app_folder, 'data', 'db', 'db.sqlite3'))}",
-            # Use UTC.
-            use_tz=True,
+            config=build_tortoise_config(
+                get_app_db_url(app_folder, db_url),
+                modules,
+                replica_db_urls=ApplicationVariables.DB_REPLICA_URLS(),
+                shard_db_urls=shard_db_urls,
+            ),
             add_exception_handlers=True,
-            generate_schemas=True,
+            generate_schemas=generate_schemas,
         ):
+            if shard_db_urls and generate_schemas:
+                await generate_shard_schemas_async()
+            if use_outbox:
+                # Publishes the events the handlers stored, in their transactions.
+                start_outbox_relay()
+            if use_cache_warmup:
+                from shared.lib.cache_warmup import (
+                    start_cache_warmup,
+                    stop_cache_warmup_async,
+                )
+
+                start_cache_warmup(warm_cache_async)
             if additional_app_on_init_async:
                 await additional_app_on_init_async(app)
 
             yield
 
+            if use_rabbit_mq:
+                # Drain the in-flight messages while their handlers' dependencies are still up.
+                await stop_consumers_async()
+            if use_outbox:
+                await stop_outbox_relay_async()
+            if use_cache_warmup:
+                await stop_cache_warmup_async()
             if additional_app_on_exit_async:
                 await additional_app_on_exit_async(app)
+            if use_redis_client_cache:
+                await stop_redis_client_cache_async()
             if use_redis:
                 await close_redis_async()
             if use_rabbit_mq:
                 await close_rabbit_mq_exchange_client_async()
+                await close_rabbit_mq_connection_async()
+            await close_http_client_async()
+            if use_tracing:
+                from shared.lib.tracing_utils import shutdown_tracing
+
+                shutdown_tracing()
+            remove_settings_reload_handler()
 
     return lifespan_async
 
@@ -82,6 +193,163 @@ def app_add_cors(app: FastAPI):
     )
 
 
+def app_add_request_deadline(app: FastAPI):
+    app.add_middleware(
+        RequestDeadlineMiddleware,
+        default_budget_seconds=ApplicationVariables.REQUEST_BUDGET_SECONDS(),
+    )
+
+
+def app_add_db_read_routing(app: FastAPI):
+    app.add_middleware(
+        DbReadRoutingMiddleware,
+        read_your_writes_seconds=ApplicationVariables.DB_READ_YOUR_WRITES_SECONDS(),
+    )
+
+
+def app_add_compression(app: FastAPI):
+    """
+    Compresses the responses of at least `COMPRESSION_MINIMUM_SIZE` bytes, with zstd
+    or gzip, as the client accepts.
+    """
+    from shared.lib.compression_middleware import CompressionMiddleware
+
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=ApplicationVariables.COMPRESSION_MINIMUM_SIZE(),
+        gzip_level=ApplicationVariables.COMPRESSION_GZIP_LEVEL(),
+        zstd_level=ApplicationVariables.COMPRESSION_ZSTD_LEVEL(),
+        thread_minimum_size=ApplicationVariables.COMPRESSION_THREAD_MINIMUM_SIZE(),
+    )
+
+
+def app_add_admission_control(app: FastAPI):
+    """
+    Sheds the requests of the overloaded routes with a 503, when
+    `ADMISSION_CONTROL_ENABLED`. Add it before including the routers.
+    """
+    settings = get_settings()
+    if not settings.admission_control_enabled:
+        return
+
+    from shared.lib.http_resilience.admission_control import AdmissionController
+
+    admission_controller = AdmissionController(
+        initial_limit=settings.admission_initial_limit,
+        min_limit=settings.admission_min_limit,
+        max_limit=settings.admission_max_limit,
+        queue_size=settings.admission_queue_size,
+        latency_target_seconds=settings.admission_latency_target_seconds,
+        queue_timeout_seconds=settings.admission_queue_timeout_seconds,
+    )
+    app.router.dependencies.append(Depends(admission_controller.admit_async))
+
+
+def app_add_tracing(app: FastAPI, service_name: str):
+    """
+    Enables tracing when `TRACING_EXPORTER` is set, with a server span per request.
+    """
+    if ApplicationVariables.TRACING_EXPORTER() == TRACING_EXPORTER_NONE:
+        return
+
+    from shared.lib.tracing_utils import TracingMiddleware, init_tracing
+
+    init_tracing(
+        service_name,
+        ApplicationVariables.TRACING_EXPORTER(),
+        ApplicationVariables.TRACING_SAMPLE_RATIO(),
+        ApplicationVariables.TRACING_FILE_PATH(),
+    )
+    app.add_middleware(TracingMiddleware)
+
+
+def app_add_metrics(app: FastAPI):
+    """
+    Records the HTTP metrics of every request and exposes all the metrics of the
+    process on `GET /metrics`, in the Prometheus text format. Add it last, so that the
+    latency includes the other middlewares, but before including the routers, whose
+    in-flight requests it counts.
+    """
+    from shared.lib.metrics.http_metrics_middleware import (
+        HttpMetricsMiddleware,
+        track_request_in_flight_async,
+    )
+    from shared.lib.metrics.metrics_registry import metrics_registry
+
+    app.add_middleware(HttpMetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics_async():
+        return PlainTextResponse(
+            metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE
+        )
+
+    app.router.dependencies.append(Depends(track_request_in_flight_async))
+
+
+class FastStatusResponseRoute(APIRoute):
+    """
+    Serializes the pydantic model returned by the endpoint (usually a `StatusResponse`)
+    once, straight to JSON bytes with pydantic-core, instead of validating it again
+    against the response model first. The response model still documents the route in
+    the OpenAPI schema.
+
+    The model is serialized as it is, so it must already be valid, and of the type of
+    the response model: it is not filtered by it. Routes with response model options
+    (include, exclude...), a custom response class or a `Response` parameter keep the
+    default path.
+
+    Example Usage:
+        api_items_router = APIRouter(
+            prefix="/items", route_class=FastStatusResponseRoute
+        )
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = self._wrap_endpoint(endpoint)
+
+        super().__init__(path, endpoint, **kwargs)
+
+        self.serializes_returned_models = (
+            self.response_model_include is None
+            and self.response_model_exclude is None
+            and self.response_model_by_alias
+            and not self.response_model_exclude_unset
+            and not self.response_model_exclude_defaults
+            and not self.response_model_exclude_none
+            and isinstance(self.response_class, DefaultPlaceholder)
+            and is_body_allowed_for_status_code(self.status_code)
+            and not _uses_response_parameter(self.dependant)
+        )
+
+    def _wrap_endpoint(
+        self, endpoint: Callable[..., Awaitable[Any]]
+    ) -> Callable[..., Awaitable[Any]]:
+        # The signature (parameters and return annotation) is read through `__wrapped__`.
+        @functools.wraps(endpoint)
+        async def serialize_returned_model_async(*args, **kwargs):
+            content = await endpoint(*args, **kwargs)
+            if not self.serializes_returned_models or not isinstance(
+                content, BaseModel
+            ):
+                return content
+
+            return Response(
+                content=content.__pydantic_serializer__.to_json(content, by_alias=True),
+                status_code=self.status_code or 200,
+                media_type="application/json",
+            )
+
+        return serialize_returned_model_async
+
+
+def _uses_response_parameter(dependant: Dependant) -> bool:
+    return dependant.response_param_name is not None or any(
+        _uses_response_parameter(dependency) for dependency in dependant.dependencies
+    )
+
+
 def request_is_internal_api_key_valid(request: Request):
     internal_api_key = request.headers.get(INTERNAL_API_KEY_HEADER_NAME)
-    return internal_api_key == ApplicationVariables.INTERNAL_API_KEY()
+    return internal_api_key == get_settings().internal_api_key
@@ -0,0 +1,283 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from enum import IntEnum
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, Request
+from fastapi.routing import APIRoute
+
+from shared.lib.constants import INTERNAL_API_KEY_HEADER_NAME
+from shared.lib.settings import get_settings
+
+TEndpoint = TypeVar("TEndpoint", bound=Callable)
+
+_WITHOUT_ADMISSION_CONTROL_ATTRIBUTE = "__without_admission_control__"
+# Multiplicative decrease of the limit, on a response slower than the target.
+_LIMIT_DECREASE_FACTOR = 0.9
+# Weight of the last response in the smoothed latency.
+_LATENCY_SMOOTHING = 0.1
+
+
+class RequestPriority(IntEnum):
+    """
+    The lower, the later shed.
+    """
+
+    INTERNAL = 0
+    """ Calls between the services, with the internal API key. """
+    EXTERNAL = 1
+
+
+class ConcurrencyLimiter:
+    """
+    Limits the requests a route handles at once, with a limit that adapts to their
+    latency (AIMD): each response within `latency_target_seconds` raises it by
+    1 / limit while it is reached (about +1 per limit's worth of responses), and a
+    slower one cuts it by 10%, at most once per `latency_target_seconds`.
+
+    The requests over the limit wait in a queue of `queue_size`, by priority then
+    arrival, for at most `queue_timeout_seconds`. When it is full, a request takes the
+    place of the last waiting one of a lower priority, or is rejected.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        route: str,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        queue_size: int,
+        latency_target_seconds: float,
+        queue_timeout_seconds: float,
+    ):
+        self.method = method
+        self.route = route
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.latency_target_seconds = latency_target_seconds
+        self.queue_timeout_seconds = queue_timeout_seconds
+
+        self.limit = float(initial_limit)
+        self.in_flight = 0
+        self.latency_seconds = 0.0
+        """ The smoothed latency of the responses. """
+
+        # (priority, arrival, future resolved with whether the request is admitted).
+        self._waiters: list[tuple[int, int, asyncio.Future[bool]]] = []
+        self._arrivals = itertools.count()
+        self._last_decrease_at = 0.0
+
+        self.rejected_total = {priority: 0 for priority in RequestPriority}
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire_async(self, priority: RequestPriority) -> bool:
+        """
+        Waits for a slot, if needed.
+
+        Returns:
+            bool: Whether the request is admitted. If so, `release` must follow.
+        """
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+
+        if len(self._waiters) >= self.queue_size:
+            last_waiter = max(self._waiters, default=None)
+            if last_waiter is None or last_waiter[0] <= priority:
+                self.rejected_total[priority] += 1
+                return False
+
+            self._remove_waiter(last_waiter)
+            last_waiter[2].set_result(False)
+
+        waiter = (
+            priority,
+            next(self._arrivals),
+            asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(self._waiters, waiter)
+        future = waiter[2]
+
+        try:
+            await asyncio.wait((future,), timeout=self.queue_timeout_seconds)
+        except asyncio.CancelledError:
+            if future.done() and future.result():
+                # Admitted as the caller went away: the slot goes to the next one.
+                self.release(None)
+            elif not future.done():
+                self._remove_waiter(waiter)
+                future.cancel()
+            raise
+
+        if not future.done():
+            self._remove_waiter(waiter)
+            future.cancel()
+
+        if future.cancelled() or not future.result():
+            self.rejected_total[priority] += 1
+            return False
+
+        return True
+
+    def release(self, latency_seconds: float | None):
+        """
+        Frees the slot of an admitted request, adapting the limit to its latency.
+
+        Args:
+            latency_seconds (float | None): None if it wasn't handled.
+        """
+        limit_reached = self.in_flight >= int(self.limit) or bool(self._waiters)
+        self.in_flight -= 1
+
+        if latency_seconds is not None:
+            self.latency_seconds += _LATENCY_SMOOTHING * (
+                latency_seconds - self.latency_seconds
+            )
+
+            if latency_seconds > self.latency_target_seconds:
+                now = time.monotonic()
+                if now - self._last_decrease_at >= self.latency_target_seconds:
+                    self.limit = max(
+                        float(self.min_limit), self.limit * _LIMIT_DECREASE_FACTOR
+                    )
+                    self._last_decrease_at = now
+
+            elif limit_reached:
+                self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+
+        while self._waiters and self.in_flight < int(self.limit):
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(True)
+
+    def get_retry_after_seconds(self) -> int:
+        """
+        About the time to handle the requests already waiting.
+        """
+        return max(
+            1,
+            math.ceil(
+                self.latency_seconds * (self.queued + 1) / max(1, int(self.limit))
+            ),
+        )
+
+    def _remove_waiter(self, waiter: tuple[int, int, asyncio.Future[bool]]):
+        self._waiters.remove(waiter)
+        heapq.heapify(self._waiters)
+
+
+_concurrency_limiters: list[ConcurrencyLimiter] = []
+
+
+def without_admission_control(endpoint: TEndpoint) -> TEndpoint:
+    """
+    Exempts an endpoint from the admission control, e.g. a long poll, whose latency
+    says nothing about the load.
+
+    Example Usage:
+        @router.get("/registrations/{temp_user_ulid}/wait")
+        @without_admission_control
+        async def wait_registration(...):
+    """
+    setattr(endpoint, _WITHOUT_ADMISSION_CONTROL_ATTRIBUTE, True)
+    return endpoint
+
+
+def get_all_concurrency_limiters() -> list[ConcurrencyLimiter]:
+    return list(_concurrency_limiters)
+
+
+class AdmissionController:
+    """
+    Gives each API route its own `ConcurrencyLimiter`, and rejects the requests it
+    doesn't admit with a 503 and a `Retry-After`, rather than letting the latency of
+    all of them degrade together. The calls with the internal API key are shed last.
+
+    Installed as an app-wide dependency (`admit_async`), which runs once the request
+    is routed, as its limits are per route. The routes out of the docs (e.g. metrics)
+    and the endpoints `without_admission_control` are not limited.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        queue_size: int,
+        latency_target_seconds: float,
+        queue_timeout_seconds: float,
+    ):
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.latency_target_seconds = latency_target_seconds
+        self.queue_timeout_seconds = queue_timeout_seconds
+        # By route identity, the route being kept so that its id isn't reused.
+        self._limiters: dict[int, tuple[APIRoute, ConcurrencyLimiter]] = {}
+
+    async def admit_async(self, request: Request):
+        route = request.scope.get("route")
+        if (
+            not isinstance(route, APIRoute)
+            or not route.include_in_schema
+            or getattr(route.endpoint, _WITHOUT_ADMISSION_CONTROL_ATTRIBUTE, False)
+        ):
+            yield
+            return
+
+        limiter = self._get_limiter(request.method, route)
+        if not await limiter.acquire_async(_get_priority(request)):
+            raise HTTPException(
+                status_code=503,
+                detail="Service overloaded",
+                headers={"Retry-After": str(limiter.get_retry_after_seconds())},
+            )
+
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            limiter.release(time.perf_counter() - started_at)
+
+    def _get_limiter(self, method: str, route: APIRoute) -> ConcurrencyLimiter:
+        limiter_key = id(route)
+        route_limiter = self._limiters.get(limiter_key)
+
+        if route_limiter is None:
+            limiter = ConcurrencyLimiter(
+                method,
+                route.path,
+                initial_limit=self.initial_limit,
+                min_limit=self.min_limit,
+                max_limit=self.max_limit,
+                queue_size=self.queue_size,
+                latency_target_seconds=self.latency_target_seconds,
+                queue_timeout_seconds=self.queue_timeout_seconds,
+            )
+            route_limiter = (route, limiter)
+            self._limiters[limiter_key] = route_limiter
+            _concurrency_limiters.append(limiter)
+
+        return route_limiter[1]
+
+
+def _get_priority(request: Request) -> RequestPriority:
+    internal_api_key = get_settings().internal_api_key
+
+    if (
+        internal_api_key
+        and request.headers.get(INTERNAL_API_KEY_HEADER_NAME) == internal_api_key
+    ):
+        return RequestPriority.INTERNAL
+
+    return RequestPriority.EXTERNAL
@@ -0,0 +1,126 @@
+import time
+from enum import Enum
+
+from shared.lib.application_variables import ApplicationVariables
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, target: str, retry_after_seconds: float):
+        super().__init__(f"Circuit for '{target}' is open")
+        self.target = target
+        self.retry_after_seconds = retry_after_seconds
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for a single downstream target.
+
+    After `failure_threshold` consecutive failures the circuit opens and every call
+    fails fast for `reset_timeout_seconds`. After that, up to `half_open_max_calls`
+    probe calls are let through: one success closes the circuit, one failure opens it again.
+    """
+
+    def __init__(
+        self,
+        target: str,
+        failure_threshold: int,
+        reset_timeout_seconds: float,
+        half_open_max_calls: int = 1,
+    ):
+        self.target = target
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CircuitState.CLOSED
+
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+        self.opened_total = 0
+        self.rejected_total = 0
+        self.failures_total = 0
+        self.successes_total = 0
+
+    def before_call(self) -> bool:
+        """
+        Returns:
+            bool: Whether the call is a half-open probe, whose slot `release_probe` must
+                free once it ends.
+
+        Raises:
+            CircuitOpenError: When the call must not be sent.
+        """
+        if self.state is CircuitState.OPEN:
+            elapsed_seconds = time.monotonic() - self._opened_at
+
+            if elapsed_seconds < self.reset_timeout_seconds:
+                self.rejected_total += 1
+                raise CircuitOpenError(
+                    self.target, self.reset_timeout_seconds - elapsed_seconds
+                )
+
+            self.state = CircuitState.HALF_OPEN
+            self._half_open_calls = 0
+
+        if self.state is CircuitState.HALF_OPEN:
+            if self._half_open_calls >= self.half_open_max_calls:
+                self.rejected_total += 1
+                raise CircuitOpenError(self.target, self.reset_timeout_seconds)
+
+            self._half_open_calls += 1
+            return True
+
+        return False
+
+    def record_success(self):
+        self.successes_total += 1
+        self._consecutive_failures = 0
+        self.state = CircuitState.CLOSED
+
+    def record_failure(self):
+        self.failures_total += 1
+        self._consecutive_failures += 1
+
+        if (
+            self.state is CircuitState.HALF_OPEN
+            or self._consecutive_failures >= self.failure_threshold
+        ):
+            self.state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+            self.opened_total += 1
+
+    def release_probe(self):
+        """
+        Frees the slot of a half-open probe, which is still needed if it ended without
+        an outcome, e.g. cancelled by our side or failed before reaching the target.
+        """
+        if self.state is CircuitState.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+
+_circuit_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(target: str) -> CircuitBreaker:
+    circuit_breaker = _circuit_breakers.get(target)
+
+    if circuit_breaker is None:
+        circuit_breaker = CircuitBreaker(
+            target,
+            failure_threshold=ApplicationVariables.CIRCUIT_BREAKER_FAILURE_THRESHOLD(),
+            reset_timeout_seconds=ApplicationVariables.CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS(),
+        )
+        _circuit_breakers[target] = circuit_breaker
+
+    return circuit_breaker
+
+
+def get_all_circuit_breakers() -> list[CircuitBreaker]:
+    return list(_circuit_breakers.values())
@@ -0,0 +1,100 @@
+import time
+from contextvars import ContextVar
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from shared.lib.constants import REQUEST_DEADLINE_HEADER_NAME
+
+_REQUEST_DEADLINE_HEADER_NAME_BYTES = REQUEST_DEADLINE_HEADER_NAME.encode("latin-1")
+
+_request_deadline: ContextVar[float | None] = ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineMetrics:
+    def __init__(self):
+        self.expired_requests_dropped = 0
+        """ Incoming requests dropped because the caller had already given up. """
+        self.expired_calls_skipped = 0
+        """ Outgoing calls not sent because the budget was already spent. """
+        self.calls_timed_out = 0
+        """ Outgoing calls that ran out of budget while in flight. """
+
+
+deadline_metrics = DeadlineMetrics()
+
+
+def get_request_deadline() -> float | None:
+    """
+    Returns the absolute deadline (epoch seconds) of the request being handled, if any.
+    """
+    return _request_deadline.get()
+
+
+def get_remaining_budget_seconds() -> float | None:
+    deadline = _request_deadline.get()
+
+    if deadline is None:
+        return None
+
+    return deadline - time.time()
+
+
+def parse_deadline_header(value: str) -> float | None:
+    """
+    Parses a deadline header value (epoch milliseconds) into epoch seconds.
+    Invalid values are ignored, as if no deadline was sent.
+    """
+    try:
+        return int(value) / 1000
+    except ValueError:
+        return None
+
+
+def format_deadline_header(deadline: float) -> str:
+    return str(int(deadline * 1000))
+
+
+class RequestDeadlineMiddleware:
+    """
+    Reads the caller's deadline from the `x-request-deadline` header, or starts a new
+    budget for requests coming from outside, and exposes it to the HTTP clients so it
+    is propagated downstream.
+    Requests that arrive after their deadline are dropped with a 504, since nobody is
+    waiting for the response anymore.
+    """
+
+    def __init__(self, app: ASGIApp, default_budget_seconds: float):
+        self.app = app
+        self.default_budget_seconds = default_budget_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        deadline = None
+        for header_name, header_value in scope["headers"]:
+            if header_name == _REQUEST_DEADLINE_HEADER_NAME_BYTES:
+                deadline = parse_deadline_header(header_value.decode("latin-1"))
+                break
+
+        now = time.time()
+        if deadline is None:
+            deadline = now + self.default_budget_seconds
+
+        elif deadline <= now:
+            deadline_metrics.expired_requests_dropped += 1
+            response = JSONResponse(
+                status_code=504, content={"detail": "Request deadline exceeded"}
+            )
+            await response(scope, receive, send)
+            return
+
+        token = _request_deadline.set(deadline)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_deadline.reset(token)
@@ -0,0 +1,113 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+TResult = TypeVar("TResult")
+
+_MIN_SAMPLES = 20
+_REFRESH_EVERY_SAMPLES = 20
+_MIN_HEDGE_DELAY_SECONDS = 0.005
+
+
+class LatencyTracker:
+    """
+    Keeps a rolling window of successful call latencies for one target, and the p95
+    derived from it, which is used as the hedging delay.
+    The percentile is only recomputed every few samples to keep `record` cheap.
+    """
+
+    def __init__(self, target: str, window_size: int = 200):
+        self.target = target
+        self._samples: deque[float] = deque(maxlen=window_size)
+        self._samples_since_refresh = 0
+        self._p95_seconds: float | None = None
+
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+        self._samples_since_refresh += 1
+
+        if (
+            self._samples_since_refresh >= _REFRESH_EVERY_SAMPLES
+            and len(self._samples) >= _MIN_SAMPLES
+        ):
+            self._samples_since_refresh = 0
+            ordered = sorted(self._samples)
+            self._p95_seconds = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def p95_seconds(self) -> float | None:
+        """Returns `None` until enough samples were recorded."""
+        return self._p95_seconds
+
+
+_latency_trackers: dict[str, LatencyTracker] = {}
+
+
+def get_latency_tracker(target: str) -> LatencyTracker:
+    latency_tracker = _latency_trackers.get(target)
+
+    if latency_tracker is None:
+        latency_tracker = LatencyTracker(target)
+        _latency_trackers[target] = latency_tracker
+
+    return latency_tracker
+
+
+def get_all_latency_trackers() -> list[LatencyTracker]:
+    return list(_latency_trackers.values())
+
+
+async def hedged_call_async(
+    send_async: Callable[[], Awaitable[TResult]],
+    latency_tracker: LatencyTracker,
+) -> TResult:
+    """
+    Sends the call and, if it did not complete within the target's p95 latency,
+    sends a second identical call and returns whichever succeeds first.
+    The slower call is cancelled. Only use it for idempotent requests.
+
+    Args:
+        send_async (Callable[[], Awaitable[TResult]]): Sends one attempt.
+        latency_tracker (LatencyTracker): The tracker of the target being called.
+    """
+    hedge_delay_seconds = latency_tracker.p95_seconds()
+    if hedge_delay_seconds is None:
+        return await send_async()
+
+    first_attempt = asyncio.ensure_future(send_async())
+    pending = {first_attempt}
+
+    try:
+        done, _ = await asyncio.wait(
+            pending, timeout=max(hedge_delay_seconds, _MIN_HEDGE_DELAY_SECONDS)
+        )
+        if done:
+            return first_attempt.result()
+
+        latency_tracker.hedges_sent += 1
+        hedge_attempt = asyncio.ensure_future(send_async())
+        pending.add(hedge_attempt)
+
+        first_error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            for attempt in done:
+                error = attempt.exception()
+                if error is None:
+                    if attempt is hedge_attempt:
+                        latency_tracker.hedges_won += 1
+                    return attempt.result()
+
+                first_error = first_error or error
+
+        assert first_error is not None
+        raise first_error
+
+    finally:
+        for attempt in pending:
+            attempt.cancel()
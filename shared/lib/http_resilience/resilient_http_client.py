@@ -0,0 +1,209 @@
+import time
+from typing import Any
+
+import httpx
+
+from shared.lib.application_variables import ApplicationVariables
+from shared.lib.constants import (
+    READ_FROM_PRIMARY_HEADER_NAME,
+    REQUEST_DEADLINE_HEADER_NAME,
+)
+from shared.lib.db_config_utils import reads_pinned_to_primary
+from shared.lib.http_resilience.circuit_breaker import (
+    CircuitOpenError,
+    get_all_circuit_breakers,
+    get_circuit_breaker,
+)
+from shared.lib.http_resilience.deadlines import (
+    deadline_metrics,
+    format_deadline_header,
+    get_remaining_budget_seconds,
+)
+from shared.lib.http_resilience.hedging import (
+    get_all_latency_trackers,
+    get_latency_tracker,
+    hedged_call_async,
+)
+from shared.lib.HTTPException_utils import (
+    deadline_exceeded_exception,
+    service_unavailable_exception,
+)
+from shared.lib.tracing_utils import (
+    SPAN_KIND_CLIENT,
+    start_child_span,
+    with_trace_headers,
+)
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def init_http_client(transport: httpx.AsyncBaseTransport | None = None):
+    """
+    Args:
+        transport (httpx.AsyncBaseTransport | None): Replaces the network, e.g. to call
+            in-process apps in benchmarks.
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=ApplicationVariables.HTTP_CLIENT_TIMEOUT_SECONDS(),
+            transport=transport,
+        )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    if _http_client is None:
+        raise RuntimeError("HTTP client not initialized")
+
+    return _http_client
+
+
+async def close_http_client_async():
+    global _http_client
+    if _http_client:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def send_request_async(
+    target: str,
+    method: str,
+    url: str,
+    headers: dict[str, str] | None = None,
+    json: Any | None = None,
+    hedge: bool = False,
+) -> httpx.Response:
+    """
+    Sends a request to another service through the shared client, with:
+    - a timeout bounded by what is left of the current request deadline, which is also
+      forwarded in the `x-request-deadline` header;
+    - the `x-read-from-primary` header while the current request reads from the
+      primary, so that the target does too;
+    - the target's circuit breaker, failing fast with a 503 while it is open;
+    - an optional hedged attempt after the target's p95 latency (GET only, and only when
+      `HTTP_CLIENT_HEDGING_ENABLED` is set).
+
+    Example Usage: `await send_request_async(APP_NAME_AUTH_API, "GET", url, hedge=True)`
+
+    Args:
+        target (str): The downstream service name. Breakers and latencies are kept per target.
+        method (str)
+        url (str)
+        headers (dict[str, str] | None)
+        json (Any | None): The JSON body.
+        hedge (bool): If the request is idempotent and may be hedged.
+
+    Raises:
+        HTTPException: 504 when the deadline is exceeded, 503 when the target is unavailable.
+    """
+    timeout_seconds = ApplicationVariables.HTTP_CLIENT_TIMEOUT_SECONDS()
+    remaining_budget_seconds = get_remaining_budget_seconds()
+
+    if remaining_budget_seconds is not None:
+        if remaining_budget_seconds <= 0:
+            deadline_metrics.expired_calls_skipped += 1
+            raise deadline_exceeded_exception
+
+        timeout_seconds = min(timeout_seconds, remaining_budget_seconds)
+
+    # Absolute, so that a hedged attempt only gets what is left of it.
+    call_deadline = time.time() + timeout_seconds
+    request_headers = dict(headers) if headers else {}
+    request_headers[REQUEST_DEADLINE_HEADER_NAME] = format_deadline_header(
+        call_deadline
+    )
+    if reads_pinned_to_primary():
+        request_headers[READ_FROM_PRIMARY_HEADER_NAME] = "1"
+
+    circuit_breaker = get_circuit_breaker(target)
+    try:
+        is_probe = circuit_breaker.before_call()
+    except CircuitOpenError as e:
+        raise service_unavailable_exception(target, e.retry_after_seconds)
+
+    http_client = get_http_client()
+    latency_tracker = get_latency_tracker(target)
+
+    async def send_once_async() -> httpx.Response:
+        attempt_timeout_seconds = call_deadline - time.time()
+        if attempt_timeout_seconds <= 0:
+            raise httpx.TimeoutException("Request deadline exceeded")
+
+        with start_child_span(
+            f"{method} {target}",
+            SPAN_KIND_CLIENT,
+            {"http.request.method": method, "url.full": url},
+        ) as span:
+            started_at = time.perf_counter()
+            response = await http_client.request(
+                method,
+                url,
+                headers=with_trace_headers(request_headers),
+                json=json,
+                timeout=attempt_timeout_seconds,
+            )
+            latency_tracker.record(time.perf_counter() - started_at)
+
+            if span is not None:
+                span.set_attribute("http.response.status_code", response.status_code)
+
+        return response
+
+    try:
+        if (
+            hedge
+            and method == "GET"
+            and ApplicationVariables.HTTP_CLIENT_HEDGING_ENABLED()
+        ):
+            response = await hedged_call_async(send_once_async, latency_tracker)
+        else:
+            response = await send_once_async()
+
+    except httpx.TimeoutException:
+        circuit_breaker.record_failure()
+        deadline_metrics.calls_timed_out += 1
+        raise deadline_exceeded_exception
+
+    except httpx.TransportError:
+        circuit_breaker.record_failure()
+        raise service_unavailable_exception(
+            target, circuit_breaker.reset_timeout_seconds
+        )
+
+    else:
+        if response.status_code >= 500:
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.record_success()
+
+    finally:
+        # Without an outcome (cancelled by our side, or any other error), the probe is
+        # let through again.
+        if is_probe:
+            circuit_breaker.release_probe()
+
+    return response
+
+
+def get_http_resilience_metrics() -> dict[str, Any]:
+    return {
+        "deadlines": vars(deadline_metrics).copy(),
+        "circuit_breakers": {
+            circuit_breaker.target: {
+                "state": circuit_breaker.state.value,
+                "opened_total": circuit_breaker.opened_total,
+                "rejected_total": circuit_breaker.rejected_total,
+                "failures_total": circuit_breaker.failures_total,
+                "successes_total": circuit_breaker.successes_total,
+            }
+            for circuit_breaker in get_all_circuit_breakers()
+        },
+        "hedging": {
+            latency_tracker.target: {
+                "p95_seconds": latency_tracker.p95_seconds(),
+                "hedges_sent": latency_tracker.hedges_sent,
+                "hedges_won": latency_tracker.hedges_won,
+            }
+            for latency_tracker in get_all_latency_trackers()
+        },
+    }
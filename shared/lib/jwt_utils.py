@@ -2,37 +2,32 @@ from datetime import timedelta
 
 import jwt
 
-from shared.lib.application_variables import ApplicationVariables
-from shared.lib.constants import (
-    DEFAULT_JWT_EXPIRE_MINUTES,
-)
 from shared.lib.date_utils import now_utc
+from shared.lib.settings import get_settings
 from shared.models.jwt_dtos import JwtTokenData, JwtTokenDataInput
 
 
 def create_access_token(
     jwt_token_data: JwtTokenDataInput, expires_delta: timedelta | None = None
 ):
+    settings = get_settings()
     to_encode = jwt_token_data.model_dump()
 
     if expires_delta:
         expire = now_utc() + expires_delta
     else:
-        expire = now_utc() + timedelta(minutes=DEFAULT_JWT_EXPIRE_MINUTES)
+        expire = now_utc() + timedelta(minutes=settings.jwt_expire_minutes)
     to_encode.update({"exp": expire})
 
     return jwt.encode(
-        to_encode,
-        ApplicationVariables.JWT_SECRET_KEY(),
-        algorithm=ApplicationVariables.JWT_ALGORITHM(),
+        to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm
     )
 
 
 def decode_token(token: str) -> JwtTokenData:
+    settings = get_settings()
     payload = jwt.decode(
-        token,
-        ApplicationVariables.JWT_SECRET_KEY(),
-        algorithms=[ApplicationVariables.JWT_ALGORITHM() or ""],
+        token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm or ""]
     )
 
     return JwtTokenData(**payload)
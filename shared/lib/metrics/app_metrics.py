@@ -0,0 +1,214 @@
+import functools
+import time
+from typing import Awaitable, Callable, ParamSpec, TypeVar
+
+from shared.lib.http_resilience.circuit_breaker import get_all_circuit_breakers
+from shared.lib.http_resilience.deadlines import deadline_metrics
+from shared.lib.http_resilience.hedging import get_all_latency_trackers
+from shared.lib.metrics.metrics_registry import metrics_registry
+
+TParams = ParamSpec("TParams")
+TResult = TypeVar("TResult")
+
+http_requests_total = metrics_registry.counter(
+    "http_requests_total",
+    "HTTP requests handled, by route template.",
+    ("method", "route", "status"),
+)
+http_request_duration_seconds = metrics_registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency, by route template.",
+    ("method", "route"),
+)
+http_requests_in_flight = metrics_registry.gauge(
+    "http_requests_in_flight",
+    "HTTP requests being handled, by route template.",
+    ("method", "route"),
+)
+
+db_query_duration_seconds = metrics_registry.histogram(
+    "db_query_duration_seconds", "Database query latency, by query.", ("query",)
+)
+
+cache_lookups_total = metrics_registry.counter(
+    "cache_lookups_total", "Cache lookups, by cache and result.", ("cache", "result")
+)
+
+rabbit_mq_messages_published_total = metrics_registry.counter(
+    "rabbit_mq_messages_published_total",
+    "RabbitMQ messages published and confirmed.",
+    ("exchange", "topic"),
+)
+rabbit_mq_messages_consumed_total = metrics_registry.counter(
+    "rabbit_mq_messages_consumed_total",
+    "RabbitMQ messages consumed, by queue and outcome.",
+    ("queue", "result"),
+)
+rabbit_mq_handler_duration_seconds = metrics_registry.histogram(
+    "rabbit_mq_handler_duration_seconds",
+    "RabbitMQ handler latency, per call (a single message or a batch).",
+    ("queue",),
+)
+
+
+def observe_db_query(
+    async_query: Callable[TParams, Awaitable[TResult]],
+) -> Callable[TParams, Awaitable[TResult]]:
+    """
+    Times a query function, labelled by its name.
+
+    Example Usage:
+        @observe_db_query
+        async def select_user_by_ulid_async(ulid: str) -> DataUser | None:
+            ...
+    """
+    duration_seconds = db_query_duration_seconds.labels(async_query.__name__)
+
+    @functools.wraps(async_query)
+    async def observed_async_query(*args: TParams.args, **kwargs: TParams.kwargs):
+        started_at = time.perf_counter()
+        try:
+            return await async_query(*args, **kwargs)
+        finally:
+            duration_seconds.observe(time.perf_counter() - started_at)
+
+    return observed_async_query
+
+
+def _collect_http_resilience_metrics():
+    circuit_breakers = get_all_circuit_breakers()
+    latency_trackers = get_all_latency_trackers()
+
+    yield (
+        "http_client_deadline_events_total",
+        "counter",
+        "Requests and calls given up because of their deadline, by event.",
+        [
+            ("http_client_deadline_events_total", (("event", event),), value)
+            for event, value in vars(deadline_metrics).items()
+        ],
+    )
+
+    for name, help, attribute in (
+        ("circuit_breaker_opened_total", "Times the circuit opened.", "opened_total"),
+        (
+            "circuit_breaker_rejected_total",
+            "Calls rejected by an open circuit.",
+            "rejected_total",
+        ),
+        ("circuit_breaker_failures_total", "Calls that failed.", "failures_total"),
+        ("circuit_breaker_successes_total", "Calls that succeeded.", "successes_total"),
+    ):
+        yield (
+            name,
+            "counter",
+            help,
+            [
+                (
+                    name,
+                    (("target", circuit_breaker.target),),
+                    getattr(circuit_breaker, attribute),
+                )
+                for circuit_breaker in circuit_breakers
+            ],
+        )
+
+    yield (
+        "circuit_breaker_open",
+        "gauge",
+        "Whether the circuit is open (1), half-open (0.5) or closed (0).",
+        [
+            (
+                "circuit_breaker_open",
+                (("target", circuit_breaker.target),),
+                _CIRCUIT_STATE_VALUES[circuit_breaker.state.value],
+            )
+            for circuit_breaker in circuit_breakers
+        ],
+    )
+
+    for name, help, attribute in (
+        ("http_client_hedges_sent_total", "Hedged requests sent.", "hedges_sent"),
+        ("http_client_hedges_won_total", "Hedged requests that won.", "hedges_won"),
+    ):
+        yield (
+            name,
+            "counter",
+            help,
+            [
+                (
+                    name,
+                    (("target", latency_tracker.target),),
+                    getattr(latency_tracker, attribute),
+                )
+                for latency_tracker in latency_trackers
+            ],
+        )
+
+
+def _collect_admission_control_metrics():
+    # Deferred, like the admission control itself, which may be disabled.
+    from shared.lib.http_resilience.admission_control import (
+        get_all_concurrency_limiters,
+    )
+
+    concurrency_limiters = get_all_concurrency_limiters()
+
+    for name, type_name, help, attribute in (
+        (
+            "admission_concurrency_limit",
+            "gauge",
+            "Adaptive concurrency limit, by route.",
+            "limit",
+        ),
+        (
+            "admission_requests_in_flight",
+            "gauge",
+            "Admitted requests being handled, by route.",
+            "in_flight",
+        ),
+        (
+            "admission_requests_queued",
+            "gauge",
+            "Requests waiting to be admitted, by route.",
+            "queued",
+        ),
+    ):
+        yield (
+            name,
+            type_name,
+            help,
+            [
+                (
+                    name,
+                    (("method", limiter.method), ("route", limiter.route)),
+                    getattr(limiter, attribute),
+                )
+                for limiter in concurrency_limiters
+            ],
+        )
+
+    yield (
+        "admission_requests_rejected_total",
+        "counter",
+        "Requests rejected with a 503, by route and priority.",
+        [
+            (
+                "admission_requests_rejected_total",
+                (
+                    ("method", limiter.method),
+                    ("route", limiter.route),
+                    ("priority", priority.name.lower()),
+                ),
+                rejected_total,
+            )
+            for limiter in concurrency_limiters
+            for priority, rejected_total in limiter.rejected_total.items()
+        ],
+    )
+
+
+_CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 0.5, "open": 1}
+
+metrics_registry.add_collector(_collect_http_resilience_metrics)
+metrics_registry.add_collector(_collect_admission_control_metrics)
@@ -0,0 +1,89 @@
+import time
+
+from fastapi import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from shared.lib.metrics.app_metrics import (
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    http_requests_total,
+)
+from shared.lib.metrics.metrics_registry import (
+    CounterChild,
+    GaugeChild,
+    HistogramChild,
+)
+
+_UNMATCHED_ROUTE = "<unmatched>"
+
+_in_flight_children: dict[tuple[str, str], GaugeChild] = {}
+
+
+class HttpMetricsMiddleware:
+    """
+    Records the count and latency of every route, labelled by its template (e.g.
+    `/api/v1/users/{ulid}`) so that the series stay bounded.
+    The children of each (method, route, status) are resolved once and kept, so a
+    request only costs a dict lookup and a few increments.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._children: dict[
+            tuple[str, str, int], tuple[CounterChild, HistogramChild]
+        ] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_recording_status_async(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_recording_status_async)
+        finally:
+            duration_seconds = time.perf_counter() - started_at
+
+            # Set by the router once it matched the request.
+            route = scope.get("route")
+            route_path = route.path if route is not None else _UNMATCHED_ROUTE
+
+            children_key = (scope["method"], route_path, status_code)
+            children = self._children.get(children_key)
+            if children is None:
+                children = (
+                    http_requests_total.labels(
+                        scope["method"], route_path, str(status_code)
+                    ),
+                    http_request_duration_seconds.labels(scope["method"], route_path),
+                )
+                self._children[children_key] = children
+
+            children[0].inc()
+            children[1].observe(duration_seconds)
+
+
+async def track_request_in_flight_async(request: Request):
+    """
+    Counts the request among the in-flight ones of its route template, as an app-wide
+    dependency: unlike the middleware, it runs once the request is routed.
+    """
+    children_key = (request.method, request.scope["route"].path)
+    in_flight = _in_flight_children.get(children_key)
+    if in_flight is None:
+        in_flight = http_requests_in_flight.labels(*children_key)
+        _in_flight_children[children_key] = in_flight
+
+    in_flight.inc()
+    try:
+        yield
+    finally:
+        in_flight.dec()
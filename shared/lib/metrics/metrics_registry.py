@@ -0,0 +1,273 @@
+import bisect
+import math
+import os
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable
+
+DEFAULT_LATENCY_BUCKETS_SECONDS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Sample = tuple[str, tuple[tuple[str, str], ...], float]
+""" A metric name, its labels and its value. """
+
+Collector = Callable[[], Iterable[tuple[str, str, str, list[Sample]]]]
+""" Yields (name, type, help, samples) families, computed at scrape time. """
+
+
+class CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class HistogramChild:
+    __slots__ = ("upper_bounds", "bucket_counts", "count", "sum")
+
+    def __init__(self, upper_bounds: tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        # One more bucket, for +Inf.
+        self.bucket_counts = [0] * (len(upper_bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class _MetricFamily(ABC):
+    type_name: str
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self._children: dict[tuple[str, ...], object] = {}
+
+    def labels(self, *label_values: str):
+        """
+        Returns the child of these label values, creating it the first time.
+        Keep the child to update it, instead of calling this on every update.
+        """
+        child = self._children.get(label_values)
+        if child is None:
+            if len(label_values) != len(self.label_names):
+                raise ValueError(
+                    f"Metric '{self.name}' expects labels {self.label_names}"
+                )
+
+            child = self._new_child()
+            self._children[label_values] = child
+
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """
+        A child of the metric, for one combination of label values.
+        """
+
+    def _labels_of(self, label_values: tuple[str, ...]) -> tuple[tuple[str, str], ...]:
+        return tuple(zip(self.label_names, label_values))
+
+    @abstractmethod
+    def samples(self) -> list[Sample]:
+        """
+        The samples of all the children, for the text format.
+        """
+
+
+class Counter(_MetricFamily):
+    type_name = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def labels(self, *label_values: str) -> CounterChild:
+        return super().labels(*label_values)
+
+    def samples(self) -> list[Sample]:
+        return [
+            (self.name, self._labels_of(label_values), child.value)
+            for label_values, child in list(self._children.items())
+        ]
+
+
+class Gauge(_MetricFamily):
+    type_name = "gauge"
+
+    def _new_child(self) -> GaugeChild:
+        return GaugeChild()
+
+    def labels(self, *label_values: str) -> GaugeChild:
+        return super().labels(*label_values)
+
+    def samples(self) -> list[Sample]:
+        return [
+            (self.name, self._labels_of(label_values), child.value)
+            for label_values, child in list(self._children.items())
+        ]
+
+
+class Histogram(_MetricFamily):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: tuple[str, ...],
+        upper_bounds: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_SECONDS,
+    ):
+        super().__init__(name, help, label_names)
+        self.upper_bounds = tuple(sorted(upper_bounds))
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.upper_bounds)
+
+    def labels(self, *label_values: str) -> HistogramChild:
+        return super().labels(*label_values)
+
+    def samples(self) -> list[Sample]:
+        samples = []
+
+        for label_values, child in list(self._children.items()):
+            labels = self._labels_of(label_values)
+
+            cumulative_count = 0
+            for upper_bound, bucket_count in zip(
+                (*self.upper_bounds, math.inf), child.bucket_counts
+            ):
+                cumulative_count += bucket_count
+                samples.append(
+                    (
+                        f"{self.name}_bucket",
+                        (*labels, ("le", _format_value(upper_bound))),
+                        cumulative_count,
+                    )
+                )
+
+            samples.append((f"{self.name}_count", labels, child.count))
+            samples.append((f"{self.name}_sum", labels, child.sum))
+
+        return samples
+
+
+class MetricsRegistry:
+    """
+    A minimal Prometheus registry. Updating a metric is a plain attribute increment on
+    a child kept by the caller; all the formatting happens at scrape time.
+
+    The values are per process. Every sample gets a `pid` label, so that the series
+    of the workers behind the same port can be told apart and summed.
+    """
+
+    def __init__(self):
+        self._metric_families: dict[str, _MetricFamily] = {}
+        self._collectors: list[Collector] = []
+
+    def counter(self, name: str, help: str, label_names: tuple[str, ...] = ()):
+        return self._register(Counter(name, help, label_names))
+
+    def gauge(self, name: str, help: str, label_names: tuple[str, ...] = ()):
+        return self._register(Gauge(name, help, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        label_names: tuple[str, ...] = (),
+        upper_bounds: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_SECONDS,
+    ):
+        return self._register(Histogram(name, help, label_names, upper_bounds))
+
+    def add_collector(self, collector: Collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Renders all the metrics in the Prometheus text exposition format (0.0.4).
+        """
+        pid_label = ("pid", str(os.getpid()))
+        lines = []
+
+        families = [
+            (family.name, family.type_name, family.help, family.samples())
+            for family in self._metric_families.values()
+        ]
+        for collector in self._collectors:
+            families.extend(collector())
+
+        for name, type_name, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type_name}")
+
+            for sample_name, labels, value in samples:
+                labels_text = ",".join(
+                    f'{label_name}="{_escape_label_value(label_value)}"'
+                    for label_name, label_value in (*labels, pid_label)
+                )
+                lines.append(f"{sample_name}{{{labels_text}}} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric_family):
+        if metric_family.name in self._metric_families:
+            raise ValueError(f"Metric '{metric_family.name}' already registered")
+
+        self._metric_families[metric_family.name] = metric_family
+        return metric_family
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if value != value:
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,18 @@
+from tortoise import Model, fields
+
+
+class DataOutboxEvent(Model):
+    id = fields.BigIntField(primary_key=True)
+    exchange_name = fields.CharField(max_length=100)
+    topic_name = fields.CharField(max_length=100)
+    content_type = fields.CharField(max_length=50)
+    body = fields.BinaryField()
+    headers = fields.JSONField(null=True)
+    """ The trace context of the request that stored the event. """
+    claimed_by = fields.CharField(max_length=100, null=True, index=True)
+    """ The relay batch currently publishing this event. """
+    claimed_at = fields.DatetimeField(null=True)
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        table = "outbox_event"
@@ -0,0 +1,190 @@
+import asyncio
+import os
+import socket
+from datetime import timedelta
+from typing import Iterable
+
+from pydantic import BaseModel
+from tortoise.expressions import Q
+
+from shared.lib.application_variables import ApplicationVariables
+from shared.lib.date_utils import now_utc
+from shared.lib.outbox.data_outbox_event import DataOutboxEvent
+from shared.lib.rabbitmq_client.message_codecs import get_message_codec
+from shared.lib.rabbitmq_client.rabbitmq_exchange_client import (
+    EncodedMessage,
+    get_rabbit_mq_exchange_client,
+)
+from shared.lib.tracing_utils import with_trace_headers
+from shared.lib.ulid_utils import new_ulid_str
+
+OUTBOX_ENTITIES_MODULE = "shared.lib.outbox.data_outbox_event"
+
+_MAX_RELAY_BACKOFF_SECONDS = 30.0
+
+
+async def enqueue_outbox_event_async(
+    exchange_name: str, topic_name: str, dto: BaseModel
+):
+    """
+    Stores an event to be published by the outbox relay.
+    Call it inside the transaction that makes the event true, and call
+    `notify_outbox_relay` once that transaction is committed.
+    """
+    await enqueue_outbox_events_async(exchange_name, topic_name, [dto])
+
+
+async def enqueue_outbox_events_async(
+    exchange_name: str, topic_name: str, dtos: Iterable[BaseModel]
+):
+    """
+    Same as `enqueue_outbox_event_async`, for several events in one insert.
+    """
+    message_codec = get_message_codec(ApplicationVariables.RABBIT_MQ_CONTENT_TYPE())
+    # Published later, out of the request: the consumers continue its trace.
+    headers = with_trace_headers({}) or None
+
+    await DataOutboxEvent.bulk_create(
+        [
+            DataOutboxEvent(
+                exchange_name=exchange_name,
+                topic_name=topic_name,
+                content_type=message_codec.content_type,
+                body=message_codec.encode(dto),
+                headers=headers,
+            )
+            for dto in dtos
+        ]
+    )
+
+
+class _OutboxRelay:
+    """
+    Publishes the outbox events in batches, with publisher confirms, and deletes them
+    once confirmed.
+
+    Every process runs its own relay. A batch is claimed with a conditional update before
+    being published, so relays of other workers skip it. Claims of a relay that died
+    expire after `claim_lease_seconds`, so delivery is at-least-once.
+    """
+
+    def __init__(
+        self, batch_size: int, poll_interval_seconds: float, claim_lease_seconds: float
+    ):
+        self.batch_size = batch_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self.claim_lease_seconds = claim_lease_seconds
+        self.relay_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._wake_up = asyncio.Event()
+        self._stopping = False
+        self._run_task: asyncio.Task | None = None
+
+    def start(self):
+        self._run_task = asyncio.create_task(self._run_async())
+
+    def notify(self):
+        self._wake_up.set()
+
+    async def stop_async(self):
+        self._stopping = True
+        self._wake_up.set()
+
+        if self._run_task:
+            await self._run_task
+
+    async def _run_async(self):
+        backoff_seconds = self.poll_interval_seconds
+
+        while not self._stopping:
+            try:
+                relayed_count = await self._relay_batch_async()
+                backoff_seconds = self.poll_interval_seconds
+            except Exception as e:
+                print(f"Outbox relay failed ({e}), retrying in {backoff_seconds}s...")
+                relayed_count = 0
+                await asyncio.sleep(backoff_seconds)
+                backoff_seconds = min(backoff_seconds * 2, _MAX_RELAY_BACKOFF_SECONDS)
+
+            # A full batch means there may be more waiting.
+            if relayed_count < self.batch_size and not self._stopping:
+                try:
+                    await asyncio.wait_for(
+                        self._wake_up.wait(), self.poll_interval_seconds
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._wake_up.clear()
+
+    async def _relay_batch_async(self) -> int:
+        claimable = Q(claimed_by=None) | Q(
+            claimed_at__lt=now_utc() - timedelta(seconds=self.claim_lease_seconds)
+        )
+
+        candidate_ids = (
+            await DataOutboxEvent.filter(claimable)
+            .order_by("id")
+            .limit(self.batch_size)
+            .values_list("id", flat=True)
+        )
+        if not candidate_ids:
+            return 0
+
+        claim = f"{self.relay_id}:{new_ulid_str()}"
+        await DataOutboxEvent.filter(Q(id__in=candidate_ids) & claimable).update(
+            claimed_by=claim, claimed_at=now_utc()
+        )
+
+        outbox_events = await DataOutboxEvent.filter(claimed_by=claim).order_by("id")
+        if not outbox_events:
+            return 0
+
+        try:
+            await get_rabbit_mq_exchange_client().publish_encoded_many_async(
+                EncodedMessage(
+                    outbox_event.exchange_name,
+                    outbox_event.topic_name,
+                    outbox_event.body,
+                    outbox_event.content_type,
+                    outbox_event.headers,
+                )
+                for outbox_event in outbox_events
+            )
+        except Exception:
+            await DataOutboxEvent.filter(claimed_by=claim).update(
+                claimed_by=None, claimed_at=None
+            )
+            raise
+
+        await DataOutboxEvent.filter(claimed_by=claim).delete()
+
+        return len(outbox_events)
+
+
+_outbox_relay: _OutboxRelay | None = None
+
+
+def start_outbox_relay():
+    global _outbox_relay
+    if _outbox_relay is None:
+        _outbox_relay = _OutboxRelay(
+            batch_size=ApplicationVariables.OUTBOX_BATCH_SIZE(),
+            poll_interval_seconds=ApplicationVariables.OUTBOX_POLL_INTERVAL_MS() / 1000,
+            claim_lease_seconds=ApplicationVariables.OUTBOX_CLAIM_LEASE_SECONDS(),
+        )
+        _outbox_relay.start()
+
+
+def notify_outbox_relay():
+    """
+    Wakes up the relay of this process, instead of waiting for its next poll.
+    """
+    if _outbox_relay:
+        _outbox_relay.notify()
+
+
+async def stop_outbox_relay_async():
+    global _outbox_relay
+    if _outbox_relay:
+        await _outbox_relay.stop_async()
+        _outbox_relay = None
@@ -0,0 +1,78 @@
+from abc import ABC, abstractmethod
+from typing import Type, TypeVar
+
+import msgpack
+from pydantic import BaseModel
+
+from shared.lib.constants import CONTENT_TYPE_JSON, CONTENT_TYPE_MSGPACK
+
+TMessage = TypeVar("TMessage", bound=BaseModel)
+
+
+class UnsupportedContentTypeError(ValueError):
+    def __init__(self, content_type: str):
+        super().__init__(f"Unsupported message content type '{content_type}'")
+        self.content_type = content_type
+
+
+class MessageCodec(ABC):
+    content_type: str
+
+    @abstractmethod
+    def encode(self, dto: BaseModel) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, body: bytes, model_type: Type[TMessage]) -> TMessage:
+        pass
+
+
+class JsonMessageCodec(MessageCodec):
+    content_type = CONTENT_TYPE_JSON
+
+    def encode(self, dto: BaseModel) -> bytes:
+        # Serializes straight to bytes, without the intermediate str.
+        return dto.__pydantic_serializer__.to_json(dto)
+
+    def decode(self, body: bytes, model_type: Type[TMessage]) -> TMessage:
+        return model_type.model_validate_json(body)
+
+
+class MsgPackMessageCodec(MessageCodec):
+    content_type = CONTENT_TYPE_MSGPACK
+
+    def encode(self, dto: BaseModel) -> bytes:
+        return msgpack.packb(dto.model_dump(mode="json"))
+
+    def decode(self, body: bytes, model_type: Type[TMessage]) -> TMessage:
+        return model_type.model_validate(msgpack.unpackb(body))
+
+
+_message_codec_types: dict[str, Type[MessageCodec]] = {
+    CONTENT_TYPE_JSON: JsonMessageCodec,
+    CONTENT_TYPE_MSGPACK: MsgPackMessageCodec,
+}
+_message_codecs: dict[str, MessageCodec] = {}
+
+
+def get_message_codec(content_type: str | None) -> MessageCodec:
+    """
+    Returns the codec of a message's `content_type` header.
+    Messages without one are JSON, as published before codecs existed.
+
+    Raises:
+        UnsupportedContentTypeError: When the content type is not supported, e.g.
+            published by a newer producer.
+    """
+    content_type = content_type or CONTENT_TYPE_JSON
+
+    message_codec = _message_codecs.get(content_type)
+    if message_codec is None:
+        message_codec_type = _message_codec_types.get(content_type)
+        if message_codec_type is None:
+            raise UnsupportedContentTypeError(content_type)
+
+        message_codec = message_codec_type()
+        _message_codecs[content_type] = message_codec
+
+    return message_codec
@@ -0,0 +1,44 @@
+import aio_pika
+
+from shared.lib.constants import DEFAULT_RABBIT_MQ_HEARTBEAT_SECONDS
+
+_rabbit_mq_connection: aio_pika.abc.AbstractRobustConnection | None = None
+
+
+async def connect_rabbit_mq_async(
+    url: str, heartbeat_seconds: int = DEFAULT_RABBIT_MQ_HEARTBEAT_SECONDS
+) -> aio_pika.abc.AbstractRobustConnection:
+    """
+    Opens the process-wide robust connection, shared by the publishers and all consumers,
+    which each use their own channels on it.
+    """
+    global _rabbit_mq_connection
+    if _rabbit_mq_connection is None:
+        _rabbit_mq_connection = await aio_pika.connect_robust(
+            url, heartbeat=heartbeat_seconds
+        )
+
+    return _rabbit_mq_connection
+
+
+def set_rabbit_mq_connection(connection: aio_pika.abc.AbstractRobustConnection):
+    """
+    Uses an already opened connection instead, e.g. an in-memory stand-in in benchmarks.
+    """
+    global _rabbit_mq_connection
+    _rabbit_mq_connection = connection
+
+
+def get_rabbit_mq_connection() -> aio_pika.abc.AbstractRobustConnection:
+    if _rabbit_mq_connection is None:
+        raise RuntimeError("RabbitMQ connection not initialized")
+
+    return _rabbit_mq_connection
+
+
+async def close_rabbit_mq_connection_async():
+    global _rabbit_mq_connection
+    if _rabbit_mq_connection:
+        if not _rabbit_mq_connection.is_closed:
+            await _rabbit_mq_connection.close()
+        _rabbit_mq_connection = None
@@ -1,41 +1,222 @@
+import asyncio
+from typing import Iterable, NamedTuple
+
 import aio_pika
 from pydantic import BaseModel
 
+from shared.lib.application_variables import ApplicationVariables
+from shared.lib.metrics.app_metrics import rabbit_mq_messages_published_total
+from shared.lib.rabbitmq_client.message_codecs import MessageCodec, get_message_codec
+from shared.lib.tracing_utils import (
+    SPAN_KIND_PRODUCER,
+    start_child_span,
+    with_trace_headers,
+)
+
+
+class EncodedMessage(NamedTuple):
+    exchange_name: str
+    topic_name: str
+    body: bytes
+    content_type: str
+    headers: dict[str, str] | None = None
+    """ The trace context of the request that stored the message, if any. """
+
+
+class _PublisherChannel:
+    def __init__(self, channel: aio_pika.abc.AbstractChannel):
+        self.channel = channel
+        self.exchanges: dict[str, aio_pika.abc.AbstractExchange] = {}
+
 
 class RabbitMqExchangeClient:
-    def __init__(self):
+    """
+    Publishes to topic exchanges through a small pool of confirm-mode channels.
+    Every publish waits for the broker confirm, and concurrent publishes are spread
+    across the channels round-robin, and pipelined within each channel.
+    """
+
+    def __init__(
+        self, channel_pool_size: int = 1, message_codec: MessageCodec | None = None
+    ):
+        self.channel_pool_size = channel_pool_size
+        self.message_codec = message_codec or get_message_codec(None)
         self.connection: aio_pika.abc.AbstractRobustConnection | None = None
-        self.channel: aio_pika.abc.AbstractChannel | None = None
-        self.exchange: aio_pika.abc.AbstractExchange | None = None
+        self._publisher_channels: list[_PublisherChannel] = []
+        self._next_publisher_channel_index = 0
+        self._exchange_names: list[str] = []
 
-    async def connect_async(self, url: str):
-        self.connection = await aio_pika.connect_robust(
-            url,
-            heartbeat=60,
-        )
+    async def connect_async(self, connection: aio_pika.abc.AbstractRobustConnection):
+        self.connection = connection
 
-        self.channel = await self.connection.channel()
+        for _ in range(self.channel_pool_size):
+            channel = await self.connection.channel(publisher_confirms=True)
+            self._publisher_channels.append(_PublisherChannel(channel))
 
     async def close_async(self):
-        if self.channel and not self.channel.is_closed:
-            await self.channel.close()
-        if self.connection and not self.connection.is_closed:
-            await self.connection.close()
+        for publisher_channel in self._publisher_channels:
+            if not publisher_channel.channel.is_closed:
+                await publisher_channel.channel.close()
+        self._publisher_channels.clear()
+        # The connection is shared with the consumers, and closed with them.
+        self.connection = None
 
     async def declare_exchange_async(self, exchange_name: str):
-        if not self.channel:
+        if not self._publisher_channels:
             raise RuntimeError("RabbitMqExchangeClient.connection not initialized")
 
-        self.exchange = await self.channel.declare_exchange(
-            exchange_name, aio_pika.ExchangeType.TOPIC
+        first_publisher_channel, *other_publisher_channels = self._publisher_channels
+        first_publisher_channel.exchanges[exchange_name] = (
+            await first_publisher_channel.channel.declare_exchange(
+                exchange_name, aio_pika.ExchangeType.TOPIC
+            )
+        )
+
+        # Already declared, so the other channels only need a local handle.
+        for publisher_channel in other_publisher_channels:
+            publisher_channel.exchanges[exchange_name] = (
+                await publisher_channel.channel.get_exchange(
+                    exchange_name, ensure=False
+                )
+            )
+
+        if exchange_name not in self._exchange_names:
+            self._exchange_names.append(exchange_name)
+
+    async def publish_async(
+        self, topic_name: str, dto: BaseModel, exchange_name: str | None = None
+    ):
+        """
+        Publishes one message and waits for its broker confirm.
+
+        Args:
+            topic_name (str)
+            dto (BaseModel)
+            exchange_name (str | None): Can be omitted when a single exchange was declared.
+        """
+        exchange = self._get_exchange(exchange_name)
+
+        with start_child_span(
+            f"{topic_name} publish", SPAN_KIND_PRODUCER, _span_attributes(exchange.name)
+        ):
+            await exchange.publish(
+                self._to_message(dto, with_trace_headers({})), routing_key=topic_name
+            )
+        rabbit_mq_messages_published_total.labels(exchange.name, topic_name).inc()
+
+    async def publish_many_async(
+        self,
+        topic_name: str,
+        dtos: Iterable[BaseModel],
+        exchange_name: str | None = None,
+    ):
+        """
+        Publishes all messages on the same channel without waiting for each confirm,
+        then waits for all confirms together.
+
+        Args:
+            topic_name (str)
+            dtos (Iterable[BaseModel])
+            exchange_name (str | None): Can be omitted when a single exchange was declared.
+        """
+        exchange = self._get_exchange(exchange_name)
+
+        with start_child_span(
+            f"{topic_name} publish", SPAN_KIND_PRODUCER, _span_attributes(exchange.name)
+        ):
+            headers = with_trace_headers({})
+            results = await asyncio.gather(
+                *(
+                    exchange.publish(
+                        self._to_message(dto, headers), routing_key=topic_name
+                    )
+                    for dto in dtos
+                )
+            )
+        rabbit_mq_messages_published_total.labels(exchange.name, topic_name).inc(
+            len(results)
+        )
+
+    async def publish_encoded_many_async(
+        self, encoded_messages: Iterable[EncodedMessage]
+    ):
+        """
+        Publishes already encoded messages, in order, on the same channel, then waits
+        for all confirms together. Exchanges not declared yet are declared on the way.
+
+        Args:
+            encoded_messages (Iterable[EncodedMessage])
+        """
+        publisher_channel = self._next_publisher_channel()
+
+        publishes = []
+        published_counts: dict[tuple[str, str], int] = {}
+        for encoded_message in encoded_messages:
+            if encoded_message.exchange_name not in publisher_channel.exchanges:
+                await self.declare_exchange_async(encoded_message.exchange_name)
+
+            exchange = publisher_channel.exchanges[encoded_message.exchange_name]
+            publishes.append(
+                exchange.publish(
+                    aio_pika.Message(
+                        body=encoded_message.body,
+                        content_type=encoded_message.content_type,
+                        headers=encoded_message.headers,
+                        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                    ),
+                    routing_key=encoded_message.topic_name,
+                )
+            )
+
+            labels = (encoded_message.exchange_name, encoded_message.topic_name)
+            published_counts[labels] = published_counts.get(labels, 0) + 1
+
+        await asyncio.gather(*publishes)
+
+        for labels, published_count in published_counts.items():
+            rabbit_mq_messages_published_total.labels(*labels).inc(published_count)
+
+    def _to_message(self, dto: BaseModel, headers: dict[str, str]) -> aio_pika.Message:
+        return aio_pika.Message(
+            body=self.message_codec.encode(dto),
+            content_type=self.message_codec.content_type,
+            headers=headers or None,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
         )
 
-    async def publish_async(self, topic_name: str, dto: BaseModel):
-        if not self.exchange:
+    def _next_publisher_channel(self) -> _PublisherChannel:
+        if not self._publisher_channels:
+            raise RuntimeError("RabbitMqExchangeClient.connection not initialized")
+
+        publisher_channel = self._publisher_channels[self._next_publisher_channel_index]
+        self._next_publisher_channel_index = (
+            self._next_publisher_channel_index + 1
+        ) % len(self._publisher_channels)
+
+        return publisher_channel
+
+    def _get_exchange(self, exchange_name: str | None) -> aio_pika.abc.AbstractExchange:
+        if not self._exchange_names:
             raise RuntimeError("RabbitMqExchangeClient.exchange not initialized")
 
-        message = aio_pika.Message(body=dto.model_dump_json().encode())
-        await self.exchange.publish(message, routing_key=topic_name)
+        if exchange_name is None:
+            if len(self._exchange_names) > 1:
+                raise ValueError(
+                    "RabbitMqExchangeClient has several exchanges, exchange_name is required"
+                )
+            exchange_name = self._exchange_names[0]
+
+        publisher_channel = self._next_publisher_channel()
+
+        exchange = publisher_channel.exchanges.get(exchange_name)
+        if exchange is None:
+            raise RuntimeError(f"RabbitMQ exchange '{exchange_name}' not declared")
+
+        return exchange
+
+
+def _span_attributes(exchange_name: str) -> dict[str, str]:
+    return {"messaging.system": "rabbitmq", "messaging.destination.name": exchange_name}
 
 
 _rabbit_mq_exchange_client: RabbitMqExchangeClient | None = None
@@ -44,7 +225,12 @@ _rabbit_mq_exchange_client: RabbitMqExchangeClient | None = None
 def init_rabbit_mq_exchange_client():
     global _rabbit_mq_exchange_client
     if _rabbit_mq_exchange_client is None:
-        _rabbit_mq_exchange_client = RabbitMqExchangeClient()
+        _rabbit_mq_exchange_client = RabbitMqExchangeClient(
+            channel_pool_size=ApplicationVariables.RABBIT_MQ_PUBLISHER_CHANNELS(),
+            message_codec=get_message_codec(
+                ApplicationVariables.RABBIT_MQ_CONTENT_TYPE()
+            ),
+        )
 
     return _rabbit_mq_exchange_client
 
@@ -1,13 +1,446 @@
 import asyncio
+import time
+import zlib
+from abc import ABC, abstractmethod
 from typing import Awaitable, Callable, Type, TypeVar
 
 import aio_pika
+from aio_pika.abc import (
+    AbstractChannel,
+    AbstractIncomingMessage,
+    AbstractQueue,
+)
+from aio_pika.exceptions import ChannelInvalidStateError
 from pydantic import BaseModel
 
 from shared.lib.application_variables import ApplicationVariables
+from shared.lib.constants import DEFAULT_RABBIT_MQ_CONSUMER_DRAIN_TIMEOUT_SECONDS
+from shared.lib.metrics.app_metrics import (
+    rabbit_mq_handler_duration_seconds,
+    rabbit_mq_messages_consumed_total,
+)
+from shared.lib.rabbitmq_client.message_codecs import (
+    UnsupportedContentTypeError,
+    get_message_codec,
+)
+from shared.lib.rabbitmq_client.rabbitmq_connection import get_rabbit_mq_connection
+from shared.lib.tracing_utils import SPAN_KIND_CONSUMER, start_span
 
 TMessage = TypeVar("TMessage", bound=BaseModel)
 AsyncHandler = Callable[[TMessage], Awaitable[None]]
+AsyncBatchHandler = Callable[[list[TMessage]], Awaitable[None]]
+OrderingKeySelector = Callable[[TMessage], str]
+
+_MIN_RECOVERY_BACKOFF_SECONDS = 1.0
+_MAX_RECOVERY_BACKOFF_SECONDS = 30.0
+_CHANNEL_CHECK_INTERVAL_SECONDS = 1.0
+# Before a message of an unsupported content type is requeued, so that it doesn't loop
+# back at once while no consumer of this queue supports it yet.
+_UNSUPPORTED_MESSAGE_REQUEUE_DELAY_SECONDS = 1.0
+
+
+def _is_delivered_on_closed_channel(message: AbstractIncomingMessage) -> bool:
+    """
+    Whether the channel of a delivery was closed since, e.g. by a reconnection: the
+    broker redelivers it, and it can't be settled anymore.
+    """
+    try:
+        # Raises once the channel is closed.
+        return message.channel.is_closed
+    except ChannelInvalidStateError:
+        return True
+
+
+class _TopicConsumer(ABC):
+    """
+    Consumes one queue on its own channel of the shared connection.
+
+    Robust channels restore themselves after transient failures. If the channel ends up
+    closed for good, it is reopened with an exponential backoff.
+    """
+
+    def __init__(
+        self,
+        exchange_name: str,
+        topic_name: str,
+        queue_name: str,
+        model_type: Type[BaseModel],
+        prefetch_count: int,
+    ):
+        self.exchange_name = exchange_name
+        self.topic_name = topic_name
+        self.queue_name = queue_name
+        self.model_type = model_type
+        self.prefetch_count = prefetch_count
+
+        self._acked_total = rabbit_mq_messages_consumed_total.labels(
+            queue_name, "acked"
+        )
+        self._rejected_total = rabbit_mq_messages_consumed_total.labels(
+            queue_name, "rejected"
+        )
+        self._requeued_total = rabbit_mq_messages_consumed_total.labels(
+            queue_name, "requeued"
+        )
+        self._handler_duration_seconds = rabbit_mq_handler_duration_seconds.labels(
+            queue_name
+        )
+        self._span_attributes = {
+            "messaging.system": "rabbitmq",
+            "messaging.destination.name": exchange_name,
+            "messaging.rabbitmq.destination.routing_key": topic_name,
+        }
+
+        self._stopping = asyncio.Event()
+        self._run_task: asyncio.Task | None = None
+        self._channel: AbstractChannel | None = None
+        self._queue: AbstractQueue | None = None
+        self._consumer_tag: str | None = None
+
+    def start(self):
+        self._start_workers()
+        self._run_task = asyncio.create_task(self._run_async())
+
+    async def stop_async(self, drain_timeout_seconds: float):
+        """
+        Stops receiving new messages, lets the in-flight ones finish (up to
+        `drain_timeout_seconds`), then closes the channel.
+        Messages still unacked after that are redelivered by the broker.
+        """
+        self._stopping.set()
+
+        if (
+            self._queue
+            and self._consumer_tag
+            and self._channel
+            and not self._channel.is_closed
+        ):
+            try:
+                await self._queue.cancel(self._consumer_tag)
+            except Exception as e:
+                print(f"Could not cancel consumer of '{self.queue_name}': {e}")
+
+        try:
+            await asyncio.wait_for(self._drain_async(), drain_timeout_seconds)
+        except asyncio.TimeoutError:
+            print(f"Consumer of '{self.queue_name}' did not drain in time")
+
+        self._stop_workers()
+
+        if self._run_task:
+            await self._run_task
+        if self._channel and not self._channel.is_closed:
+            await self._channel.close()
+
+    async def _run_async(self):
+        backoff_seconds = _MIN_RECOVERY_BACKOFF_SECONDS
+
+        while not self._stopping.is_set():
+            try:
+                await self._open_channel_async()
+                backoff_seconds = _MIN_RECOVERY_BACKOFF_SECONDS
+
+                while self._channel and not self._channel.is_closed:
+                    try:
+                        await asyncio.wait_for(
+                            self._stopping.wait(), _CHANNEL_CHECK_INTERVAL_SECONDS
+                        )
+                        return
+                    except asyncio.TimeoutError:
+                        pass
+
+                print(f"RabbitMQ channel of '{self.queue_name}' closed, reopening...")
+
+            except (
+                aio_pika.exceptions.AMQPConnectionError,
+                aio_pika.exceptions.AMQPChannelError,
+                ConnectionResetError,
+            ) as e:
+                print(
+                    f"RabbitMQ channel of '{self.queue_name}' failed ({e}), "
+                    f"reopening in {backoff_seconds}s..."
+                )
+            except Exception as e:
+                print(f"Unexpected error in listener: {e}")
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), backoff_seconds)
+            except asyncio.TimeoutError:
+                pass
+            backoff_seconds = min(backoff_seconds * 2, _MAX_RECOVERY_BACKOFF_SECONDS)
+
+    async def _open_channel_async(self):
+        self._channel = await get_rabbit_mq_connection().channel()
+        await self._channel.set_qos(prefetch_count=self.prefetch_count)
+
+        self._queue = await self._channel.declare_queue(self.queue_name, durable=True)
+        await self._queue.bind(self.exchange_name, routing_key=self.topic_name)
+        self._consumer_tag = await self._queue.consume(self._on_message_async)
+
+    async def _on_message_async(self, message: AbstractIncomingMessage):
+        try:
+            # Producers pick the codec, so both sides can be upgraded independently.
+            message_codec = get_message_codec(message.content_type)
+        except UnsupportedContentTypeError as e:
+            # Left to the consumers that support it, e.g. already upgraded.
+            print(f"{e} on '{self.queue_name}', requeuing")
+            await asyncio.sleep(_UNSUPPORTED_MESSAGE_REQUEUE_DELAY_SECONDS)
+            await message.nack(requeue=True)
+            self._requeued_total.inc()
+            return
+
+        try:
+            dto = message_codec.decode(message.body, self.model_type)
+        except Exception as e:
+            print(f"Invalid message on '{self.queue_name}' ({e}), rejecting")
+            await message.reject(requeue=False)
+            self._rejected_total.inc()
+            return
+
+        self._dispatch(message, dto)
+
+    @abstractmethod
+    def _start_workers(self):
+        """
+        Starts the tasks handling the dispatched messages.
+        """
+
+    @abstractmethod
+    def _stop_workers(self):
+        """
+        Cancels them, once drained.
+        """
+
+    @abstractmethod
+    def _dispatch(self, message: AbstractIncomingMessage, dto: BaseModel):
+        """
+        Hands a decoded message to the workers, without waiting.
+        """
+
+    @abstractmethod
+    async def _drain_async(self):
+        """
+        Waits for the messages dispatched so far to be handled.
+        """
+
+
+class _WorkerPoolTopicConsumer(_TopicConsumer):
+    def __init__(
+        self,
+        exchange_name: str,
+        topic_name: str,
+        queue_name: str,
+        model_type: Type[BaseModel],
+        prefetch_count: int,
+        async_handler: AsyncHandler,
+        concurrency: int,
+        ordering_key_selector: OrderingKeySelector | None,
+    ):
+        super().__init__(
+            exchange_name, topic_name, queue_name, model_type, prefetch_count
+        )
+        self.async_handler = async_handler
+        self.concurrency = concurrency
+        self.ordering_key_selector = ordering_key_selector
+
+        # With an ordering key, each lane has a single worker. Otherwise, all workers share one lane.
+        self._lanes: list[asyncio.Queue[tuple[AbstractIncomingMessage, BaseModel]]] = [
+            asyncio.Queue() for _ in range(concurrency if ordering_key_selector else 1)
+        ]
+        self._workers: list[asyncio.Task] = []
+
+    def _start_workers(self):
+        self._workers = [
+            asyncio.create_task(
+                self._handle_lane_messages_async(
+                    self._lanes[worker_index % len(self._lanes)]
+                )
+            )
+            for worker_index in range(self.concurrency)
+        ]
+
+    def _stop_workers(self):
+        for worker in self._workers:
+            worker.cancel()
+
+    def _dispatch(self, message: AbstractIncomingMessage, dto: BaseModel):
+        lane = self._lanes[0]
+        if self.ordering_key_selector:
+            lane_index = zlib.crc32(self.ordering_key_selector(dto).encode()) % len(
+                self._lanes
+            )
+            lane = self._lanes[lane_index]
+
+        lane.put_nowait((message, dto))
+
+    async def _drain_async(self):
+        await asyncio.gather(*(lane.join() for lane in self._lanes))
+
+    async def _handle_lane_messages_async(
+        self, lane: asyncio.Queue[tuple[AbstractIncomingMessage, BaseModel]]
+    ):
+        while True:
+            message, dto = await lane.get()
+
+            try:
+                # Deliveries of a channel that was closed since are redelivered by the broker.
+                if _is_delivered_on_closed_channel(message):
+                    continue
+
+                started_at = time.perf_counter()
+                try:
+                    with start_span(
+                        f"{self.queue_name} process",
+                        SPAN_KIND_CONSUMER,
+                        self._span_attributes,
+                        parent_headers=message.headers,
+                    ):
+                        async with message.process():
+                            await self.async_handler(dto)
+                finally:
+                    self._handler_duration_seconds.observe(
+                        time.perf_counter() - started_at
+                    )
+                self._acked_total.inc()
+            except Exception as e:
+                self._rejected_total.inc()
+                print(f"Handler failed for message '{message.message_id}': {e}")
+            finally:
+                lane.task_done()
+
+
+class _BatchTopicConsumer(_TopicConsumer):
+    def __init__(
+        self,
+        exchange_name: str,
+        topic_name: str,
+        queue_name: str,
+        model_type: Type[BaseModel],
+        prefetch_count: int,
+        async_batch_handler: AsyncBatchHandler,
+        batch_size: int,
+        batch_timeout_seconds: float,
+    ):
+        super().__init__(
+            exchange_name, topic_name, queue_name, model_type, prefetch_count
+        )
+        self.async_batch_handler = async_batch_handler
+        self.batch_size = batch_size
+        self.batch_timeout_seconds = batch_timeout_seconds
+
+        self._pending: asyncio.Queue[tuple[AbstractIncomingMessage, BaseModel]] = (
+            asyncio.Queue()
+        )
+        self._batch_worker: asyncio.Task | None = None
+
+    def _start_workers(self):
+        self._batch_worker = asyncio.create_task(self._handle_batches_async())
+
+    def _stop_workers(self):
+        if self._batch_worker:
+            self._batch_worker.cancel()
+
+    def _dispatch(self, message: AbstractIncomingMessage, dto: BaseModel):
+        self._pending.put_nowait((message, dto))
+
+    async def _drain_async(self):
+        await self._pending.join()
+
+    async def _handle_batches_async(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._pending.get()]
+            batch_deadline = loop.time() + self.batch_timeout_seconds
+
+            # When stopping, nothing new arrives, so there is no point in waiting.
+            while len(batch) < self.batch_size and not (
+                self._stopping.is_set() and self._pending.empty()
+            ):
+                remaining_seconds = batch_deadline - loop.time()
+                if remaining_seconds <= 0:
+                    break
+
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._pending.get(), remaining_seconds)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._handle_batch_async(batch)
+            except Exception as e:
+                # Unsettled, so redelivered once their channel closes.
+                print(
+                    f"Batch of {len(batch)} messages on '{self.queue_name}' failed: {e}"
+                )
+            finally:
+                for _ in batch:
+                    self._pending.task_done()
+
+    async def _handle_batch_async(
+        self, batch: list[tuple[AbstractIncomingMessage, BaseModel]]
+    ):
+        # Deliveries of a channel that was closed since are redelivered by the broker.
+        batch = [
+            (message, dto)
+            for message, dto in batch
+            if not _is_delivered_on_closed_channel(message)
+        ]
+        if not batch:
+            return
+
+        started_at = time.perf_counter()
+        try:
+            # One span for the batch, linked to the trace of each message.
+            with start_span(
+                f"{self.queue_name} process",
+                SPAN_KIND_CONSUMER,
+                {**self._span_attributes, "messaging.batch.message_count": len(batch)},
+                link_headers=(message.headers for message, _ in batch),
+            ):
+                await self.async_batch_handler([dto for _, dto in batch])
+        except Exception as e:
+            print(
+                f"Batch handler failed ({e}), retrying {len(batch)} messages one by one"
+            )
+            await self._handle_batch_messages_one_by_one_async(batch)
+            return
+        finally:
+            self._handler_duration_seconds.observe(time.perf_counter() - started_at)
+
+        # One by one, as `multiple` would also ack the earlier deliveries still being
+        # decoded or requeued, which aren't part of the batch.
+        for message, _ in batch:
+            await message.ack()
+        self._acked_total.inc(len(batch))
+
+    async def _handle_batch_messages_one_by_one_async(
+        self, batch: list[tuple[AbstractIncomingMessage, BaseModel]]
+    ):
+        for message, dto in batch:
+            started_at = time.perf_counter()
+            try:
+                with start_span(
+                    f"{self.queue_name} process",
+                    SPAN_KIND_CONSUMER,
+                    self._span_attributes,
+                    parent_headers=message.headers,
+                ):
+                    await self.async_batch_handler([dto])
+            except Exception as e:
+                print(f"Handler failed for message '{message.message_id}': {e}")
+                await message.nack(requeue=False)
+                self._rejected_total.inc()
+            else:
+                await message.ack()
+                self._acked_total.inc()
+            finally:
+                self._handler_duration_seconds.observe(time.perf_counter() - started_at)
+
+
+_consumers: list[_TopicConsumer] = []
 
 
 async def consume_topic_async(
@@ -16,11 +449,20 @@ async def consume_topic_async(
     queue_name: str,
     model_type: Type[TMessage],
     async_handler: AsyncHandler,
+    prefetch_count: int | None = None,
+    concurrency: int | None = None,
+    ordering_key_selector: OrderingKeySelector | None = None,
 ):
     """
-    Creates a queue and binds it to an exchange, and starts listening on a new asyncio Task.
+    Creates a queue and binds it to an exchange, and starts listening on a new asyncio Task,
+    on a dedicated channel of the shared RabbitMQ connection.
+
+    Up to `concurrency` messages are handled at the same time, and each one is acked
+    as soon as its handler completes.
+    When `ordering_key_selector` is set, messages with the same key are always handled
+    by the same worker ("lane"), so they keep their publishing order.
 
-    Example Usage: `consume_topic_async(exchange_name, topic_name, queue_name, ModelType, async_handler)`
+    Example Usage: `consume_topic_async(exchange_name, topic_name, queue_name, ModelType, async_handler, ordering_key_selector=lambda dto: dto.user_ulid)`
 
     Args:
         exchange_name (str)
@@ -28,43 +470,96 @@ async def consume_topic_async(
         queue_name (str)
         model_type (Type[TMessage])
         async_handler (Callable[[TMessage], Awaitable[None]])
+        prefetch_count (int | None): The maximum number of unacked messages.
+            Defaults to `RABBIT_MQ_PREFETCH_COUNT`, and never less than `concurrency`.
+        concurrency (int | None): The number of handler workers. Defaults to `RABBIT_MQ_CONSUMER_CONCURRENCY`.
+        ordering_key_selector (Callable[[TMessage], str] | None): Selects the key whose messages must stay in order.
     """
-    asyncio.create_task(
-        _consume_async(exchange_name, topic_name, queue_name, model_type, async_handler)
+    concurrency = concurrency or ApplicationVariables.RABBIT_MQ_CONSUMER_CONCURRENCY()
+    prefetch_count = max(
+        prefetch_count or ApplicationVariables.RABBIT_MQ_PREFETCH_COUNT(),
+        concurrency,
     )
 
+    consumer = _WorkerPoolTopicConsumer(
+        exchange_name,
+        topic_name,
+        queue_name,
+        model_type,
+        prefetch_count,
+        async_handler,
+        concurrency,
+        ordering_key_selector,
+    )
+    consumer.start()
+    _consumers.append(consumer)
 
-async def _consume_async(
+
+async def consume_topic_batch_async(
     exchange_name: str,
     topic_name: str,
     queue_name: str,
     model_type: Type[TMessage],
-    async_handler: AsyncHandler,
+    async_batch_handler: AsyncBatchHandler,
+    batch_size: int | None = None,
+    batch_timeout_ms: int | None = None,
+    prefetch_count: int | None = None,
 ):
-    while True: # retry
-        try:
-            connection = await aio_pika.connect_robust(
-                ApplicationVariables.RABBIT_MQ_URL()
-            )
+    """
+    Creates a queue and binds it to an exchange, and starts listening on a new asyncio Task,
+    on a dedicated channel of the shared RabbitMQ connection, handing messages to
+    `async_batch_handler` in batches.
 
-            async with connection:
-                channel = await connection.channel()
-                queue = await channel.declare_queue(queue_name, durable=True)
-                await queue.bind(exchange_name, routing_key=topic_name)
+    A batch is handled when it has `batch_size` messages, or `batch_timeout_ms` after
+    its first message arrived, whichever comes first. Its messages are acked once the
+    batch handler succeeds.
+    If the batch handler fails, each message of the batch is retried alone, so only the
+    failing ones are nacked.
+    Batches are handled one at a time, in delivery order.
 
-                async with queue.iterator() as queue_iter:
-                    async for message in queue_iter:
-                        async with message.process():
-                            await async_handler(
-                                model_type.model_validate_json(message.body)
-                            )
-        except (
-            aio_pika.exceptions.AMQPConnectionError,
-            aio_pika.exceptions.AMQPChannelError,
-            ConnectionResetError,
-        ) as e:
-            print(f"RabbitMQ disconnected ({e}), reconnecting in 5s...")
-            await asyncio.sleep(5)
-        except Exception as e:
-            print(f"Unexpected error in listener: {e}")
-            await asyncio.sleep(5)
+    Example Usage: `consume_topic_batch_async(exchange_name, topic_name, queue_name, ModelType, async_batch_handler)`
+
+    Args:
+        exchange_name (str)
+        topic_name (str)
+        queue_name (str)
+        model_type (Type[TMessage])
+        async_batch_handler (Callable[[list[TMessage]], Awaitable[None]])
+        batch_size (int | None): Defaults to `RABBIT_MQ_BATCH_SIZE`.
+        batch_timeout_ms (int | None): Defaults to `RABBIT_MQ_BATCH_TIMEOUT_MS`.
+        prefetch_count (int | None): The maximum number of unacked messages.
+            Defaults to `RABBIT_MQ_PREFETCH_COUNT`, and never less than `batch_size`.
+    """
+    batch_size = batch_size or ApplicationVariables.RABBIT_MQ_BATCH_SIZE()
+    batch_timeout_ms = (
+        batch_timeout_ms or ApplicationVariables.RABBIT_MQ_BATCH_TIMEOUT_MS()
+    )
+    prefetch_count = max(
+        prefetch_count or ApplicationVariables.RABBIT_MQ_PREFETCH_COUNT(),
+        batch_size,
+    )
+
+    consumer = _BatchTopicConsumer(
+        exchange_name,
+        topic_name,
+        queue_name,
+        model_type,
+        prefetch_count,
+        async_batch_handler,
+        batch_size,
+        batch_timeout_ms / 1000,
+    )
+    consumer.start()
+    _consumers.append(consumer)
+
+
+async def stop_consumers_async(
+    drain_timeout_seconds: float = DEFAULT_RABBIT_MQ_CONSUMER_DRAIN_TIMEOUT_SECONDS,
+):
+    """
+    Stops all consumers of this process, waiting for their in-flight messages.
+    """
+    await asyncio.gather(
+        *(consumer.stop_async(drain_timeout_seconds) for consumer in _consumers)
+    )
+    _consumers.clear()
@@ -0,0 +1,268 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from redis.asyncio import Redis, RedisCluster
+
+from shared.lib.metrics.app_metrics import cache_lookups_total
+from shared.lib.settings import Settings
+
+_INVALIDATION_CHANNEL = "__redis__:invalidate"
+_MAX_LISTENER_BACKOFF_SECONDS = 30.0
+# How long the tracking connection stays silent before it is checked with a PING.
+_TRACKING_IDLE_SECONDS = 5.0
+
+_cache_hits_total = cache_lookups_total.labels("redis_client", "hit")
+_cache_misses_total = cache_lookups_total.labels("redis_client", "miss")
+
+
+class RedisClientCache:
+    """
+    Keeps the values of the keys of `key_prefixes` in the process, so that the hot ones
+    are read without a round trip to Redis, which notifies their changes itself
+    (server-assisted client-side caching): any write to one of these keys, by any
+    client, or its expiry, drops it here.
+
+    The notifications are sent, for all the keys of the prefixes (`BCAST`), to a
+    dedicated connection subscribed to `__redis__:invalidate`. While it is down, nothing
+    is kept and the reads go to Redis. The values also expire after `ttl_seconds`, and
+    the least recently used are dropped beyond `max_keys`.
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        key_prefixes: Iterable[str],
+        max_keys: int,
+        ttl_seconds: float,
+    ):
+        self.redis_client = redis_client
+        self.key_prefixes = tuple(key_prefixes)
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+
+        # (expires at, value), the least recently used first.
+        self._values: OrderedDict[str, tuple[float, bytes | None]] = OrderedDict()
+        self._tracking = False
+        # The reads in flight, and the invalidations of their keys meanwhile: a value
+        # read before a change must not be kept after its notification.
+        self._fetch_counts: dict[str, int] = {}
+        self._fetch_invalidation_counts: dict[str, int] = {}
+        self._flush_count = 0
+        self._run_task: asyncio.Task | None = None
+
+    @property
+    def size(self) -> int:
+        return len(self._values)
+
+    def start(self):
+        self._run_task = asyncio.create_task(self._run_async())
+
+    async def stop_async(self):
+        if self._run_task:
+            self._run_task.cancel()
+            try:
+                await self._run_task
+            except asyncio.CancelledError:
+                pass
+
+        self._flush()
+
+    async def get_async(self, redis_client: Redis, key: str) -> bytes | None:
+        """
+        The value of `key`, kept from an earlier read if it is tracked.
+        """
+        if not self._tracking or not key.startswith(self.key_prefixes):
+            return await redis_client.get(key)
+
+        entry = self._values.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._values.move_to_end(key)
+                _cache_hits_total.inc()
+                return value
+
+            del self._values[key]
+
+        _cache_misses_total.inc()
+        flush_count = self._flush_count
+        invalidation_count = self._fetch_invalidation_counts.get(key, 0)
+        self._fetch_counts[key] = self._fetch_counts.get(key, 0) + 1
+
+        try:
+            value = await redis_client.get(key)
+        finally:
+            invalidated = (
+                flush_count != self._flush_count
+                or self._fetch_invalidation_counts.get(key, 0) != invalidation_count
+            )
+            self._fetch_counts[key] -= 1
+            if not self._fetch_counts[key]:
+                del self._fetch_counts[key]
+                self._fetch_invalidation_counts.pop(key, None)
+
+        if not invalidated:
+            self._values[key] = (time.monotonic() + self.ttl_seconds, value)
+            if len(self._values) > self.max_keys:
+                self._values.popitem(last=False)
+
+        return value
+
+    def invalidate(self, *keys: str):
+        """
+        Drops keys, e.g. right after this process wrote them, without waiting for their
+        notification.
+        """
+        for key in keys:
+            self._values.pop(key, None)
+            if key in self._fetch_counts:
+                self._fetch_invalidation_counts[key] = (
+                    self._fetch_invalidation_counts.get(key, 0) + 1
+                )
+
+    def _flush(self):
+        self._values.clear()
+        self._flush_count += 1
+
+    async def _run_async(self):
+        backoff_seconds = 1.0
+
+        while True:
+            connection_pool = self.redis_client.connection_pool
+            # RESP2, as the RESP3 pushes aren't exposed by redis-py's asyncio client,
+            # and without timeouts nor health checks, this connection staying silent
+            # until a key changes.
+            connection = connection_pool.connection_class(
+                **{
+                    **connection_pool.connection_kwargs,
+                    "protocol": 2,
+                    "socket_timeout": None,
+                    "health_check_interval": 0,
+                }
+            )
+
+            try:
+                await connection.connect()
+                await self._enable_tracking_async(connection)
+                self._flush()
+                self._tracking = True
+                backoff_seconds = 1.0
+
+                await self._listen_async(connection)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(
+                    f"Redis client cache tracking lost ({e}), "
+                    f"retrying in {backoff_seconds}s..."
+                )
+
+            finally:
+                self._tracking = False
+                self._flush()
+                await connection.disconnect()
+
+            await asyncio.sleep(backoff_seconds)
+            backoff_seconds = min(backoff_seconds * 2, _MAX_LISTENER_BACKOFF_SECONDS)
+
+    async def _enable_tracking_async(self, connection):
+        await connection.send_command("CLIENT", "ID")
+        client_id = await connection.read_response()
+
+        prefix_args = []
+        for key_prefix in self.key_prefixes:
+            prefix_args += ["PREFIX", key_prefix]
+        await connection.send_command(
+            "CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST", *prefix_args
+        )
+        await connection.read_response()
+
+        await connection.send_command("SUBSCRIBE", _INVALIDATION_CHANNEL)
+        await connection.read_response()
+
+    async def _listen_async(self, connection):
+        awaiting_pong = False
+
+        while True:
+            message = await connection.read_response(timeout=_TRACKING_IDLE_SECONDS)
+
+            if message is None:
+                if awaiting_pong:
+                    raise ConnectionError("Redis didn't answer the PING")
+
+                awaiting_pong = True
+                await connection.send_command("PING")
+                continue
+
+            awaiting_pong = False
+            if message[0] != b"message":
+                continue
+
+            keys = message[2]
+            if keys is None:
+                # FLUSHALL / FLUSHDB.
+                self._flush()
+            else:
+                self.invalidate(*(key.decode() for key in keys))
+
+
+_redis_client_cache: RedisClientCache | None = None
+
+
+def start_redis_client_cache(
+    redis_client: Redis | RedisCluster,
+    settings: Settings,
+    key_prefixes: Iterable[str],
+):
+    """
+    Starts keeping the keys of `key_prefixes` read with
+    `get_through_client_cache_async` in the process. To call from the running event
+    loop.
+    """
+    global _redis_client_cache
+    if _redis_client_cache is not None:
+        return
+
+    if isinstance(redis_client, RedisCluster):
+        # Each node would notify the changes of its own keys, on its own connection.
+        print("Redis client cache unavailable in cluster mode")
+        return
+
+    _redis_client_cache = RedisClientCache(
+        redis_client,
+        key_prefixes,
+        max_keys=settings.redis_client_cache_max_keys,
+        ttl_seconds=settings.redis_client_cache_ttl_seconds,
+    )
+    _redis_client_cache.start()
+
+
+async def stop_redis_client_cache_async():
+    global _redis_client_cache
+    if _redis_client_cache:
+        await _redis_client_cache.stop_async()
+        _redis_client_cache = None
+
+
+async def get_through_client_cache_async(redis_client: Redis, key: str) -> bytes | None:
+    """
+    `GET`, served from the process if the client cache is started and tracks the key.
+
+    Example Usage:
+        cached_user = await get_through_client_cache_async(redis_client, f"user:{ulid}")
+    """
+    if _redis_client_cache is None:
+        return await redis_client.get(key)
+
+    return await _redis_client_cache.get_async(redis_client, key)
+
+
+def invalidate_client_cache(*keys: str):
+    """
+    Drops keys this process just wrote or deleted, if the client cache is started.
+    """
+    if _redis_client_cache is not None:
+        _redis_client_cache.invalidate(*keys)
@@ -0,0 +1,178 @@
+import asyncio
+import json
+
+from redis.asyncio import Redis, RedisCluster
+from redis.asyncio.client import Pipeline
+
+_MAX_LISTENER_BACKOFF_SECONDS = 30.0
+
+
+def publish_notification(pipeline: Pipeline, channel_name: str, key: str, value: str):
+    """
+    Queues, on a pipeline, a notification for whoever waits on `key` of `channel_name`.
+    Not in cluster mode, whose pipelines can't publish: see `publish_notifications_async`.
+    """
+    pipeline.publish(channel_name, json.dumps([key, value]))
+
+
+async def publish_notifications_async(
+    redis_client: Redis | RedisCluster, channel_name: str, values: dict[str, str]
+):
+    """
+    Publishes the notifications for whoever waits on the keys of `channel_name`, one
+    command each.
+
+    Args:
+        values (dict[str, str]): The notified values by key.
+    """
+    # `execute_command`: the cluster client of redis-py 7 has no `publish`.
+    await asyncio.gather(
+        *(
+            redis_client.execute_command(
+                "PUBLISH", channel_name, json.dumps([key, value])
+            )
+            for key, value in values.items()
+        )
+    )
+
+
+async def _get_subscriber_client_async(redis_client: Redis | RedisCluster) -> Redis:
+    if not isinstance(redis_client, RedisCluster):
+        return redis_client
+
+    # In cluster mode, a message published to any node reaches the subscribers of all
+    # of them: a random node's are enough.
+    await redis_client.initialize()
+    node = redis_client.get_random_node()
+
+    return Redis(host=node.host, port=node.port)
+
+
+class _RedisNotificationListener:
+    """
+    Resolves the waiters of many keys from a single pub/sub subscription, so that
+    thousands of pending waits cost one Redis connection per process, not one each.
+    """
+
+    def __init__(self, redis_client: Redis | RedisCluster, channel_name: str):
+        self.redis_client = redis_client
+        self.channel_name = channel_name
+
+        self._waiters: dict[str, set[asyncio.Future[str]]] = {}
+        self._subscribed = asyncio.Event()
+        self._run_task: asyncio.Task | None = None
+
+    async def start_async(self):
+        self._run_task = asyncio.create_task(self._run_async())
+        await self._subscribed.wait()
+
+    async def stop_async(self):
+        if self._run_task:
+            self._run_task.cancel()
+            try:
+                await self._run_task
+            except asyncio.CancelledError:
+                pass
+
+        for waiters in self._waiters.values():
+            for waiter in waiters:
+                waiter.cancel()
+        self._waiters.clear()
+
+    def register_waiter(self, key: str) -> asyncio.Future[str]:
+        """
+        Registers interest in `key` before checking whether it is already done, so that
+        a notification published in between is not missed.
+        The waiter must always be released with `release_waiter`.
+        """
+        waiter: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, set()).add(waiter)
+
+        return waiter
+
+    def release_waiter(self, key: str, waiter: asyncio.Future[str]):
+        waiters = self._waiters.get(key)
+        if waiters is None:
+            return
+
+        waiters.discard(waiter)
+        if not waiters:
+            del self._waiters[key]
+
+    async def _run_async(self):
+        backoff_seconds = 1.0
+
+        while True:
+            subscriber_client = None
+            try:
+                subscriber_client = await _get_subscriber_client_async(
+                    self.redis_client
+                )
+                async with subscriber_client.pubsub(
+                    ignore_subscribe_messages=True
+                ) as pubsub:
+                    await pubsub.subscribe(self.channel_name)
+                    self._subscribed.set()
+                    backoff_seconds = 1.0
+
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._on_message(message["data"])
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(
+                    f"Redis subscription to '{self.channel_name}' lost ({e}), "
+                    f"retrying in {backoff_seconds}s..."
+                )
+                await asyncio.sleep(backoff_seconds)
+                backoff_seconds = min(
+                    backoff_seconds * 2, _MAX_LISTENER_BACKOFF_SECONDS
+                )
+
+            finally:
+                if (
+                    subscriber_client is not None
+                    and subscriber_client is not self.redis_client
+                ):
+                    await subscriber_client.aclose()
+
+    def _on_message(self, data: bytes):
+        try:
+            key, value = json.loads(data)
+        except ValueError:
+            print(f"Invalid notification on '{self.channel_name}': {data!r}")
+            return
+
+        for waiter in self._waiters.pop(key, ()):
+            if not waiter.done():
+                waiter.set_result(value)
+
+
+_redis_notification_listeners: dict[str, _RedisNotificationListener] = {}
+
+
+async def start_redis_notification_listener_async(
+    redis_client: Redis | RedisCluster, channel_name: str
+):
+    if channel_name not in _redis_notification_listeners:
+        redis_notification_listener = _RedisNotificationListener(
+            redis_client, channel_name
+        )
+        await redis_notification_listener.start_async()
+        _redis_notification_listeners[channel_name] = redis_notification_listener
+
+
+def get_redis_notification_listener(channel_name: str) -> _RedisNotificationListener:
+    redis_notification_listener = _redis_notification_listeners.get(channel_name)
+    if redis_notification_listener is None:
+        raise RuntimeError(f"Redis notification listener '{channel_name}' not started")
+
+    return redis_notification_listener
+
+
+async def stop_redis_notification_listeners_async():
+    for redis_notification_listener in _redis_notification_listeners.values():
+        await redis_notification_listener.stop_async()
+    _redis_notification_listeners.clear()
@@ -1,12 +1,96 @@
-from redis.asyncio import Redis
+from redis.asyncio import BlockingConnectionPool, Redis, RedisCluster, Sentinel
+from redis.asyncio.cluster import ClusterNode
+from redis.asyncio.sentinel import SentinelConnectionPool
 
-_redis_client: Redis | None = None
+from shared.lib.constants import REDIS_MODE_CLUSTER, REDIS_MODE_SENTINEL
+from shared.lib.settings import Settings
 
+_redis_client: Redis | RedisCluster | None = None
 
-def init_redis_client(redis_host: str, redis_port: int):
+
+class _BlockingSentinelConnectionPool(SentinelConnectionPool, BlockingConnectionPool):
+    """
+    The pool of the sentinel's master, waiting for a free connection like in
+    standalone mode, rather than failing once `max_connections` are in use.
+    """
+
+
+def _parse_address(address: str) -> tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host, int(port)
+
+
+def new_redis_client(settings: Settings) -> Redis | RedisCluster:
+    """
+    A client of the `REDIS_MODE` topology, with its pool limits and timeouts.
+
+    - `standalone`: `REDIS_HOST`/`REDIS_PORT`.
+    - `sentinel`: the current master of `REDIS_SENTINEL_SERVICE_NAME`, asked to
+      `REDIS_SENTINELS`, and asked again after a failover.
+    - `cluster`: the nodes discovered from `REDIS_CLUSTER_NODES`, each key's command
+      sent to the node of its slot.
+
+    Once `REDIS_MAX_CONNECTIONS` are in use, a command waits up to
+    `REDIS_POOL_TIMEOUT_SECONDS` for a free one, except in cluster mode, where it fails
+    (`MaxConnectionsError`), the limit being per node.
+    """
+    connection_kwargs = {
+        "protocol": settings.redis_protocol,
+        "socket_timeout": settings.redis_socket_timeout_seconds,
+        "socket_connect_timeout": settings.redis_socket_connect_timeout_seconds,
+        "health_check_interval": settings.redis_health_check_interval_seconds,
+    }
+
+    if settings.redis_mode == REDIS_MODE_CLUSTER:
+        return RedisCluster(
+            startup_nodes=[
+                ClusterNode(*_parse_address(address))
+                for address in settings.redis_cluster_nodes
+            ],
+            max_connections=settings.redis_max_connections,
+            **connection_kwargs,
+        )
+
+    if settings.redis_mode == REDIS_MODE_SENTINEL:
+        sentinel = Sentinel(
+            [_parse_address(address) for address in settings.redis_sentinels],
+            sentinel_kwargs={
+                "socket_timeout": settings.redis_socket_timeout_seconds,
+                "socket_connect_timeout": settings.redis_socket_connect_timeout_seconds,
+            },
+        )
+        return sentinel.master_for(
+            settings.redis_sentinel_service_name,
+            connection_pool_class=_BlockingSentinelConnectionPool,
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout_seconds,
+            **connection_kwargs,
+        )
+
+    return Redis.from_pool(
+        BlockingConnectionPool(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            db=0,
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout_seconds,
+            **connection_kwargs,
+        )
+    )
+
+
+def init_redis_client(settings: Settings):
     global _redis_client
     if _redis_client is None:
-        _redis_client = Redis(host=redis_host, port=redis_port, db=0)
+        _redis_client = new_redis_client(settings)
+
+
+def set_redis_client(redis_client: Redis):
+    """
+    Uses an already created client instead, e.g. an in-memory stand-in in benchmarks.
+    """
+    global _redis_client
+    _redis_client = redis_client
 
 
 def get_redis_client() -> Redis:
@@ -19,5 +103,5 @@ def get_redis_client() -> Redis:
 async def close_redis_async():
     global _redis_client
     if _redis_client:
-        await _redis_client.close()
+        await _redis_client.aclose()
         _redis_client = None
@@ -0,0 +1,63 @@
+import asyncio
+from types import ModuleType
+from typing import Iterable
+
+from dotenv import load_dotenv
+from tortoise import Tortoise
+
+from shared.lib.db_config_utils import (
+    build_tortoise_config,
+    get_app_db_modules,
+    get_app_db_url,
+)
+from shared.lib.sharding_utils import generate_shard_schemas_async
+
+
+async def migrate_schemas_async(
+    app_folder: str,
+    modules: dict[str, Iterable[str | ModuleType]] | None,
+    db_url: str | None = None,
+    shard_db_urls: list[str] | None = None,
+    use_outbox: bool = False,
+):
+    """
+    Creates the missing tables and indexes of a service, on its database and shards.
+    Takes the same arguments as its `app_lifespan`.
+    """
+    await Tortoise.init(
+        config=build_tortoise_config(
+            get_app_db_url(app_folder, db_url),
+            get_app_db_modules(modules, use_outbox),
+            shard_db_urls=shard_db_urls,
+        )
+    )
+
+    try:
+        await Tortoise.generate_schemas(safe=True)
+        if shard_db_urls:
+            await generate_shard_schemas_async()
+
+    finally:
+        await Tortoise.close_connections()
+
+
+def run_schema_migrations(
+    app_folder: str,
+    modules: dict[str, Iterable[str | ModuleType]] | None,
+    db_url: str | None = None,
+    shard_db_urls: list[str] | None = None,
+    use_outbox: bool = False,
+):
+    """
+    The entry point of the services' `migrate` module, run once before the workers
+    start, which then skip the schema generation (`DB_GENERATE_SCHEMAS=false`).
+
+    Example Usage:
+        if __name__ == "__main__":
+            run_schema_migrations(APP_NAME_USERS_API, DB_MODULES, use_outbox=True)
+    """
+    load_dotenv()
+    asyncio.run(
+        migrate_schemas_async(app_folder, modules, db_url, shard_db_urls, use_outbox)
+    )
+    print(f"{app_folder}: schemas up to date")
@@ -0,0 +1,365 @@
+import asyncio
+import os
+import signal
+
+from dotenv import load_dotenv
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    ValidationError,
+    field_validator,
+    model_validator,
+)
+
+from shared.lib.constants import (
+    CONTENT_TYPE_JSON,
+    DEFAULT_ADMISSION_INITIAL_LIMIT,
+    DEFAULT_ADMISSION_LATENCY_TARGET_SECONDS,
+    DEFAULT_ADMISSION_MAX_LIMIT,
+    DEFAULT_ADMISSION_MIN_LIMIT,
+    DEFAULT_ADMISSION_QUEUE_SIZE,
+    DEFAULT_ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    DEFAULT_CACHE_WARMUP_CHUNK_SIZE,
+    DEFAULT_CACHE_WARMUP_KEYS_PER_SECOND,
+    DEFAULT_CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS,
+    DEFAULT_COMPRESSION_GZIP_LEVEL,
+    DEFAULT_COMPRESSION_MINIMUM_SIZE,
+    DEFAULT_COMPRESSION_THREAD_MINIMUM_SIZE,
+    DEFAULT_COMPRESSION_ZSTD_LEVEL,
+    DEFAULT_DB_POOL_MAX_SIZE,
+    DEFAULT_DB_POOL_MIN_SIZE,
+    DEFAULT_DB_READ_YOUR_WRITES_SECONDS,
+    DEFAULT_DB_REPLICA_POOL_MAX_SIZE,
+    DEFAULT_DB_REPLICA_POOL_MIN_SIZE,
+    DEFAULT_HTTP_CLIENT_TIMEOUT_SECONDS,
+    DEFAULT_JWT_EXPIRE_MINUTES,
+    DEFAULT_OUTBOX_BATCH_SIZE,
+    DEFAULT_OUTBOX_CLAIM_LEASE_SECONDS,
+    DEFAULT_OUTBOX_POLL_INTERVAL_MS,
+    DEFAULT_RABBIT_MQ_BATCH_SIZE,
+    DEFAULT_RABBIT_MQ_BATCH_TIMEOUT_MS,
+    DEFAULT_RABBIT_MQ_CONSUMER_CONCURRENCY,
+    DEFAULT_RABBIT_MQ_HEARTBEAT_SECONDS,
+    DEFAULT_RABBIT_MQ_PREFETCH_COUNT,
+    DEFAULT_RABBIT_MQ_PUBLISHER_CHANNELS,
+    DEFAULT_REDIS_CLIENT_CACHE_MAX_KEYS,
+    DEFAULT_REDIS_CLIENT_CACHE_TTL_SECONDS,
+    DEFAULT_REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+    DEFAULT_REDIS_HOST,
+    DEFAULT_REDIS_MAX_CONNECTIONS,
+    DEFAULT_REDIS_POOL_TIMEOUT_SECONDS,
+    DEFAULT_REDIS_PORT,
+    DEFAULT_REDIS_PROTOCOL,
+    DEFAULT_REDIS_SENTINEL_SERVICE_NAME,
+    DEFAULT_REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+    DEFAULT_REDIS_SOCKET_TIMEOUT_SECONDS,
+    DEFAULT_REGISTRATION_COMPLETED_TTL_SECONDS,
+    DEFAULT_REGISTRATION_WAIT_TIMEOUT_SECONDS,
+    DEFAULT_REQUEST_BUDGET_SECONDS,
+    DEFAULT_SQLITE_BUSY_TIMEOUT_MS,
+    DEFAULT_SQLITE_CACHE_SIZE,
+    DEFAULT_SQLITE_MMAP_SIZE,
+    DEFAULT_SQLITE_READ_CONNECTIONS,
+    DEFAULT_SQLITE_SYNCHRONOUS,
+    DEFAULT_TRACING_FILE_PATH,
+    DEFAULT_TRACING_SAMPLE_RATIO,
+    DEFAULT_USER_CACHE_TTL_SECONDS,
+    DEFAULT_USER_CREDENTIALS_CACHE_TTL_SECONDS,
+    REDIS_MODE_CLUSTER,
+    REDIS_MODE_SENTINEL,
+    REDIS_MODE_STANDALONE,
+    TRACING_EXPORTER_NONE,
+)
+
+_REDIS_MODES = (REDIS_MODE_STANDALONE, REDIS_MODE_SENTINEL, REDIS_MODE_CLUSTER)
+
+
+class Settings(BaseModel):
+    """
+    The configuration of a service, read from its environment variables (the
+    uppercase field names) once, then immutable.
+    """
+
+    model_config = ConfigDict(
+        frozen=True, alias_generator=str.upper, populate_by_name=True
+    )
+
+    # Auth
+    jwt_secret_key: str | None = None
+    jwt_algorithm: str | None = None
+    jwt_expire_minutes: float = Field(DEFAULT_JWT_EXPIRE_MINUTES, gt=0)
+    internal_api_key: str | None = None
+
+    # Services
+    auth_api_private_url: str | None = None
+    users_api_private_url: str | None = None
+
+    # Redis
+    redis_host: str = DEFAULT_REDIS_HOST
+    redis_port: int = Field(DEFAULT_REDIS_PORT, gt=0, le=65535)
+    # `standalone` (`REDIS_HOST`/`REDIS_PORT`), `sentinel` or `cluster`.
+    redis_mode: str = REDIS_MODE_STANDALONE
+    # Comma-separated `host:port` of the sentinels, and the name of the master they
+    # monitor.
+    redis_sentinels: tuple[str, ...] = ()
+    redis_sentinel_service_name: str = DEFAULT_REDIS_SENTINEL_SERVICE_NAME
+    # Comma-separated `host:port` of some of the cluster nodes, the others being
+    # discovered.
+    redis_cluster_nodes: tuple[str, ...] = ()
+    # The protocol of the commands, 2 (RESP2) or 3 (RESP3).
+    redis_protocol: int = Field(DEFAULT_REDIS_PROTOCOL, ge=2, le=3)
+    # Per node in cluster mode. Otherwise, a command waits up to
+    # `REDIS_POOL_TIMEOUT_SECONDS` for a free connection.
+    redis_max_connections: int = Field(DEFAULT_REDIS_MAX_CONNECTIONS, gt=0)
+    redis_pool_timeout_seconds: float = Field(DEFAULT_REDIS_POOL_TIMEOUT_SECONDS, gt=0)
+    redis_socket_timeout_seconds: float = Field(
+        DEFAULT_REDIS_SOCKET_TIMEOUT_SECONDS, gt=0
+    )
+    redis_socket_connect_timeout_seconds: float = Field(
+        DEFAULT_REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS, gt=0
+    )
+    # How long a connection can stay idle before it is checked (PING) on reuse. 0
+    # disables the checks.
+    redis_health_check_interval_seconds: int = Field(
+        DEFAULT_REDIS_HEALTH_CHECK_INTERVAL_SECONDS, ge=0
+    )
+    # Keeps the hot keys (`user:*`, `user_credentials:*`) in each process too, Redis
+    # notifying their changes. Not available in cluster mode.
+    redis_client_cache_enabled: bool = False
+    redis_client_cache_max_keys: int = Field(DEFAULT_REDIS_CLIENT_CACHE_MAX_KEYS, gt=0)
+    # A bound on the staleness of a kept key, should a notification be lost.
+    redis_client_cache_ttl_seconds: float = Field(
+        DEFAULT_REDIS_CLIENT_CACHE_TTL_SECONDS, gt=0
+    )
+    user_cache_ttl_seconds: int = Field(DEFAULT_USER_CACHE_TTL_SECONDS, gt=0)
+    user_credentials_cache_ttl_seconds: int = Field(
+        DEFAULT_USER_CREDENTIALS_CACHE_TTL_SECONDS, gt=0
+    )
+    # How long a completed registration is kept for its late waiters.
+    registration_completed_ttl_seconds: int = Field(
+        DEFAULT_REGISTRATION_COMPLETED_TTL_SECONDS, gt=0
+    )
+    registration_wait_timeout_seconds: float = Field(
+        DEFAULT_REGISTRATION_WAIT_TIMEOUT_SECONDS, gt=0
+    )
+    # Whether users_api and auth_api fill their caches from the database at startup,
+    # one worker at a time, like their `warm_cache` does.
+    cache_warmup_on_startup: bool = False
+    cache_warmup_chunk_size: int = Field(DEFAULT_CACHE_WARMUP_CHUNK_SIZE, gt=0)
+    # 0 disables the limit.
+    cache_warmup_keys_per_second: float = Field(
+        DEFAULT_CACHE_WARMUP_KEYS_PER_SECOND, ge=0
+    )
+
+    # RabbitMQ
+    rabbit_mq_url: str | None = None
+    # 0 disables the heartbeats.
+    rabbit_mq_heartbeat_seconds: int = Field(DEFAULT_RABBIT_MQ_HEARTBEAT_SECONDS, ge=0)
+    rabbit_mq_prefetch_count: int = Field(DEFAULT_RABBIT_MQ_PREFETCH_COUNT, gt=0)
+    # The content type (codec) of the published messages.
+    rabbit_mq_content_type: str = CONTENT_TYPE_JSON
+    rabbit_mq_publisher_channels: int = Field(
+        DEFAULT_RABBIT_MQ_PUBLISHER_CHANNELS, gt=0
+    )
+    rabbit_mq_batch_size: int = Field(DEFAULT_RABBIT_MQ_BATCH_SIZE, gt=0)
+    rabbit_mq_batch_timeout_ms: int = Field(DEFAULT_RABBIT_MQ_BATCH_TIMEOUT_MS, ge=0)
+    rabbit_mq_consumer_concurrency: int = Field(
+        DEFAULT_RABBIT_MQ_CONSUMER_CONCURRENCY, gt=0
+    )
+
+    # Outbox
+    outbox_batch_size: int = Field(DEFAULT_OUTBOX_BATCH_SIZE, gt=0)
+    outbox_poll_interval_ms: int = Field(DEFAULT_OUTBOX_POLL_INTERVAL_MS, gt=0)
+    outbox_claim_lease_seconds: float = Field(DEFAULT_OUTBOX_CLAIM_LEASE_SECONDS, gt=0)
+
+    # HTTP
+    request_budget_seconds: float = Field(DEFAULT_REQUEST_BUDGET_SECONDS, gt=0)
+    http_client_timeout_seconds: float = Field(
+        DEFAULT_HTTP_CLIENT_TIMEOUT_SECONDS, gt=0
+    )
+    http_client_hedging_enabled: bool = False
+    circuit_breaker_failure_threshold: int = Field(
+        DEFAULT_CIRCUIT_BREAKER_FAILURE_THRESHOLD, gt=0
+    )
+    circuit_breaker_reset_timeout_seconds: float = Field(
+        DEFAULT_CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS, gt=0
+    )
+    # The size, in bytes, from which response bodies are compressed.
+    compression_minimum_size: int = Field(DEFAULT_COMPRESSION_MINIMUM_SIZE, ge=0)
+    compression_gzip_level: int = Field(DEFAULT_COMPRESSION_GZIP_LEVEL, ge=0, le=9)
+    compression_zstd_level: int = Field(DEFAULT_COMPRESSION_ZSTD_LEVEL, ge=1, le=22)
+    # The size, in bytes, from which a body (or chunk) is compressed in a worker
+    # thread, off the event loop.
+    compression_thread_minimum_size: int = Field(
+        DEFAULT_COMPRESSION_THREAD_MINIMUM_SIZE, ge=0
+    )
+
+    # Admission control, per route: the initial, min and max concurrency limits,
+    # adapted to the latency target, and the queue of the requests over the limit.
+    admission_control_enabled: bool = True
+    admission_initial_limit: int = Field(DEFAULT_ADMISSION_INITIAL_LIMIT, gt=0)
+    admission_min_limit: int = Field(DEFAULT_ADMISSION_MIN_LIMIT, gt=0)
+    admission_max_limit: int = Field(DEFAULT_ADMISSION_MAX_LIMIT, gt=0)
+    admission_queue_size: int = Field(DEFAULT_ADMISSION_QUEUE_SIZE, ge=0)
+    admission_latency_target_seconds: float = Field(
+        DEFAULT_ADMISSION_LATENCY_TARGET_SECONDS, gt=0
+    )
+    admission_queue_timeout_seconds: float = Field(
+        DEFAULT_ADMISSION_QUEUE_TIMEOUT_SECONDS, gt=0
+    )
+
+    # Database
+    db_url: str | None = None
+    # Whether each worker creates the missing tables at startup. Turn it off when the
+    # service's `migrate` runs once before the workers start.
+    db_generate_schemas: bool = True
+    # Comma-separated URLs of the read replicas of the `DB_URL` primary.
+    db_replica_urls: tuple[str, ...] = ()
+    db_pool_min_size: int = Field(DEFAULT_DB_POOL_MIN_SIZE, ge=0)
+    db_pool_max_size: int = Field(DEFAULT_DB_POOL_MAX_SIZE, gt=0)
+    db_replica_pool_min_size: int = Field(DEFAULT_DB_REPLICA_POOL_MIN_SIZE, ge=0)
+    db_replica_pool_max_size: int = Field(DEFAULT_DB_REPLICA_POOL_MAX_SIZE, gt=0)
+    # How long a caller's reads stay on the primary after it wrote, 0 for never.
+    db_read_your_writes_seconds: float = Field(
+        DEFAULT_DB_READ_YOUR_WRITES_SECONDS, ge=0
+    )
+    # Comma-separated URLs of the todo_api shards, the first being its default
+    # database.
+    todo_api_shard_urls: tuple[str, ...] = ()
+    sqlite_synchronous: str = DEFAULT_SQLITE_SYNCHRONOUS
+    sqlite_mmap_size: int = Field(DEFAULT_SQLITE_MMAP_SIZE, ge=0)
+    # Negative values are in KiB.
+    sqlite_cache_size: int = DEFAULT_SQLITE_CACHE_SIZE
+    sqlite_busy_timeout_ms: int = Field(DEFAULT_SQLITE_BUSY_TIMEOUT_MS, ge=0)
+    # The number of read-only connections used by GET requests. 0 disables them.
+    sqlite_read_connections: int = Field(DEFAULT_SQLITE_READ_CONNECTIONS, ge=0)
+
+    # Tracing
+    # `none` (tracing disabled), `console`, `file` or `otlp` (configured with the
+    # standard `OTEL_EXPORTER_OTLP_*` variables).
+    tracing_exporter: str = TRACING_EXPORTER_NONE
+    tracing_sample_ratio: float = Field(DEFAULT_TRACING_SAMPLE_RATIO, ge=0, le=1)
+    tracing_file_path: str = DEFAULT_TRACING_FILE_PATH
+
+    @field_validator(
+        "redis_sentinels",
+        "redis_cluster_nodes",
+        "db_replica_urls",
+        "todo_api_shard_urls",
+        mode="before",
+    )
+    @classmethod
+    def _split_urls(cls, value):
+        if isinstance(value, str):
+            return tuple(url.strip() for url in value.split(",") if url.strip())
+
+        return value
+
+    @model_validator(mode="after")
+    def _validate_limits(self):
+        if self.db_pool_min_size > self.db_pool_max_size:
+            raise ValueError("DB_POOL_MIN_SIZE is greater than DB_POOL_MAX_SIZE")
+        if self.db_replica_pool_min_size > self.db_replica_pool_max_size:
+            raise ValueError(
+                "DB_REPLICA_POOL_MIN_SIZE is greater than DB_REPLICA_POOL_MAX_SIZE"
+            )
+        if not (
+            self.admission_min_limit
+            <= self.admission_initial_limit
+            <= self.admission_max_limit
+        ):
+            raise ValueError(
+                "ADMISSION_INITIAL_LIMIT is not between ADMISSION_MIN_LIMIT and "
+                "ADMISSION_MAX_LIMIT"
+            )
+
+        if self.redis_mode not in _REDIS_MODES:
+            raise ValueError(f"REDIS_MODE is not one of {', '.join(_REDIS_MODES)}")
+        if self.redis_mode == REDIS_MODE_SENTINEL and not self.redis_sentinels:
+            raise ValueError("REDIS_SENTINELS is required in sentinel mode")
+        if self.redis_mode == REDIS_MODE_CLUSTER and not self.redis_cluster_nodes:
+            raise ValueError("REDIS_CLUSTER_NODES is required in cluster mode")
+
+        return self
+
+
+_settings: Settings | None = None
+
+
+def load_settings() -> Settings:
+    """
+    Reads the settings from the environment, an empty variable counting as unset.
+
+    Raises:
+        ValidationError: If a variable is invalid.
+    """
+    return Settings.model_validate(
+        {name: value for name, value in os.environ.items() if value}
+    )
+
+
+def init_settings() -> Settings:
+    """
+    Loads the `.env` file, without overriding the variables already set, then reads
+    the settings, failing the startup if one is invalid.
+    """
+    global _settings
+    load_dotenv()
+    _settings = load_settings()
+
+    return _settings
+
+
+def get_settings() -> Settings:
+    """
+    The current settings, read on first use. Also a FastAPI dependency.
+
+    Example Usage:
+        async def get_item(settings: Annotated[Settings, Depends(get_settings)]):
+    """
+    if _settings is None:
+        return init_settings()
+
+    return _settings
+
+
+def reload_settings() -> Settings:
+    """
+    Reads the `.env` file again, its values overriding the environment, and replaces
+    the settings. Invalid settings are reported, and the current ones kept.
+
+    What is read on each use (TTLs, timeouts, keys…) changes right away, while the
+    pools and connections keep the settings they were created with.
+    """
+    global _settings
+    load_dotenv(override=True)
+
+    try:
+        _settings = load_settings()
+        print("Settings reloaded")
+    except ValidationError as e:
+        print(f"Settings not reloaded, invalid: {e}")
+
+    return get_settings()
+
+
+def install_settings_reload_handler():
+    """
+    Reloads the settings on SIGHUP (`kill -HUP <worker pid>`), where supported. To call
+    from the running event loop.
+    """
+    if not hasattr(signal, "SIGHUP"):
+        return
+
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload_settings)
+    except (RuntimeError, ValueError):
+        # Signals are only handled by the main thread's event loop.
+        print("Settings reload on SIGHUP unavailable outside the main thread")
+
+
+def remove_settings_reload_handler():
+    if hasattr(signal, "SIGHUP"):
+        asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
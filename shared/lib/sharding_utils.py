@@ -0,0 +1,92 @@
+import hashlib
+
+from tortoise import BaseDBAsyncClient, Model, Tortoise, connections
+
+from shared.lib.constants import DB_CONNECTION_DEFAULT, DB_CONNECTION_SHARD_PREFIX
+
+_shard_connection_names: list[str] = [DB_CONNECTION_DEFAULT]
+
+
+def jump_consistent_hash(key: int, bucket_count: int) -> int:
+    """
+    Maps a 64 bits key to one of `bucket_count` buckets (Lamping & Veach, 2014).
+    Growing from N to N+1 buckets only moves 1/(N+1) of the keys, all to the new one.
+    """
+    bucket = -1
+    candidate = 0
+
+    while candidate < bucket_count:
+        bucket = candidate
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        candidate = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+
+    return bucket
+
+
+def get_shard_index(shard_key: str, shard_count: int | None = None) -> int:
+    """
+    The stable shard of a key, e.g. a user ULID, among `shard_count` shards
+    (the configured shards by default).
+    """
+    hashed_key = int.from_bytes(
+        hashlib.blake2b(shard_key.encode(), digest_size=8).digest(), "big"
+    )
+
+    return jump_consistent_hash(hashed_key, shard_count or len(_shard_connection_names))
+
+
+def set_shard_connection_names(shard_connection_names: list[str]):
+    _shard_connection_names[:] = shard_connection_names
+
+
+def get_shard_connection_names() -> list[str]:
+    return list(_shard_connection_names)
+
+
+def get_shard_connection_name(shard_key: str) -> str:
+    return _shard_connection_names[get_shard_index(shard_key)]
+
+
+def get_shard_db(shard_key: str) -> BaseDBAsyncClient:
+    """
+    Returns the connection of the shard holding `shard_key`, to be given to the queries
+    with `using_db`, or to `in_transaction` by its `connection_name`. It is the shard's
+    primary, for the reads too: the shards have no read connections.
+
+    Example Usage:
+        await DataItem.filter(user_ulid=user_ulid).using_db(get_shard_db(user_ulid))
+    """
+    return connections.get(get_shard_connection_name(shard_key))
+
+
+async def generate_shard_schemas_async():
+    """
+    Creates, on every shard other than the default connection, the tables of all the
+    models, which Tortoise only creates on their default connection.
+    """
+    models = [
+        model
+        for _, app_models in Tortoise.apps.items()
+        for model in app_models.values()
+    ]
+
+    for shard_connection_name in _shard_connection_names:
+        if shard_connection_name == DB_CONNECTION_DEFAULT:
+            continue
+
+        client = connections.get(shard_connection_name)
+        schema_generator = _new_shard_schema_generator(client, models)
+        await schema_generator.generate_from_string(
+            schema_generator.get_create_schema_sql(safe=True)
+        )
+
+
+def _new_shard_schema_generator(client: BaseDBAsyncClient, models: list[type[Model]]):
+    class _ShardSchemaGenerator(client.schema_generator):
+        def _get_models_to_create(self) -> list[type[Model]]:
+            for model in models:
+                model._check()
+
+            return models
+
+    return _ShardSchemaGenerator(client)
@@ -1,9 +1,62 @@
-from tortoise import fields
+from typing import Any
+from uuid import UUID
+
+from tortoise import Model, fields
+from ulid import ULID
 
 from shared.lib.ulid_utils import new_ulid_str
 
+ULID_FIELD_SQL_TYPES = {"sqlite": "BLOB", "postgres": "UUID"}
+
+
+def ulid_to_db_value(value: Any, dialect: str) -> UUID | bytes | None:
+    """
+    A ULID (`str`, `ULID` or `UUID`) as stored by a database of `dialect`: a UUID on
+    PostgreSQL, and its 16 bytes on SQLite.
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, str):
+        value = ULID.from_str(value)
+
+    if dialect == "postgres":
+        return value if isinstance(value, UUID) else UUID(bytes=value.bytes)
+
+    return value.bytes
+
+
+class UlidField(fields.Field[str], str):
+    """
+    A ULID stored in 16 bytes instead of its 26 characters: a BLOB on SQLite, and a
+    UUID on PostgreSQL. Its values are still `str` in the models, and are ordered in the
+    database like the ULIDs themselves.
+
+    The values are converted for the dialect of the model's default connection, which
+    its shards, if any, must share.
+    """
+
+    SQL_TYPE = ULID_FIELD_SQL_TYPES["sqlite"]
+    field_type = str
+
+    class _db_postgres:
+        SQL_TYPE = ULID_FIELD_SQL_TYPES["postgres"]
+
+    def to_db_value(
+        self, value: Any, instance: type[Model] | Model | None
+    ) -> UUID | bytes | None:
+        return ulid_to_db_value(value, self.model._meta.db.capabilities.dialect)
+
+    def to_python_value(self, value: Any) -> str | None:
+        if value is None or isinstance(value, str):
+            return value
+
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return str(ULID.from_bytes(bytes(value)))
+
+        # A UUID, or ULID.
+        return str(ULID.from_bytes(value.bytes))
+
 
 def ulid_field(unique: bool = True, index: bool = True):
-    return fields.CharField(
-        default=new_ulid_str, max_length=27, unique=unique, index=index
-    )
+    return UlidField(default=new_ulid_str, unique=unique, db_index=index)
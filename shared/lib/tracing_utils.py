@@ -0,0 +1,361 @@
+import contextlib
+import functools
+import importlib
+import os
+from contextvars import ContextVar
+from typing import Any, Iterable, Mapping
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from shared.lib.constants import (
+    TRACING_EXPORTER_CONSOLE,
+    TRACING_EXPORTER_FILE,
+    TRACING_EXPORTER_NONE,
+    TRACING_EXPORTER_OTLP,
+)
+
+SPAN_KIND_INTERNAL = "internal"
+SPAN_KIND_SERVER = "server"
+SPAN_KIND_CLIENT = "client"
+SPAN_KIND_PRODUCER = "producer"
+SPAN_KIND_CONSUMER = "consumer"
+
+_NO_SPAN = contextlib.nullcontext()
+""" Returned instead of a span when tracing is disabled, or the trace sampled out. """
+
+_TORTOISE_CLIENT_MODULES = (
+    "tortoise.backends.sqlite.client",
+    "tortoise.backends.asyncpg.client",
+)
+_TORTOISE_QUERY_METHODS = (
+    "execute_insert",
+    "execute_many",
+    "execute_query",
+    "execute_query_dict",
+    "execute_script",
+)
+_DB_STATEMENT_MAX_LENGTH = 1000
+_TRACED_MARKER = "__traced__"
+
+_tracer = None
+_tracer_provider = None
+_file_exporter_file = None
+_propagate = None
+_span_kinds: dict[str, Any] = {}
+_get_current_span = None
+_new_link = None
+
+_in_db_span: ContextVar[bool] = ContextVar("in_db_span", default=False)
+
+
+def init_tracing(
+    service_name: str, exporter_name: str, sample_ratio: float, file_path: str
+):
+    """
+    Enables tracing with OpenTelemetry, which is an optional dependency: with the
+    `none` exporter nothing is imported, and every tracing call is a no-op.
+
+    Traces are sampled at their root (an HTTP request or a consumed message without
+    trace context), and the decision follows the trace across services.
+
+    Args:
+        service_name (str)
+        exporter_name (str): `none`, `console`, `file` (one JSON span per line) or `otlp`.
+        sample_ratio (float): The share of the root spans kept, from 0 to 1.
+        file_path (str): Used by the `file` exporter.
+    """
+    global _tracer, _tracer_provider, _propagate, _get_current_span, _new_link
+    global _file_exporter_file
+    if _tracer is not None or exporter_name == TRACING_EXPORTER_NONE:
+        return
+
+    try:
+        from opentelemetry import propagate, trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import (
+            BatchSpanProcessor,
+            ConsoleSpanExporter,
+        )
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError as e:
+        raise RuntimeError(
+            "Tracing requires the 'opentelemetry-api' and 'opentelemetry-sdk' packages"
+            " (the services' 'tracing' extra)"
+        ) from e
+
+    if exporter_name == TRACING_EXPORTER_CONSOLE:
+        span_exporter = ConsoleSpanExporter()
+    elif exporter_name == TRACING_EXPORTER_FILE:
+        _file_exporter_file = open(file_path, "a")
+        span_exporter = ConsoleSpanExporter(
+            out=_file_exporter_file,
+            formatter=lambda span: span.to_json(indent=None) + os.linesep,
+        )
+    elif exporter_name == TRACING_EXPORTER_OTLP:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        span_exporter = OTLPSpanExporter()
+    else:
+        raise ValueError(f"Unknown tracing exporter '{exporter_name}'")
+
+    _tracer_provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+    )
+    _tracer_provider.add_span_processor(BatchSpanProcessor(span_exporter))
+
+    _span_kinds.update(
+        {
+            SPAN_KIND_INTERNAL: trace.SpanKind.INTERNAL,
+            SPAN_KIND_SERVER: trace.SpanKind.SERVER,
+            SPAN_KIND_CLIENT: trace.SpanKind.CLIENT,
+            SPAN_KIND_PRODUCER: trace.SpanKind.PRODUCER,
+            SPAN_KIND_CONSUMER: trace.SpanKind.CONSUMER,
+        }
+    )
+    _propagate = propagate
+    _get_current_span = trace.get_current_span
+    _new_link = trace.Link
+    _tracer = _tracer_provider.get_tracer(service_name)
+
+    _instrument_tortoise_clients()
+    _instrument_redis_client()
+
+
+def shutdown_tracing():
+    """
+    Exports the spans still buffered, then closes the `file` exporter's file.
+    """
+    global _tracer, _tracer_provider, _file_exporter_file
+    if _tracer_provider:
+        _tracer_provider.shutdown()
+        _tracer_provider = None
+        _tracer = None
+    if _file_exporter_file:
+        _file_exporter_file.close()
+        _file_exporter_file = None
+
+
+def is_tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def start_span(
+    name: str,
+    kind: str = SPAN_KIND_INTERNAL,
+    attributes: Mapping[str, Any] | None = None,
+    parent_headers: Mapping[str, Any] | None = None,
+    link_headers: Iterable[Mapping[str, Any] | None] | None = None,
+):
+    """
+    Starts a span, made current until the block exits, which may be the root of a
+    trace. Yields the span, or None when tracing is disabled.
+
+    Args:
+        name (str)
+        kind (str): One of the `SPAN_KIND_*` constants.
+        attributes (Mapping[str, Any] | None)
+        parent_headers (Mapping[str, Any] | None): Headers of an HTTP request or a
+            message, holding the trace context to continue.
+        link_headers (Iterable[Mapping[str, Any] | None] | None): Headers of several
+            messages handled together, whose traces are linked instead of continued.
+
+    Example Usage:
+        with start_span("users process", SPAN_KIND_CONSUMER, parent_headers=message.headers):
+            await async_handler(dto)
+    """
+    if _tracer is None:
+        return _NO_SPAN
+
+    context = None
+    if parent_headers is not None:
+        context = _propagate.extract(_to_carrier(parent_headers))
+
+    links = None
+    if link_headers is not None:
+        links = []
+        for headers in link_headers:
+            span_context = _get_current_span(
+                _propagate.extract(_to_carrier(headers))
+            ).get_span_context()
+            if span_context.is_valid:
+                links.append(_new_link(span_context))
+
+    return _tracer.start_as_current_span(
+        name,
+        context=context,
+        kind=_span_kinds[kind],
+        attributes=attributes,
+        links=links,
+    )
+
+
+def start_child_span(
+    name: str,
+    kind: str = SPAN_KIND_INTERNAL,
+    attributes: Mapping[str, Any] | None = None,
+):
+    """
+    Starts a span only inside a sampled trace, so that work outside of any request
+    (e.g. polling) and sampled out traces cost a context lookup.
+    Yields the span, or None.
+    """
+    if _tracer is None or not _get_current_span().is_recording():
+        return _NO_SPAN
+
+    return _tracer.start_as_current_span(
+        name, kind=_span_kinds[kind], attributes=attributes
+    )
+
+
+def with_trace_headers(headers: dict[str, Any]) -> dict[str, Any]:
+    """
+    Returns the headers with the current trace context added, to be sent along an HTTP
+    request or a message. Returns them as they are when tracing is disabled.
+    """
+    if _tracer is None:
+        return headers
+
+    traced_headers = dict(headers)
+    _propagate.inject(traced_headers)
+
+    return traced_headers
+
+
+class TracingMiddleware:
+    """
+    Starts a server span per request, continuing the trace of the caller, if any.
+    The span is named by the route template once the router matched the request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_recording_status_async(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with start_span(
+            method,
+            SPAN_KIND_SERVER,
+            {"http.request.method": method, "url.path": scope["path"]},
+            parent_headers=_asgi_headers(scope),
+        ) as span:
+            try:
+                await self.app(scope, receive, send_recording_status_async)
+            finally:
+                if span is not None and span.is_recording():
+                    route = scope.get("route")
+                    if route is not None:
+                        span.update_name(f"{method} {route.path}")
+                        span.set_attribute("http.route", route.path)
+
+                    span.set_attribute("http.response.status_code", status_code)
+
+
+def _asgi_headers(scope: Scope) -> dict[str, str]:
+    return {
+        name.decode("latin-1"): value.decode("latin-1")
+        for name, value in scope["headers"]
+    }
+
+
+def _to_carrier(headers: Mapping[str, Any] | None) -> dict[str, str]:
+    if not headers:
+        return {}
+
+    # AMQP header values may be decoded as bytes.
+    return {
+        name: value.decode() if isinstance(value, bytes) else value
+        for name, value in headers.items()
+        if isinstance(value, (str, bytes))
+    }
+
+
+def _instrument_tortoise_clients():
+    from tortoise.backends.base.client import BaseDBAsyncClient
+
+    for module_name in _TORTOISE_CLIENT_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            # The driver of this backend is not installed.
+            pass
+
+    client_types = [BaseDBAsyncClient]
+    while client_types:
+        client_type = client_types.pop()
+        client_types.extend(client_type.__subclasses__())
+
+        for method_name in _TORTOISE_QUERY_METHODS:
+            method = client_type.__dict__.get(method_name)
+            if method is not None and not hasattr(method, _TRACED_MARKER):
+                setattr(client_type, method_name, _traced_query_method(method))
+
+
+def _traced_query_method(query_method):
+    @functools.wraps(query_method)
+    async def traced_query_method(self, query: str, *args, **kwargs):
+        # Some query methods call each other, or the ones of their base type.
+        if _in_db_span.get():
+            return await query_method(self, query, *args, **kwargs)
+
+        with start_child_span(
+            f"db {query.split(maxsplit=1)[0].upper() if query else 'QUERY'}",
+            SPAN_KIND_CLIENT,
+            {
+                "db.system": self.capabilities.dialect,
+                "db.statement": query[:_DB_STATEMENT_MAX_LENGTH],
+            },
+        ):
+            in_db_span_token = _in_db_span.set(True)
+            try:
+                return await query_method(self, query, *args, **kwargs)
+            finally:
+                _in_db_span.reset(in_db_span_token)
+
+    setattr(traced_query_method, _TRACED_MARKER, True)
+    return traced_query_method
+
+
+def _instrument_redis_client():
+    from redis.asyncio.client import Pipeline, Redis
+
+    if hasattr(Redis.execute_command, _TRACED_MARKER):
+        return
+
+    execute_command = Redis.execute_command
+    execute_pipeline = Pipeline.execute
+
+    @functools.wraps(execute_command)
+    async def traced_execute_command(self, *args, **options):
+        with start_child_span(
+            f"redis {args[0]}", SPAN_KIND_CLIENT, {"db.system": "redis"}
+        ):
+            return await execute_command(self, *args, **options)
+
+    @functools.wraps(execute_pipeline)
+    async def traced_execute_pipeline(self, *args, **kwargs):
+        with start_child_span(
+            "redis pipeline",
+            SPAN_KIND_CLIENT,
+            {"db.system": "redis", "db.redis.commands": len(self.command_stack)},
+        ):
+            return await execute_pipeline(self, *args, **kwargs)
+
+    setattr(traced_execute_command, _TRACED_MARKER, True)
+    Redis.execute_command = traced_execute_command
+    Pipeline.execute = traced_execute_pipeline
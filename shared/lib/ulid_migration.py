@@ -0,0 +1,290 @@
+"""
+Moves the ULID columns of a service's database from their former text storage
+(`VARCHAR(27)`) to the 16-byte one of `UlidField`.
+
+Each table still in text is renamed, its new table is created by Tortoise, then its rows
+are streamed to it by chunks of ids, one transaction per chunk, and the former table is
+dropped. The tool can be stopped and run again at any time: it goes on from the last
+copied id. Stop the service during the migration.
+
+With `TODO_API_SHARD_URLS` set, every todo_api shard is migrated.
+
+Usage (from the repository root):
+    `python -m shared.lib.ulid_migration --app users_api --db-url sqlite:///users_api/data/db/db.sqlite3`
+    `python -m shared.lib.ulid_migration --app todo_api --chunk-size 5000`
+"""
+
+import argparse
+import asyncio
+import os
+
+from dotenv import load_dotenv
+from tortoise import Model, Tortoise, connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
+
+from shared.lib.application_variables import ApplicationVariables
+from shared.lib.constants import (
+    APP_NAME_AUTH_API,
+    APP_NAME_TODO_API,
+    APP_NAME_USERS_API,
+)
+from shared.lib.db_config_utils import build_tortoise_config
+from shared.lib.sharding_utils import (
+    generate_shard_schemas_async,
+    get_shard_connection_names,
+)
+from shared.lib.tortoise_utils import (
+    ULID_FIELD_SQL_TYPES,
+    UlidField,
+    ulid_to_db_value,
+)
+
+_APP_ENTITY_MODULES = {
+    APP_NAME_AUTH_API: [f"{APP_NAME_AUTH_API}.data.entities.data_user_credentials"],
+    APP_NAME_USERS_API: [f"{APP_NAME_USERS_API}.data.entities.data_user"],
+    APP_NAME_TODO_API: [f"{APP_NAME_TODO_API}.data.entities.data_item"],
+}
+_TEXT_ULIDS_TABLE_SUFFIX = "__text_ulids"
+
+
+def get_ulid_fields(model: type[Model]) -> dict[str, UlidField]:
+    """
+    The ULID fields of a model, by column name.
+    """
+    return {
+        model._meta.fields_db_projection[field_name]: field
+        for field_name, field in model._meta.fields_map.items()
+        if isinstance(field, UlidField)
+    }
+
+
+async def prepare_ulid_migration_async(
+    connection_name: str, model: type[Model]
+) -> bool:
+    """
+    Renames the table of a model out of the way if its ULIDs are still stored as text,
+    so that Tortoise creates the new one. Its indexes are dropped, as the new table
+    gets the same ones.
+
+    Returns:
+        bool: Whether the table has rows to copy, from this or a previous run.
+    """
+    client = connections.get(connection_name)
+    table_name = model._meta.db_table
+    text_ulids_table_name = f"{table_name}{_TEXT_ULIDS_TABLE_SUFFIX}"
+
+    if await _get_column_type_async(
+        client, text_ulids_table_name, model._meta.db_pk_column
+    ):
+        return True
+
+    ulid_column_name = next(iter(get_ulid_fields(model)))
+    column_type = await _get_column_type_async(client, table_name, ulid_column_name)
+    if (
+        column_type is None
+        or column_type == ULID_FIELD_SQL_TYPES[client.capabilities.dialect].lower()
+    ):
+        return False
+
+    async with in_transaction(connection_name) as transaction:
+        for index_name in await _get_index_names_async(transaction, table_name):
+            await transaction.execute_script(f'DROP INDEX "{index_name}"')
+
+        await transaction.execute_script(
+            f'ALTER TABLE "{table_name}" RENAME TO "{text_ulids_table_name}"'
+        )
+
+    return True
+
+
+async def copy_text_ulids_rows_async(
+    connection_name: str, model: type[Model], chunk_size: int
+) -> int:
+    """
+    Streams the rows of a renamed table to the new one, converting their ULIDs, then
+    drops it.
+
+    Returns:
+        int: The number of rows copied.
+    """
+    client = connections.get(connection_name)
+    table_name = model._meta.db_table
+    text_ulids_table_name = f"{table_name}{_TEXT_ULIDS_TABLE_SUFFIX}"
+    pk_column_name = model._meta.db_pk_column
+    ulid_fields = get_ulid_fields(model)
+    is_postgres = client.capabilities.dialect == "postgres"
+
+    # Copied by a previous run.
+    last_rows = await client.execute_query_dict(
+        f'SELECT MAX("{pk_column_name}") AS "last_id" FROM "{table_name}"'
+    )
+    last_id = last_rows[0]["last_id"] or 0
+    copied_count = 0
+
+    while True:
+        rows = await client.execute_query_dict(
+            f'SELECT * FROM "{text_ulids_table_name}" '
+            f'WHERE "{pk_column_name}" > {int(last_id)} '
+            f'ORDER BY "{pk_column_name}" LIMIT {int(chunk_size)}'
+        )
+        if not rows:
+            break
+
+        column_names = list(rows[0])
+        placeholders = ", ".join(
+            f"${i}" if is_postgres else "?" for i in range(1, len(column_names) + 1)
+        )
+        insert_sql = (
+            f'INSERT INTO "{table_name}" ('
+            + ", ".join(f'"{column_name}"' for column_name in column_names)
+            + f") VALUES ({placeholders})"
+        )
+        values = [
+            [
+                (
+                    ulid_to_db_value(row[column_name], client.capabilities.dialect)
+                    if column_name in ulid_fields
+                    else row[column_name]
+                )
+                for column_name in column_names
+            ]
+            for row in rows
+        ]
+
+        async with in_transaction(connection_name) as transaction:
+            await transaction.execute_many(insert_sql, values)
+
+        copied_count += len(rows)
+        last_id = rows[-1][pk_column_name]
+        print(f"{connection_name}.{table_name}: copied up to id {last_id}")
+
+    async with in_transaction(connection_name) as transaction:
+        if is_postgres:
+            # The ids were copied as they were, without going through the sequence.
+            await transaction.execute_query(
+                f"SELECT setval(pg_get_serial_sequence('\"{table_name}\"', "
+                f'\'{pk_column_name}\'), MAX("{pk_column_name}")) FROM "{table_name}"'
+            )
+        await transaction.execute_script(f'DROP TABLE "{text_ulids_table_name}"')
+
+    return copied_count
+
+
+async def _get_column_type_async(
+    client: BaseDBAsyncClient, table_name: str, column_name: str
+) -> str | None:
+    """
+    The lowercase type of a column, or None if its table doesn't exist.
+    """
+    if client.capabilities.dialect == "sqlite":
+        rows = await client.execute_query_dict(f'PRAGMA table_info("{table_name}")')
+        return next(
+            (row["type"].lower() for row in rows if row["name"] == column_name), None
+        )
+
+    rows = await client.execute_query_dict(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_schema = current_schema() "
+        f"AND table_name = '{table_name}' AND column_name = '{column_name}'"
+    )
+    return rows[0]["data_type"].lower() if rows else None
+
+
+async def _get_index_names_async(
+    client: BaseDBAsyncClient, table_name: str
+) -> list[str]:
+    """
+    The indexes created on a table, without the ones of its constraints.
+    """
+    if client.capabilities.dialect == "sqlite":
+        rows = await client.execute_query_dict(
+            "SELECT name FROM sqlite_master "
+            f"WHERE type = 'index' AND tbl_name = '{table_name}' AND sql IS NOT NULL"
+        )
+        return [row["name"] for row in rows]
+
+    rows = await client.execute_query_dict(
+        "SELECT index_class.relname AS name FROM pg_index "
+        "JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid "
+        "JOIN pg_class table_class ON table_class.oid = pg_index.indrelid "
+        f"WHERE table_class.relname = '{table_name}' "
+        "AND table_class.relnamespace = current_schema()::regnamespace "
+        "AND NOT EXISTS "
+        "(SELECT 1 FROM pg_constraint WHERE pg_constraint.conindid = pg_index.indexrelid)"
+    )
+    return [row["name"] for row in rows]
+
+
+async def main_async(args: argparse.Namespace):
+    shard_db_urls = (
+        ApplicationVariables.TODO_API_SHARD_URLS()
+        if args.app == APP_NAME_TODO_API
+        else []
+    )
+    db_url = (
+        args.db_url
+        or (shard_db_urls[0] if shard_db_urls else ApplicationVariables.DB_URL())
+        or f"sqlite:///{os.path.abspath(os.path.join(args.app, 'data', 'db', 'db.sqlite3'))}"
+    )
+
+    await Tortoise.init(
+        config=build_tortoise_config(
+            db_url,
+            {"entities": _APP_ENTITY_MODULES[args.app]},
+            shard_db_urls=shard_db_urls[1:],
+        )
+    )
+
+    try:
+        models = [
+            model
+            for model in Tortoise.apps["entities"].values()
+            if get_ulid_fields(model)
+        ]
+
+        prepared = []
+        for connection_name in get_shard_connection_names():
+            for model in models:
+                if await prepare_ulid_migration_async(connection_name, model):
+                    prepared.append((connection_name, model))
+
+        if not prepared:
+            print("The ULIDs are already stored as binary")
+            return
+
+        await Tortoise.generate_schemas(safe=True)
+        await generate_shard_schemas_async()
+
+        for connection_name, model in prepared:
+            copied_count = await copy_text_ulids_rows_async(
+                connection_name, model, args.chunk_size
+            )
+            print(
+                f"{connection_name}.{model._meta.db_table}: migrated, "
+                f"{copied_count} rows copied"
+            )
+
+    finally:
+        await Tortoise.close_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--app", required=True, choices=list(_APP_ENTITY_MODULES))
+    parser.add_argument(
+        "--db-url",
+        help="Defaults to DB_URL (the first TODO_API_SHARD_URLS for todo_api), "
+        "then to the local SQLite database of the app",
+    )
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    load_dotenv()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,65 @@
-from shared.event_models.users import UserCreated
+from shared.event_models.users import UserCreated, UserDeleted
 from shared.lib.constants import (
     EXCHANGE_USERS,
     TOPIC_USER_CREATED,
+    TOPIC_USER_DELETED,
+)
+from shared.lib.rabbitmq_utils import (
+    AsyncBatchHandler,
+    AsyncHandler,
+    consume_topic_async,
+    consume_topic_batch_async,
 )
-from shared.lib.rabbitmq_utils import AsyncHandler, consume_topic_async
 
 
-async def consume_user_created_async(app_name: str, async_handler: AsyncHandler):
+async def consume_user_created_async(
+    app_name: str,
+    async_handler: AsyncHandler,
+    prefetch_count: int | None = None,
+    concurrency: int | None = None,
+):
     await consume_topic_async(
         exchange_name=EXCHANGE_USERS,
         topic_name=TOPIC_USER_CREATED,
         queue_name=f"user_created_queue__{app_name}",
         model_type=UserCreated,
         async_handler=async_handler,
+        prefetch_count=prefetch_count,
+        concurrency=concurrency,
+        ordering_key_selector=lambda dto: dto.temp_user_ulid,
+    )
+
+
+async def consume_user_created_batch_async(
+    app_name: str,
+    async_batch_handler: AsyncBatchHandler,
+    batch_size: int | None = None,
+    batch_timeout_ms: int | None = None,
+):
+    await consume_topic_batch_async(
+        exchange_name=EXCHANGE_USERS,
+        topic_name=TOPIC_USER_CREATED,
+        queue_name=f"user_created_queue__{app_name}",
+        model_type=UserCreated,
+        async_batch_handler=async_batch_handler,
+        batch_size=batch_size,
+        batch_timeout_ms=batch_timeout_ms,
+    )
+
+
+async def consume_user_deleted_async(
+    app_name: str,
+    async_handler: AsyncHandler,
+    prefetch_count: int | None = None,
+    concurrency: int | None = None,
+):
+    await consume_topic_async(
+        exchange_name=EXCHANGE_USERS,
+        topic_name=TOPIC_USER_DELETED,
+        queue_name=f"user_deleted_queue__{app_name}",
+        model_type=UserDeleted,
+        async_handler=async_handler,
+        prefetch_count=prefetch_count,
+        concurrency=concurrency,
+        ordering_key_selector=lambda dto: dto.user_ulid,
     )
@@ -3,14 +3,44 @@ from shared.lib.constants import (
     EXCHANGE_USER_CREDENTIALS,
     TOPIC_USER_CREDENTIALS_CREATED,
 )
-from shared.lib.rabbitmq_utils import AsyncHandler, consume_topic_async
+from shared.lib.rabbitmq_utils import (
+    AsyncBatchHandler,
+    AsyncHandler,
+    consume_topic_async,
+    consume_topic_batch_async,
+)
 
 
-async def consume_user_credentials_created_async(app_name: str, async_handler: AsyncHandler):
+async def consume_user_credentials_created_async(
+    app_name: str,
+    async_handler: AsyncHandler,
+    prefetch_count: int | None = None,
+    concurrency: int | None = None,
+):
     await consume_topic_async(
         exchange_name=EXCHANGE_USER_CREDENTIALS,
         topic_name=TOPIC_USER_CREDENTIALS_CREATED,
         queue_name=f"user_credentials_created_queue__{app_name}",
         model_type=UserCredentialsCreated,
         async_handler=async_handler,
+        prefetch_count=prefetch_count,
+        concurrency=concurrency,
+        ordering_key_selector=lambda dto: dto.temp_user_ulid,
+    )
+
+
+async def consume_user_credentials_created_batch_async(
+    app_name: str,
+    async_batch_handler: AsyncBatchHandler,
+    batch_size: int | None = None,
+    batch_timeout_ms: int | None = None,
+):
+    await consume_topic_batch_async(
+        exchange_name=EXCHANGE_USER_CREDENTIALS,
+        topic_name=TOPIC_USER_CREDENTIALS_CREATED,
+        queue_name=f"user_credentials_created_queue__{app_name}",
+        model_type=UserCredentialsCreated,
+        async_batch_handler=async_batch_handler,
+        batch_size=batch_size,
+        batch_timeout_ms=batch_timeout_ms,
     )
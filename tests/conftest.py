@@ -0,0 +1,24 @@
+import pytest
+
+from shared.lib import settings as settings_module
+from shared.lib.settings import Settings
+
+
+@pytest.fixture
+def use_settings(monkeypatch):
+    """
+    Replaces the current settings, the defaults overridden by the given values, rather
+    than reading them from the environment.
+
+    Example Usage:
+        def test_hedging(use_settings):
+            use_settings(http_client_hedging_enabled=True)
+    """
+
+    def use(**values) -> Settings:
+        settings = Settings(**values)
+        monkeypatch.setattr(settings_module, "_settings", settings)
+        return settings
+
+    use()
+    return use
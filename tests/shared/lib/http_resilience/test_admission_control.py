@@ -0,0 +1,243 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from shared.lib.constants import INTERNAL_API_KEY_HEADER_NAME
+from shared.lib.fastapi_utils import app_add_admission_control
+from shared.lib.http_resilience.admission_control import (
+    ConcurrencyLimiter,
+    RequestPriority,
+)
+
+_INTERNAL_API_KEY = "internal"
+
+
+def _new_limiter(
+    initial_limit: int = 2,
+    queue_size: int = 2,
+    latency_target_seconds: float = 0.5,
+    queue_timeout_seconds: float = 1.0,
+) -> ConcurrencyLimiter:
+    return ConcurrencyLimiter(
+        "GET",
+        "/items",
+        initial_limit=initial_limit,
+        min_limit=1,
+        max_limit=10,
+        queue_size=queue_size,
+        latency_target_seconds=latency_target_seconds,
+        queue_timeout_seconds=queue_timeout_seconds,
+    )
+
+
+def test_admits_under_the_limit_then_queues():
+    async def run_async():
+        limiter = _new_limiter()
+        assert await limiter.acquire_async(RequestPriority.EXTERNAL)
+        assert await limiter.acquire_async(RequestPriority.EXTERNAL)
+
+        waiting = asyncio.create_task(limiter.acquire_async(RequestPriority.EXTERNAL))
+        await asyncio.sleep(0)
+        assert limiter.queued == 1 and not waiting.done()
+
+        limiter.release(0.01)
+        assert await waiting
+        assert limiter.in_flight == 2 and limiter.queued == 0
+
+    asyncio.run(run_async())
+
+
+def test_queue_admits_by_priority_then_arrival():
+    async def run_async():
+        limiter = _new_limiter(initial_limit=1, queue_size=3)
+        await limiter.acquire_async(RequestPriority.EXTERNAL)
+
+        admitted = []
+
+        async def acquire_async(name: str, priority: RequestPriority):
+            await limiter.acquire_async(priority)
+            admitted.append(name)
+            limiter.release(0.01)
+
+        tasks = [
+            asyncio.create_task(acquire_async("external 1", RequestPriority.EXTERNAL)),
+            asyncio.create_task(acquire_async("internal", RequestPriority.INTERNAL)),
+            asyncio.create_task(acquire_async("external 2", RequestPriority.EXTERNAL)),
+        ]
+        await asyncio.sleep(0)
+        limiter.release(0.01)
+        await asyncio.gather(*tasks)
+
+        return admitted
+
+    assert asyncio.run(run_async()) == ["internal", "external 1", "external 2"]
+
+
+def test_full_queue_sheds_the_last_lower_priority_waiter():
+    async def run_async():
+        limiter = _new_limiter(initial_limit=1, queue_size=1)
+        await limiter.acquire_async(RequestPriority.EXTERNAL)
+
+        external = asyncio.create_task(limiter.acquire_async(RequestPriority.EXTERNAL))
+        await asyncio.sleep(0)
+        internal = asyncio.create_task(limiter.acquire_async(RequestPriority.INTERNAL))
+        await asyncio.sleep(0)
+
+        # The external request lost its place, and the next one finds the queue full.
+        assert not await external
+        assert not await limiter.acquire_async(RequestPriority.EXTERNAL)
+
+        limiter.release(0.01)
+        assert await internal
+
+        return limiter.rejected_total
+
+    assert asyncio.run(run_async()) == {
+        RequestPriority.INTERNAL: 0,
+        RequestPriority.EXTERNAL: 2,
+    }
+
+
+def test_full_queue_rejects_an_equal_priority():
+    async def run_async():
+        limiter = _new_limiter(initial_limit=1, queue_size=1)
+        await limiter.acquire_async(RequestPriority.INTERNAL)
+        waiting = asyncio.create_task(limiter.acquire_async(RequestPriority.INTERNAL))
+        await asyncio.sleep(0)
+
+        assert not await limiter.acquire_async(RequestPriority.INTERNAL)
+
+        limiter.release(0.01)
+        assert await waiting
+
+    asyncio.run(run_async())
+
+
+def test_rejects_after_the_queue_timeout():
+    async def run_async():
+        limiter = _new_limiter(initial_limit=1, queue_timeout_seconds=0.01)
+        await limiter.acquire_async(RequestPriority.EXTERNAL)
+
+        assert not await limiter.acquire_async(RequestPriority.EXTERNAL)
+        assert limiter.queued == 0
+        assert limiter.rejected_total[RequestPriority.EXTERNAL] == 1
+
+    asyncio.run(run_async())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run_async():
+        limiter = _new_limiter(initial_limit=1)
+        await limiter.acquire_async(RequestPriority.EXTERNAL)
+        waiting = asyncio.create_task(limiter.acquire_async(RequestPriority.EXTERNAL))
+        await asyncio.sleep(0)
+
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert limiter.queued == 0
+
+        limiter.release(0.01)
+        assert limiter.in_flight == 0
+
+    asyncio.run(run_async())
+
+
+def test_waiter_cancelled_once_admitted_frees_its_slot():
+    async def run_async():
+        limiter = _new_limiter(initial_limit=1)
+        await limiter.acquire_async(RequestPriority.EXTERNAL)
+        waiting = asyncio.create_task(limiter.acquire_async(RequestPriority.EXTERNAL))
+        await asyncio.sleep(0)
+
+        # Admitted, then cancelled before it resumes.
+        limiter.release(0.01)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+
+        assert waiting.cancelled()
+        assert limiter.in_flight == 0
+
+    asyncio.run(run_async())
+
+
+def test_limit_increases_while_reached_and_fast():
+    async def run_async():
+        limiter = _new_limiter(initial_limit=2)
+        for _ in range(2):
+            await limiter.acquire_async(RequestPriority.EXTERNAL)
+
+        limiter.release(0.01)
+        assert limiter.limit == 2.5
+
+        # No longer reached: unchanged.
+        limiter.release(0.01)
+        assert limiter.limit == 2.5
+
+    asyncio.run(run_async())
+
+
+def test_limit_decreases_when_slow_at_most_once_per_target():
+    async def run_async():
+        limiter = _new_limiter(initial_limit=5, latency_target_seconds=0.5)
+        for _ in range(2):
+            await limiter.acquire_async(RequestPriority.EXTERNAL)
+
+        limiter.release(1.0)
+        assert limiter.limit == 4.5
+
+        limiter.release(1.0)
+        assert limiter.limit == 4.5
+
+    asyncio.run(run_async())
+
+
+def test_limit_stays_within_its_bounds():
+    async def run_async():
+        limiter = _new_limiter(initial_limit=1, latency_target_seconds=0.0)
+        await limiter.acquire_async(RequestPriority.EXTERNAL)
+
+        limiter.release(1.0)
+        assert limiter.limit == 1.0
+
+    asyncio.run(run_async())
+
+
+def test_overloaded_route_answers_503_with_retry_after(use_settings):
+    use_settings(
+        internal_api_key=_INTERNAL_API_KEY,
+        admission_initial_limit=1,
+        admission_min_limit=1,
+        admission_queue_size=1,
+        admission_queue_timeout_seconds=0.05,
+    )
+    app = FastAPI()
+    app_add_admission_control(app)
+    release = asyncio.Event()
+
+    @app.get("/items")
+    async def get_items():
+        await release.wait()
+        return {}
+
+    async def run_async():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app), base_url="http://test"
+        ) as client:
+            in_flight = asyncio.create_task(client.get("/items"))
+            await asyncio.sleep(0.01)
+
+            rejected = await client.get("/items")
+
+            release.set()
+            internal = await client.get(
+                "/items", headers={INTERNAL_API_KEY_HEADER_NAME: _INTERNAL_API_KEY}
+            )
+            return (await in_flight).status_code, rejected, internal.status_code
+
+    in_flight_status_code, rejected, internal_status_code = asyncio.run(run_async())
+
+    assert in_flight_status_code == 200
+    assert rejected.status_code == 503
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert internal_status_code == 200
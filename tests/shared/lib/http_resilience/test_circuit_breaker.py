@@ -0,0 +1,104 @@
+import pytest
+
+from shared.lib.http_resilience.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+)
+
+
+def _new_circuit_breaker(reset_timeout_seconds: float = 60.0) -> CircuitBreaker:
+    return CircuitBreaker(
+        "target", failure_threshold=3, reset_timeout_seconds=reset_timeout_seconds
+    )
+
+
+def _open(circuit_breaker: CircuitBreaker):
+    for _ in range(circuit_breaker.failure_threshold):
+        circuit_breaker.before_call()
+        circuit_breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures():
+    circuit_breaker = _new_circuit_breaker()
+
+    for _ in range(2):
+        circuit_breaker.before_call()
+        circuit_breaker.record_failure()
+    assert circuit_breaker.state is CircuitState.CLOSED
+
+    circuit_breaker.before_call()
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state is CircuitState.OPEN
+    assert circuit_breaker.opened_total == 1
+
+
+def test_success_resets_consecutive_failures():
+    circuit_breaker = _new_circuit_breaker()
+
+    for _ in range(2):
+        circuit_breaker.record_failure()
+    circuit_breaker.record_success()
+    for _ in range(2):
+        circuit_breaker.record_failure()
+
+    assert circuit_breaker.state is CircuitState.CLOSED
+
+
+def test_open_rejects_calls_until_reset_timeout():
+    circuit_breaker = _new_circuit_breaker()
+    _open(circuit_breaker)
+
+    with pytest.raises(CircuitOpenError) as error_info:
+        circuit_breaker.before_call()
+
+    assert 0 < error_info.value.retry_after_seconds <= 60.0
+    assert circuit_breaker.rejected_total == 1
+
+
+def test_half_open_lets_one_probe_through():
+    circuit_breaker = _new_circuit_breaker(reset_timeout_seconds=0.0)
+    _open(circuit_breaker)
+
+    assert circuit_breaker.before_call() is True
+    assert circuit_breaker.state is CircuitState.HALF_OPEN
+
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_call()
+
+
+def test_closed_calls_are_not_probes():
+    assert _new_circuit_breaker().before_call() is False
+
+
+def test_half_open_probe_success_closes():
+    circuit_breaker = _new_circuit_breaker(reset_timeout_seconds=0.0)
+    _open(circuit_breaker)
+
+    circuit_breaker.before_call()
+    circuit_breaker.record_success()
+
+    assert circuit_breaker.state is CircuitState.CLOSED
+    assert circuit_breaker.before_call() is False
+
+
+def test_half_open_probe_failure_opens_again():
+    circuit_breaker = _new_circuit_breaker(reset_timeout_seconds=0.0)
+    _open(circuit_breaker)
+
+    circuit_breaker.before_call()
+    circuit_breaker.record_failure()
+
+    assert circuit_breaker.state is CircuitState.OPEN
+    assert circuit_breaker.opened_total == 2
+
+
+def test_released_probe_slot_lets_another_probe_through():
+    circuit_breaker = _new_circuit_breaker(reset_timeout_seconds=0.0)
+    _open(circuit_breaker)
+
+    circuit_breaker.before_call()
+    circuit_breaker.release_probe()
+
+    assert circuit_breaker.before_call() is True
+    assert circuit_breaker.state is CircuitState.HALF_OPEN
@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import httpx
+
+from shared.lib.constants import REQUEST_DEADLINE_HEADER_NAME
+from shared.lib.http_resilience.deadlines import (
+    RequestDeadlineMiddleware,
+    format_deadline_header,
+    get_request_deadline,
+    parse_deadline_header,
+)
+
+
+async def _app(scope, receive, send):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain")],
+        }
+    )
+    await send(
+        {"type": "http.response.body", "body": str(get_request_deadline()).encode()}
+    )
+
+
+def _get(headers: dict[str, str] | None = None) -> httpx.Response:
+    async def get_async():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(
+                RequestDeadlineMiddleware(_app, default_budget_seconds=3)
+            ),
+            base_url="http://test",
+        ) as client:
+            return await client.get("/", headers=headers)
+
+    return asyncio.run(get_async())
+
+
+def test_deadline_header_round_trip():
+    assert (
+        parse_deadline_header(format_deadline_header(1700000000.123)) == 1700000000.123
+    )
+    assert parse_deadline_header("not a deadline") is None
+
+
+def test_uses_the_caller_deadline():
+    deadline = round(time.time() + 1, 3)
+
+    response = _get({REQUEST_DEADLINE_HEADER_NAME: format_deadline_header(deadline)})
+
+    assert float(response.text) == deadline
+
+
+def test_starts_a_budget_without_caller_deadline():
+    started_at = time.time()
+
+    response = _get()
+
+    assert started_at + 3 <= float(response.text) <= time.time() + 3
+
+
+def test_drops_expired_requests():
+    response = _get(
+        {REQUEST_DEADLINE_HEADER_NAME: format_deadline_header(time.time() - 1)}
+    )
+
+    assert response.status_code == 504
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from shared.lib.http_resilience.hedging import LatencyTracker, hedged_call_async
+
+
+def _new_latency_tracker(latency_seconds: float) -> LatencyTracker:
+    latency_tracker = LatencyTracker("target")
+    for _ in range(20):
+        latency_tracker.record(latency_seconds)
+
+    return latency_tracker
+
+
+def test_p95_is_unknown_until_enough_samples():
+    latency_tracker = LatencyTracker("target")
+    for _ in range(19):
+        latency_tracker.record(0.01)
+
+    assert latency_tracker.p95_seconds() is None
+
+    latency_tracker.record(0.01)
+    assert latency_tracker.p95_seconds() == 0.01
+
+
+def test_without_p95_sends_a_single_attempt():
+    attempts = []
+
+    async def send_async():
+        attempts.append(1)
+        return "response"
+
+    result = asyncio.run(hedged_call_async(send_async, LatencyTracker("target")))
+
+    assert result == "response"
+    assert len(attempts) == 1
+
+
+def test_fast_attempt_is_not_hedged():
+    latency_tracker = _new_latency_tracker(0.05)
+    attempts = []
+
+    async def send_async():
+        attempts.append(1)
+        return "response"
+
+    assert asyncio.run(hedged_call_async(send_async, latency_tracker)) == "response"
+    assert len(attempts) == 1
+    assert latency_tracker.hedges_sent == 0
+
+
+def test_slow_attempt_is_hedged_and_cancelled():
+    latency_tracker = _new_latency_tracker(0.01)
+    first_attempt_cancelled = asyncio.Event()
+    attempts = []
+
+    async def send_async():
+        attempts.append(1)
+        if len(attempts) == 1:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                first_attempt_cancelled.set()
+                raise
+
+        return f"attempt {len(attempts)}"
+
+    async def run_async():
+        result = await hedged_call_async(send_async, latency_tracker)
+        await asyncio.wait_for(first_attempt_cancelled.wait(), 1)
+        return result
+
+    assert asyncio.run(run_async()) == "attempt 2"
+    assert latency_tracker.hedges_sent == 1
+    assert latency_tracker.hedges_won == 1
+
+
+def test_failed_attempt_waits_for_the_other():
+    latency_tracker = _new_latency_tracker(0.01)
+    attempts = []
+
+    async def send_async():
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(0.05)
+            return "attempt 1"
+
+        raise ConnectionError()
+
+    assert asyncio.run(hedged_call_async(send_async, latency_tracker)) == "attempt 1"
+
+
+def test_both_attempts_failed_raises():
+    latency_tracker = _new_latency_tracker(0.01)
+
+    async def send_async():
+        await asyncio.sleep(0.02)
+        raise ConnectionError()
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(hedged_call_async(send_async, latency_tracker))
@@ -0,0 +1,218 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from shared.lib import db_config_utils
+from shared.lib.constants import (
+    READ_FROM_PRIMARY_HEADER_NAME,
+    REQUEST_DEADLINE_HEADER_NAME,
+)
+from shared.lib.http_resilience import circuit_breaker, deadlines, hedging
+from shared.lib.http_resilience.circuit_breaker import CircuitState, get_circuit_breaker
+from shared.lib.http_resilience.hedging import get_latency_tracker
+from shared.lib.http_resilience.resilient_http_client import (
+    close_http_client_async,
+    init_http_client,
+    send_request_async,
+)
+
+_TARGET = "target"
+_URL = "http://target/api"
+
+
+@pytest.fixture(autouse=True)
+def _reset_targets(monkeypatch, use_settings):
+    monkeypatch.setattr(circuit_breaker, "_circuit_breakers", {})
+    monkeypatch.setattr(hedging, "_latency_trackers", {})
+
+
+def _send_with_handler(handler, send_async_factory):
+    """
+    Runs `send_async_factory()` with the shared client calling `handler` instead of the
+    network.
+    """
+
+    async def run_async():
+        init_http_client(httpx.MockTransport(handler))
+        try:
+            return await send_async_factory()
+        finally:
+            await close_http_client_async()
+
+    return asyncio.run(run_async())
+
+
+def _get_timeout_seconds(request: httpx.Request) -> float:
+    return request.extensions["timeout"]["read"]
+
+
+def test_forwards_the_remaining_budget():
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200)
+
+    async def send_async():
+        deadline = time.time() + 2
+        deadlines._request_deadline.set(deadline)
+        await send_request_async(_TARGET, "GET", _URL)
+        return deadline
+
+    deadline = _send_with_handler(handler, send_async)
+
+    (request,) = requests
+    forwarded_deadline = int(request.headers[REQUEST_DEADLINE_HEADER_NAME]) / 1000
+    assert forwarded_deadline == pytest.approx(deadline, abs=0.01)
+    assert 1.5 < _get_timeout_seconds(request) <= 2
+
+
+def test_timeout_is_bounded_by_the_client_timeout(use_settings):
+    use_settings(http_client_timeout_seconds=0.5)
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200)
+
+    async def send_async():
+        deadlines._request_deadline.set(time.time() + 10)
+        await send_request_async(_TARGET, "GET", _URL)
+
+    _send_with_handler(handler, send_async)
+
+    assert _get_timeout_seconds(requests[0]) <= 0.5
+
+
+def test_expired_budget_skips_the_call():
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200)
+
+    async def send_async():
+        deadlines._request_deadline.set(time.time() - 1)
+        await send_request_async(_TARGET, "GET", _URL)
+
+    with pytest.raises(HTTPException) as error_info:
+        _send_with_handler(handler, send_async)
+
+    assert error_info.value.status_code == 504
+    assert not requests
+
+
+def test_hedged_attempt_gets_the_remaining_budget(use_settings):
+    use_settings(http_client_hedging_enabled=True)
+    latency_tracker = get_latency_tracker(_TARGET)
+    for _ in range(20):
+        latency_tracker.record(0.05)
+    requests: list[httpx.Request] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if len(requests) == 1:
+            await asyncio.sleep(10)
+
+        return httpx.Response(200)
+
+    async def send_async():
+        deadlines._request_deadline.set(time.time() + 2)
+        return await send_request_async(_TARGET, "GET", _URL, hedge=True)
+
+    assert _send_with_handler(handler, send_async).status_code == 200
+
+    first_request, hedge_request = requests
+    assert (
+        hedge_request.headers[REQUEST_DEADLINE_HEADER_NAME]
+        == first_request.headers[REQUEST_DEADLINE_HEADER_NAME]
+    )
+    assert _get_timeout_seconds(hedge_request) <= (
+        _get_timeout_seconds(first_request) - 0.05
+    )
+
+
+def test_server_errors_open_the_circuit(use_settings):
+    use_settings(circuit_breaker_failure_threshold=2)
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(500)
+
+    async def send_async():
+        for _ in range(2):
+            await send_request_async(_TARGET, "GET", _URL)
+        await send_request_async(_TARGET, "GET", _URL)
+
+    with pytest.raises(HTTPException) as error_info:
+        _send_with_handler(handler, send_async)
+
+    assert error_info.value.status_code == 503
+    assert "Retry-After" in error_info.value.headers
+    assert len(requests) == 2
+
+
+def test_unexpected_error_releases_the_half_open_probe(use_settings):
+    use_settings(circuit_breaker_failure_threshold=1)
+    target_circuit_breaker = get_circuit_breaker(_TARGET)
+    target_circuit_breaker.reset_timeout_seconds = 0.0
+    target_circuit_breaker.record_failure()
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if len(requests) == 1:
+            raise ValueError("Not a transport error")
+
+        return httpx.Response(200)
+
+    async def send_async():
+        with pytest.raises(ValueError):
+            await send_request_async(_TARGET, "GET", _URL)
+        assert target_circuit_breaker.state is CircuitState.HALF_OPEN
+
+        return await send_request_async(_TARGET, "GET", _URL)
+
+    assert _send_with_handler(handler, send_async).status_code == 200
+    assert target_circuit_breaker.state is CircuitState.CLOSED
+
+
+def test_cancelled_call_releases_the_half_open_probe(use_settings):
+    use_settings(circuit_breaker_failure_threshold=1)
+    target_circuit_breaker = get_circuit_breaker(_TARGET)
+    target_circuit_breaker.reset_timeout_seconds = 0.0
+    target_circuit_breaker.record_failure()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(10)
+        return httpx.Response(200)
+
+    async def send_async():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(send_request_async(_TARGET, "GET", _URL), 0.05)
+
+        return target_circuit_breaker.before_call()
+
+    assert _send_with_handler(handler, send_async) is True
+
+
+def test_forwards_reads_pinned_to_primary():
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200)
+
+    async def send_async():
+        await send_request_async(_TARGET, "GET", _URL)
+        db_config_utils._reads_pinned_to_primary.set(True)
+        await send_request_async(_TARGET, "GET", _URL)
+
+    _send_with_handler(handler, send_async)
+
+    assert READ_FROM_PRIMARY_HEADER_NAME not in requests[0].headers
+    assert requests[1].headers[READ_FROM_PRIMARY_HEADER_NAME] == "1"
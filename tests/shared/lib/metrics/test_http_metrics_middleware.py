@@ -0,0 +1,41 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from shared.lib.fastapi_utils import app_add_metrics
+from shared.lib.metrics.app_metrics import (
+    http_requests_in_flight,
+    http_requests_total,
+)
+
+_ROUTE = "/metrics-test/items/{ulid}"
+
+
+def test_records_the_requests_by_route_template():
+    app = FastAPI()
+    app_add_metrics(app)
+    in_flight = http_requests_in_flight.labels("GET", _ROUTE)
+    requests_total = http_requests_total.labels("GET", _ROUTE, "200")
+    requests_total_before = requests_total.value
+    in_flight_while_handled = []
+
+    @app.get(_ROUTE)
+    async def get_item(ulid: str):
+        in_flight_while_handled.append(in_flight.value)
+        return {}
+
+    async def run_async():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app), base_url="http://test"
+        ) as client:
+            await client.get("/metrics-test/items/1")
+            await client.get("/metrics-test/items/2")
+            return (await client.get("/metrics")).text
+
+    metrics = asyncio.run(run_async())
+
+    assert in_flight_while_handled == [1, 1]
+    assert in_flight.value == 0
+    assert requests_total.value == requests_total_before + 2
+    assert f'http_requests_in_flight{{method="GET",route="{_ROUTE}"' in metrics
@@ -0,0 +1,34 @@
+import pytest
+
+from shared.event_models.users import UserCreated
+from shared.lib.constants import CONTENT_TYPE_JSON, CONTENT_TYPE_MSGPACK
+from shared.lib.rabbitmq_client.message_codecs import (
+    JsonMessageCodec,
+    UnsupportedContentTypeError,
+    get_message_codec,
+)
+
+_EVENT = UserCreated(
+    final_user_ulid="01KA0000000000000000000000",
+    temp_user_ulid="01KA0000000000000000000001",
+)
+
+
+@pytest.mark.parametrize("content_type", [CONTENT_TYPE_JSON, CONTENT_TYPE_MSGPACK])
+def test_round_trip(content_type):
+    message_codec = get_message_codec(content_type)
+
+    body = message_codec.encode(_EVENT)
+
+    assert message_codec.decode(body, UserCreated) == _EVENT
+
+
+def test_messages_without_content_type_are_json():
+    assert isinstance(get_message_codec(None), JsonMessageCodec)
+
+
+def test_unsupported_content_type():
+    with pytest.raises(UnsupportedContentTypeError) as error_info:
+        get_message_codec("application/x-unknown")
+
+    assert error_info.value.content_type == "application/x-unknown"
@@ -0,0 +1,21 @@
+import pytest
+from fastapi import HTTPException
+
+from shared.lib.HTTPException_utils import raise_if_item_of_another_user
+
+_USER_ULID = "01KA0000000000000000000000"
+
+
+def test_item_of_the_request_user_is_accepted():
+    raise_if_item_of_another_user(
+        item_user_ulid=_USER_ULID, request_user_ulid=_USER_ULID
+    )
+
+
+def test_item_of_another_user_is_a_bad_request():
+    with pytest.raises(HTTPException) as exception_info:
+        raise_if_item_of_another_user(
+            item_user_ulid="01KA0000000000000000000001", request_user_ulid=_USER_ULID
+        )
+
+    assert exception_info.value.status_code == 400
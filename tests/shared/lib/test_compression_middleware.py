@@ -0,0 +1,156 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+
+from shared.lib.compression_middleware import (
+    CompressionMiddleware,
+    ResponseCompressor,
+    negotiate_content_encoding,
+)
+
+_MINIMUM_SIZE = 100
+_LARGE_BODY = b'{"items": "' + b"x" * 1000 + b'"}'
+
+
+def _app(chunks: list[bytes], headers: list[tuple[bytes, bytes]]):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        for i, chunk in enumerate(chunks):
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": i < len(chunks) - 1,
+                }
+            )
+
+    return app
+
+
+def _json_headers(body_size: int | None = None) -> list[tuple[bytes, bytes]]:
+    headers = [(b"content-type", b"application/json")]
+    if body_size is not None:
+        headers.append((b"content-length", str(body_size).encode()))
+    return headers
+
+
+def _call(
+    app, accept_encoding: str = "gzip", thread_minimum_size: int = 1 << 20
+) -> tuple[dict[str, str], list[dict]]:
+    """
+    Returns the response headers sent through the middleware, and its body messages.
+    """
+    middleware = CompressionMiddleware(
+        app,
+        minimum_size=_MINIMUM_SIZE,
+        gzip_level=6,
+        zstd_level=3,
+        thread_minimum_size=thread_minimum_size,
+    )
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+
+    headers = {name.decode(): value.decode() for name, value in messages[0]["headers"]}
+    return headers, messages[1:]
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [
+        ("gzip, zstd", "zstd"),
+        ("gzip, zstd;q=0.5", "gzip"),
+        ("*", "zstd"),
+        ("br", None),
+        ("gzip;q=0, zstd;q=0", None),
+        ("", None),
+    ],
+)
+def test_negotiate_content_encoding(accept_encoding, expected):
+    assert negotiate_content_encoding(accept_encoding, ["zstd", "gzip"]) == expected
+
+
+def test_response_compressor_is_abstract():
+    with pytest.raises(TypeError):
+        ResponseCompressor()
+
+
+def test_compresses_a_large_body():
+    headers, messages = _call(
+        _app([_LARGE_BODY], _json_headers(len(_LARGE_BODY))), "gzip"
+    )
+
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(messages[0]["body"])
+    assert gzip.decompress(messages[0]["body"]) == _LARGE_BODY
+
+
+def test_compresses_in_a_worker_thread_above_its_size():
+    _, messages = _call(_app([_LARGE_BODY], _json_headers()), thread_minimum_size=0)
+
+    assert gzip.decompress(messages[0]["body"]) == _LARGE_BODY
+
+
+def test_keeps_a_small_body():
+    body = b'{"status": "ok"}'
+
+    headers, messages = _call(_app([body], _json_headers(len(body))))
+
+    assert "content-encoding" not in headers
+    assert messages[0]["body"] == body
+
+
+def test_keeps_the_body_when_no_encoding_is_accepted():
+    headers, messages = _call(_app([_LARGE_BODY], _json_headers()), "br")
+
+    assert "content-encoding" not in headers
+    assert messages[0]["body"] == _LARGE_BODY
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        [(b"content-type", b"text/event-stream")],
+        [(b"content-type", b"image/png")],
+        [(b"content-type", b"application/json"), (b"content-encoding", b"gzip")],
+    ],
+)
+def test_passes_through_the_responses_not_to_compress(headers):
+    response_headers, messages = _call(_app([_LARGE_BODY], headers))
+
+    assert response_headers == {
+        name.decode(): value.decode() for name, value in headers
+    }
+    assert messages[0]["body"] == _LARGE_BODY
+
+
+def test_streams_the_compressed_chunks_once_over_the_minimum_size():
+    chunks = [b"[", b'"' + b"a" * 200 + b'"', b",", b'"' + b"b" * 200 + b'"]']
+
+    headers, messages = _call(_app(chunks, _json_headers(sum(map(len, chunks)))))
+
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    # The first two chunks are buffered until they reach the minimum size.
+    assert [message["more_body"] for message in messages] == [True, True, False]
+    # Each chunk is flushed, so that what was sent so far can be decoded.
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert decompressor.decompress(messages[0]["body"]) == b"".join(chunks[:2])
+    assert b"".join(
+        decompressor.decompress(message["body"]) for message in messages[1:]
+    ) == b"".join(chunks[2:])
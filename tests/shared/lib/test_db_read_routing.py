@@ -0,0 +1,151 @@
+import asyncio
+
+import httpx
+import pytest
+
+from shared.lib import db_config_utils, sharding_utils
+from shared.lib.constants import (
+    INTERNAL_API_KEY_HEADER_NAME,
+    READ_FROM_PRIMARY_HEADER_NAME,
+)
+from shared.lib.db_config_utils import (
+    DbConnectionRouter,
+    DbReadRoutingMiddleware,
+    build_tortoise_config,
+    read_from_primary,
+    reads_pinned_to_primary,
+)
+
+_INTERNAL_API_KEY = "internal"
+
+
+@pytest.fixture(autouse=True)
+def _use_replicas(monkeypatch, use_settings):
+    use_settings(internal_api_key=_INTERNAL_API_KEY)
+    monkeypatch.setattr(db_config_utils, "_read_connection_names", ["read_0"])
+    monkeypatch.setattr(db_config_utils, "_read_connections_lag", True)
+
+
+async def _app(scope, receive, send):
+    """
+    Answers with the connection its reads would use, then the one within
+    `read_from_primary`, and whether the request is pinned to the primary.
+    """
+    router = DbConnectionRouter()
+    read_connection = router.db_for_read(None)
+    with read_from_primary():
+        primary_read_connection = router.db_for_read(None)
+
+    body = f"{read_connection} {primary_read_connection} {reads_pinned_to_primary()}"
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain")],
+        }
+    )
+    await send({"type": "http.response.body", "body": body.encode()})
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.expiring_keys: dict[str, int] = {}
+
+    async def set(self, key: str, value, px: int):
+        if px <= 0:
+            raise ValueError("invalid expire time in 'set' command")
+        self.expiring_keys[key] = px
+
+    async def exists(self, key: str) -> int:
+        return int(key in self.expiring_keys)
+
+
+def _get(headers: dict[str, str] | None = None) -> str:
+    async def get_async():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(
+                DbReadRoutingMiddleware(_app, read_your_writes_seconds=5)
+            ),
+            base_url="http://test",
+        ) as client:
+            return (await client.get("/", headers=headers)).text
+
+    return asyncio.run(get_async())
+
+
+def _write_then_read(read_your_writes_seconds: float) -> str:
+    headers = {"Authorization": "Bearer token"}
+
+    async def write_then_read_async():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(
+                DbReadRoutingMiddleware(_app, read_your_writes_seconds)
+            ),
+            base_url="http://test",
+        ) as client:
+            await client.post("/", headers=headers)
+            return (await client.get("/", headers=headers)).text
+
+    return asyncio.run(write_then_read_async())
+
+
+def test_reads_go_to_the_replicas():
+    assert _get() == "read_0 None False"
+
+
+def test_internal_call_can_request_the_primary():
+    headers = {
+        INTERNAL_API_KEY_HEADER_NAME: _INTERNAL_API_KEY,
+        READ_FROM_PRIMARY_HEADER_NAME: "1",
+    }
+
+    assert _get(headers) == "None None True"
+
+
+def test_read_from_primary_requires_the_internal_api_key():
+    headers = {
+        INTERNAL_API_KEY_HEADER_NAME: "not the key",
+        READ_FROM_PRIMARY_HEADER_NAME: "1",
+    }
+
+    assert _get(headers) == "read_0 None False"
+
+
+def test_caller_reads_its_writes_from_the_primary(monkeypatch):
+    redis = _FakeRedis()
+    monkeypatch.setattr(db_config_utils, "get_redis_client", lambda: redis)
+
+    assert _write_then_read(read_your_writes_seconds=5) == "None None True"
+    assert list(redis.expiring_keys.values()) == [5000]
+
+
+def test_zero_read_your_writes_window_is_disabled(monkeypatch):
+    redis = _FakeRedis()
+    monkeypatch.setattr(db_config_utils, "get_redis_client", lambda: redis)
+
+    assert _write_then_read(read_your_writes_seconds=0) == "read_0 None False"
+    assert redis.expiring_keys == {}
+
+
+def test_unsharded_sqlite_gets_read_connections(use_settings, tmp_path):
+    use_settings(sqlite_read_connections=2)
+
+    config = build_tortoise_config(f"sqlite:///{tmp_path / 'db.sqlite3'}", None)
+
+    assert sorted(config["connections"]) == ["default", "read_0", "read_1"]
+
+
+def test_sharded_service_reads_from_the_shard_primaries(
+    monkeypatch, use_settings, tmp_path
+):
+    use_settings(sqlite_read_connections=2)
+    monkeypatch.setattr(sharding_utils, "_shard_connection_names", [])
+
+    config = build_tortoise_config(
+        f"sqlite:///{tmp_path / 'shard_0.sqlite3'}",
+        None,
+        shard_db_urls=[f"sqlite:///{tmp_path / 'shard_1.sqlite3'}"],
+    )
+
+    assert sorted(config["connections"]) == ["default", "shard_1"]
+    assert db_config_utils._read_connection_names == []
@@ -0,0 +1,174 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from shared.event_models.users import UserCreated
+from shared.lib import rabbitmq_utils
+from aio_pika.exceptions import ChannelInvalidStateError
+
+from shared.lib.constants import CONTENT_TYPE_JSON
+from shared.lib.rabbitmq_utils import _BatchTopicConsumer, _WorkerPoolTopicConsumer
+
+_EVENT = UserCreated(
+    final_user_ulid="01KA0000000000000000000000",
+    temp_user_ulid="01KA0000000000000000000001",
+)
+
+
+class _Message:
+    def __init__(
+        self,
+        body: bytes = b"",
+        content_type: str | None = CONTENT_TYPE_JSON,
+        channel_closed: bool = False,
+        ack_fails: bool = False,
+    ):
+        self.body = body
+        self.content_type = content_type
+        self.channel_closed = channel_closed
+        self.ack_fails = ack_fails
+        self.headers = {}
+        self.message_id = "message"
+        self.settled_with: tuple[str, bool] | None = None
+
+    @property
+    def channel(self):
+        # Like aio-pika's, once the channel of the delivery is closed.
+        if self.channel_closed:
+            raise ChannelInvalidStateError()
+        return SimpleNamespace(is_closed=False)
+
+    async def ack(self, multiple: bool = False):
+        if self.ack_fails:
+            raise ChannelInvalidStateError()
+        self.settled_with = ("ack", multiple)
+
+    async def nack(self, requeue: bool = True):
+        self.settled_with = ("nack", requeue)
+
+    async def reject(self, requeue: bool = False):
+        self.settled_with = ("reject", requeue)
+
+
+@pytest.fixture(autouse=True)
+def _no_requeue_delay(monkeypatch):
+    monkeypatch.setattr(rabbitmq_utils, "_UNSUPPORTED_MESSAGE_REQUEUE_DELAY_SECONDS", 0)
+
+
+def _receive(message: _Message) -> list:
+    dispatched = []
+
+    async def handler(dto):
+        pass
+
+    consumer = _WorkerPoolTopicConsumer(
+        "exchange", "topic", "queue", UserCreated, 1, handler, 1, None
+    )
+    consumer._dispatch = lambda message, dto: dispatched.append(dto)
+    asyncio.run(consumer._on_message_async(message))
+
+    return dispatched
+
+
+def test_decoded_message_is_dispatched():
+    message = _Message(_EVENT.model_dump_json().encode(), CONTENT_TYPE_JSON)
+
+    assert _receive(message) == [_EVENT]
+    assert message.settled_with is None
+
+
+def test_unsupported_content_type_is_requeued():
+    message = _Message(b"...", "application/x-unknown")
+
+    assert _receive(message) == []
+    assert message.settled_with == ("nack", True)
+
+
+def test_invalid_message_is_rejected():
+    message = _Message(b"{}", CONTENT_TYPE_JSON)
+
+    assert _receive(message) == []
+    assert message.settled_with == ("reject", False)
+
+
+def _consume_batches(batches: list[list[_Message]]) -> tuple[list, bool]:
+    """
+    Dispatches each batch to a batch consumer, one after the other, and returns the
+    DTOs its handler got, and whether its worker is still running.
+    """
+    handled = []
+
+    async def batch_handler(dtos):
+        handled.extend(dtos)
+
+    async def run_async():
+        consumer = _BatchTopicConsumer(
+            "exchange", "topic", "queue", UserCreated, 10, batch_handler, 10, 0.01
+        )
+        consumer._start_workers()
+        for batch in batches:
+            for message in batch:
+                consumer._dispatch(message, _EVENT)
+            await asyncio.wait_for(consumer._drain_async(), 1)
+
+        is_running = not consumer._batch_worker.done()
+        consumer._stop_workers()
+        return is_running
+
+    is_running = asyncio.run(run_async())
+    return handled, is_running
+
+
+def test_batch_messages_are_acked_one_by_one():
+    batch = [_Message(), _Message()]
+
+    handled, is_running = _consume_batches([batch])
+
+    assert handled == [_EVENT, _EVENT]
+    assert [message.settled_with for message in batch] == [("ack", False)] * 2
+    assert is_running
+
+
+def test_batch_consumer_skips_the_deliveries_of_a_closed_channel():
+    stale_message = _Message(channel_closed=True)
+    message = _Message()
+
+    handled, is_running = _consume_batches([[stale_message, message]])
+
+    assert handled == [_EVENT]
+    assert stale_message.settled_with is None
+    assert message.settled_with == ("ack", False)
+    assert is_running
+
+
+def test_batch_consumer_survives_a_failed_ack():
+    next_message = _Message()
+
+    handled, is_running = _consume_batches([[_Message(ack_fails=True)], [next_message]])
+
+    assert handled == [_EVENT, _EVENT]
+    assert next_message.settled_with == ("ack", False)
+    assert is_running
+
+
+def test_worker_pool_skips_the_deliveries_of_a_closed_channel():
+    handled = []
+
+    async def handler(dto):
+        handled.append(dto)
+
+    async def run_async():
+        consumer = _WorkerPoolTopicConsumer(
+            "exchange", "topic", "queue", UserCreated, 1, handler, 1, None
+        )
+        rejected_before = consumer._rejected_total.value
+        consumer._start_workers()
+        consumer._dispatch(_Message(channel_closed=True), _EVENT)
+        await asyncio.wait_for(consumer._drain_async(), 1)
+        consumer._stop_workers()
+
+        return consumer._rejected_total.value - rejected_before
+
+    assert asyncio.run(run_async()) == 0
+    assert handled == []
@@ -0,0 +1,46 @@
+import asyncio
+import sqlite3
+from uuid import UUID
+
+from tortoise import Model, Tortoise, connections, fields
+from ulid import ULID
+
+from shared.lib.tortoise_utils import ulid_field, ulid_to_db_value
+
+
+class DataUlidEntity(Model):
+    id = fields.IntField(primary_key=True)
+    ulid = ulid_field()
+
+
+def test_ulid_to_db_value_matches_the_dialect():
+    ulid = ULID()
+
+    assert ulid_to_db_value(str(ulid), "sqlite") == ulid.bytes
+    assert ulid_to_db_value(str(ulid), "postgres") == UUID(bytes=ulid.bytes)
+    assert ulid_to_db_value(None, "sqlite") is None
+
+
+def test_ulid_field_is_stored_in_16_bytes_on_sqlite():
+    async def run_async():
+        await Tortoise.init(
+            db_url="sqlite://:memory:", modules={"entities": [__name__]}
+        )
+        try:
+            await Tortoise.generate_schemas()
+            entity = await DataUlidEntity.create()
+
+            rows = await connections.get("default").execute_query_dict(
+                'SELECT "ulid" FROM "dataulidentity"'
+            )
+            found = await DataUlidEntity.get(ulid=entity.ulid)
+            return entity.ulid, rows[0]["ulid"], found.id == entity.id
+        finally:
+            await Tortoise.close_connections()
+
+    ulid, stored_ulid, found = asyncio.run(run_async())
+
+    assert stored_ulid == ULID.from_str(ulid).bytes
+    assert found
+    # The conversion is the field's, not a process-wide adapter.
+    assert (UUID, sqlite3.PrepareProtocol) not in sqlite3.adapters
@@ -0,0 +1,20 @@
+import json
+
+from shared.lib import tracing_utils
+from shared.lib.constants import TRACING_EXPORTER_FILE
+from shared.lib.tracing_utils import init_tracing, shutdown_tracing, start_span
+
+
+def test_file_exporter_writes_the_spans_and_closes_its_file(tmp_path):
+    file_path = tmp_path / "spans.jsonl"
+
+    init_tracing("test_api", TRACING_EXPORTER_FILE, 1.0, str(file_path))
+    exporter_file = tracing_utils._file_exporter_file
+    with start_span("test span"):
+        pass
+    shutdown_tracing()
+
+    assert exporter_file.closed
+    assert tracing_utils._file_exporter_file is None
+    spans = [json.loads(line) for line in file_path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["test span"]
@@ -0,0 +1,62 @@
+from tortoise.transactions import in_transaction
+
+from shared.lib.list_utils import try_get
+from shared.lib.metrics.app_metrics import observe_db_query
+from shared.lib.sharding_utils import get_shard_connection_name, get_shard_db
+from todo_api.data.entities.data_item import DataItem
+
+
+@observe_db_query
+async def select_items_by_user_ulid_async(user_ulid: str) -> list[DataItem]:
+    return await DataItem.filter(user_ulid=user_ulid).using_db(get_shard_db(user_ulid))
+
+
+@observe_db_query
+async def select_item_by_ulid_async(user_ulid: str, ulid: str) -> DataItem | None:
+    return try_get(
+        await DataItem.filter(ulid=ulid, user_ulid=user_ulid).using_db(
+            get_shard_db(user_ulid)
+        ),
+        0,
+    )
+
+
+@observe_db_query
+async def select_item_ids_by_user_ulid_async(user_ulid: str, limit: int) -> list[int]:
+    return (
+        await DataItem.filter(user_ulid=user_ulid)
+        .using_db(get_shard_db(user_ulid))
+        .order_by("id")
+        .limit(limit)
+        .values_list("id", flat=True)
+    )
+
+
+@observe_db_query
+async def insert_item_async(data_item: DataItem):
+    async with in_transaction(
+        get_shard_connection_name(data_item.user_ulid)
+    ) as shard_transaction:
+        await data_item.save(using_db=shard_transaction)
+
+
+@observe_db_query
+async def update_item_async(data_item: DataItem):
+    await data_item.save(using_db=get_shard_db(data_item.user_ulid))
+
+
+@observe_db_query
+async def delete_item_by_ulid_async(user_ulid: str, ulid: str) -> int:
+    return (
+        await DataItem.filter(ulid=ulid, user_ulid=user_ulid)
+        .using_db(get_shard_db(user_ulid))
+        .delete()
+    )
+
+
+@observe_db_query
+async def delete_items_by_ids_async(user_ulid: str, ids: list[int]) -> int:
+    async with in_transaction(
+        get_shard_connection_name(user_ulid)
+    ) as shard_transaction:
+        return await DataItem.filter(id__in=ids).using_db(shard_transaction).delete()
@@ -6,7 +6,7 @@ from shared.lib.tortoise_utils import ulid_field
 class DataItem(Model):
     id = fields.IntField(primary_key=True)
     ulid = ulid_field()
-    user_ulid = ulid_field()
+    user_ulid = ulid_field(unique=False)
 
     # user: fields.ForeignKeyRelation[DataUser] = fields.ForeignKeyField(
     #     "entities.DataUser",
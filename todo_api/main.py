@@ -1,25 +1,53 @@
-from dotenv import load_dotenv
 from fastapi import FastAPI
 from tortoise.contrib.fastapi import tortoise_exception_handlers
 
+from shared.lib.application_variables import ApplicationVariables
 from shared.lib.constants import APP_NAME_TODO_API
-from shared.lib.fastapi_utils import app_add_cors, app_lifespan
+from shared.lib.fastapi_utils import (
+    app_add_admission_control,
+    app_add_compression,
+    app_add_cors,
+    app_add_metrics,
+    app_add_request_deadline,
+    app_add_tracing,
+    app_lifespan,
+)
+from shared.lib.settings import init_settings
+from shared.queue_consumers.user_consumers import consume_user_deleted_async
+from todo_api.data.entities import DB_MODULES
+from todo_api.queuing.user_handlers import handle_user_deleted_async
 from todo_api.routers.auth_proxy import api_auth_router
 from todo_api.routers.user_items import api_user_items_router
 
-load_dotenv()
+
+async def app_on_init_async(_: FastAPI):
+    await consume_user_deleted_async(
+        app_name=APP_NAME_TODO_API,
+        async_handler=handle_user_deleted_async,
+    )
+
+
+init_settings()
+
+# The items are sharded by user ULID, and read from their shard's primary.
+shard_db_urls = ApplicationVariables.TODO_API_SHARD_URLS()
 
 app = FastAPI(
     lifespan=app_lifespan(
         app_folder=APP_NAME_TODO_API,
-        modules={
-            "entities": [
-                f"{APP_NAME_TODO_API}.data.entities.data_item",
-            ]
-        },
+        modules=DB_MODULES,
+        db_url=shard_db_urls[0] if shard_db_urls else None,
+        shard_db_urls=shard_db_urls[1:],
+        use_rabbit_mq=True,
+        additional_app_on_init_async=app_on_init_async,
     ),
     exception_handlers=tortoise_exception_handlers(),
 )
 app_add_cors(app)
+app_add_request_deadline(app)
+app_add_compression(app)
+app_add_admission_control(app)
+app_add_tracing(app, APP_NAME_TODO_API)
+app_add_metrics(app)
 app.include_router(api_user_items_router, prefix="/api/v1")
 app.include_router(api_auth_router, prefix="/api/v1")
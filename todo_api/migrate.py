@@ -0,0 +1,29 @@
+"""
+Creates the missing tables and indexes of todo_api, on all its shards. Run it once
+before starting the workers, with `DB_GENERATE_SCHEMAS=false` so that they skip it.
+
+Usage (from the repository root): `python -m todo_api.migrate`
+"""
+
+from dotenv import load_dotenv
+
+from shared.lib.application_variables import ApplicationVariables
+from shared.lib.constants import APP_NAME_TODO_API
+from shared.lib.schema_migrations import run_schema_migrations
+from todo_api.data.entities import DB_MODULES
+
+
+def main():
+    load_dotenv()
+    shard_db_urls = ApplicationVariables.TODO_API_SHARD_URLS()
+
+    run_schema_migrations(
+        APP_NAME_TODO_API,
+        DB_MODULES,
+        db_url=shard_db_urls[0] if shard_db_urls else None,
+        shard_db_urls=shard_db_urls[1:],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import asyncio
+
+from shared.event_models.users import UserDeleted
+from shared.lib.constants import USER_ITEMS_DELETE_CHUNK_SIZE
+from todo_api.data.db_query_utils import (
+    delete_items_by_ids_async,
+    select_item_ids_by_user_ulid_async,
+)
+
+
+async def handle_user_deleted_async(dto: UserDeleted):
+    """
+    Deletes the items of a deleted user, one bounded chunk per transaction, so large
+    accounts never hold the write lock for long.
+    Safe to run again on redelivery, since it only deletes what is left.
+    """
+    while True:
+        item_ids = await select_item_ids_by_user_ulid_async(
+            dto.user_ulid, USER_ITEMS_DELETE_CHUNK_SIZE
+        )
+        if not item_ids:
+            break
+
+        await delete_items_by_ids_async(dto.user_ulid, item_ids)
+
+        # Let the requests of other users through between chunks.
+        await asyncio.sleep(0)
@@ -0,0 +1,213 @@
+"""
+Moves the items of the users whose shard changed, after shards were added to
+`TODO_API_SHARD_URLS`, from their old shard to their new one.
+
+Run it right after deploying the new shard list: until a user's items are moved, the
+ones still on the old shard are not visible. Each chunk is copied, then deleted from the
+old shard, so the tool can be stopped and run again at any time.
+
+Usage (from the repository root):
+    `python -m todo_api.rebalance_shards --old-shard-count 2`
+    `python -m todo_api.rebalance_shards --old-shard-count 2 --user-ulid <ULID>`
+"""
+
+import argparse
+import asyncio
+
+from dotenv import load_dotenv
+from tortoise import Tortoise, connections
+from tortoise.transactions import in_transaction
+
+from shared.lib.application_variables import ApplicationVariables
+from shared.lib.constants import APP_NAME_TODO_API
+from shared.lib.db_config_utils import build_tortoise_config
+from shared.lib.sharding_utils import (
+    generate_shard_schemas_async,
+    get_shard_connection_names,
+    get_shard_index,
+)
+from todo_api.data.entities.data_item import DataItem
+
+_COPIED_FIELDS = (
+    "ulid",
+    "user_ulid",
+    "title",
+    "description",
+    "done",
+    "created_at",
+    "updated_at",
+)
+
+
+async def move_user_items_async(
+    user_ulid: str, from_connection_name: str, to_connection_name: str, chunk_size: int
+) -> int:
+    """
+    Streams a user's items from one shard to another, one chunk per transaction on each.
+
+    Returns:
+        int: The number of items moved.
+    """
+    from_db = connections.get(from_connection_name)
+    moved_count = 0
+
+    while True:
+        data_items = (
+            await DataItem.filter(user_ulid=user_ulid)
+            .using_db(from_db)
+            .order_by("id")
+            .limit(chunk_size)
+        )
+        if not data_items:
+            return moved_count
+
+        async with in_transaction(to_connection_name) as to_transaction:
+            # Copied by a previous run, stopped before deleting them.
+            already_copied_ulids = set(
+                await DataItem.filter(
+                    ulid__in=[data_item.ulid for data_item in data_items]
+                )
+                .using_db(to_transaction)
+                .values_list("ulid", flat=True)
+            )
+
+            new_data_items = [
+                DataItem(
+                    **{
+                        field_name: getattr(data_item, field_name)
+                        for field_name in _COPIED_FIELDS
+                    }
+                )
+                for data_item in data_items
+                if data_item.ulid not in already_copied_ulids
+            ]
+            if new_data_items:
+                await DataItem.bulk_create(new_data_items, using_db=to_transaction)
+
+        async with in_transaction(from_connection_name) as from_transaction:
+            await DataItem.filter(
+                id__in=[data_item.id for data_item in data_items]
+            ).using_db(from_transaction).delete()
+
+        moved_count += len(data_items)
+
+
+async def _find_moved_user_ulids_async(
+    connection_name: str, shard_index: int, old_shard_count: int, chunk_size: int
+):
+    """
+    Streams, with keyset pagination, the users of a shard whose shard changed.
+    """
+    db = connections.get(connection_name)
+    seen_user_ulids = set()
+    last_id = 0
+
+    while True:
+        rows = (
+            await DataItem.filter(id__gt=last_id)
+            .using_db(db)
+            .order_by("id")
+            .limit(chunk_size)
+            .values_list("id", "user_ulid")
+        )
+        if not rows:
+            return
+
+        for _, user_ulid in rows:
+            if user_ulid in seen_user_ulids:
+                continue
+            seen_user_ulids.add(user_ulid)
+
+            if (
+                get_shard_index(user_ulid, old_shard_count) == shard_index
+                and get_shard_index(user_ulid) != shard_index
+            ):
+                yield user_ulid
+
+        last_id = rows[-1][0]
+
+
+async def _move_user_async(
+    args: argparse.Namespace, user_ulid: str, old_shard_index: int
+):
+    new_shard_index = get_shard_index(user_ulid)
+    if new_shard_index == old_shard_index:
+        return
+
+    if args.dry_run:
+        print(f"{user_ulid}: shard {old_shard_index} -> {new_shard_index}")
+        return
+
+    shard_connection_names = get_shard_connection_names()
+    moved_count = await move_user_items_async(
+        user_ulid,
+        shard_connection_names[old_shard_index],
+        shard_connection_names[new_shard_index],
+        args.chunk_size,
+    )
+    print(
+        f"{user_ulid}: moved {moved_count} items, "
+        f"shard {old_shard_index} -> {new_shard_index}"
+    )
+
+
+async def main_async(args: argparse.Namespace):
+    shard_db_urls = ApplicationVariables.TODO_API_SHARD_URLS()
+    if len(shard_db_urls) < 2:
+        raise SystemExit("TODO_API_SHARD_URLS must list the shards, new ones included")
+
+    await Tortoise.init(
+        config=build_tortoise_config(
+            shard_db_urls[0],
+            {"entities": [f"{APP_NAME_TODO_API}.data.entities.data_item"]},
+            shard_db_urls=shard_db_urls[1:],
+        )
+    )
+
+    try:
+        await Tortoise.generate_schemas(safe=True)
+        await generate_shard_schemas_async()
+
+        if args.user_ulid:
+            await _move_user_async(
+                args,
+                args.user_ulid,
+                get_shard_index(args.user_ulid, args.old_shard_count),
+            )
+            return
+
+        shard_connection_names = get_shard_connection_names()
+        for shard_index in range(args.old_shard_count):
+            async for user_ulid in _find_moved_user_ulids_async(
+                shard_connection_names[shard_index],
+                shard_index,
+                args.old_shard_count,
+                args.chunk_size,
+            ):
+                await _move_user_async(args, user_ulid, shard_index)
+
+    finally:
+        await Tortoise.close_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--old-shard-count",
+        type=int,
+        required=True,
+        help="The number of shards before the new ones were added",
+    )
+    parser.add_argument("--user-ulid", help="Only move the items of this user")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    load_dotenv()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
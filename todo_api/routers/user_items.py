@@ -4,23 +4,32 @@ from fastapi import APIRouter, Depends, HTTPException, Path
 from fastapi.security import OAuth2PasswordBearer
 from jwt import InvalidTokenError
 from pydantic import AfterValidator
-from tortoise.transactions import in_transaction
 
 from shared.http_clients.users_client import get_user_by_ulid_async
+from shared.lib.fastapi_utils import FastStatusResponseRoute
 from shared.lib.HTTPException_utils import (
     invalid_credentials_exception,
+    raise_if_item_of_another_user,
     raise_if_user_has_no_permissions,
 )
 from shared.lib.jwt_utils import decode_token
-from shared.lib.list_utils import try_get
 from shared.lib.ulid_validators import validate_str_ulid
 from shared.models.items_dtos import Item, NewItem
 from shared.models.status_response_dto import StatusResponse
 from shared.models.user_dto import User
+from todo_api.data.db_query_utils import (
+    delete_item_by_ulid_async,
+    insert_item_async,
+    select_item_by_ulid_async,
+    select_items_by_user_ulid_async,
+    update_item_async,
+)
 from todo_api.data.entities.data_item import DataItem
 from todo_api.data.mapper_utils import data_item_to_model, update_data_item_from_model
 
-api_user_items_router = APIRouter(prefix="/users/{user_ulid}/items")
+api_user_items_router = APIRouter(
+    prefix="/users/{user_ulid}/items", route_class=FastStatusResponseRoute
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/logins/openapi")
 
@@ -48,7 +57,7 @@ async def get_all_user_items(
         token_user_ulid=current_user.ulid, request_user_ulid=user_ulid
     )
 
-    all_user_items = await DataItem.filter(user_ulid=current_user.ulid)
+    all_user_items = await select_items_by_user_ulid_async(current_user.ulid)
 
     all_user_items = [data_item_to_model(item) for item in all_user_items]
 
@@ -69,7 +78,7 @@ async def get_item(
         token_user_ulid=current_user.ulid, request_user_ulid=user_ulid
     )
 
-    data_item = try_get(await DataItem.filter(ulid=ulid), 0)
+    data_item = await select_item_by_ulid_async(current_user.ulid, ulid)
 
     if data_item is None:
         raise HTTPException(status_code=404, detail=f"Item '{ulid} not found")
@@ -91,10 +100,12 @@ async def create_item(
         token_user_ulid=current_user.ulid, request_user_ulid=user_ulid
     )
 
-    new_data_item = update_data_item_from_model(DataItem(), item)
+    raise_if_item_of_another_user(
+        item_user_ulid=item.user_ulid, request_user_ulid=current_user.ulid
+    )
 
-    async with in_transaction():
-        await new_data_item.save()
+    new_data_item = update_data_item_from_model(DataItem(), item)
+    await insert_item_async(new_data_item)
 
     return StatusResponse(
         status_code=201,
@@ -113,10 +124,17 @@ async def update_item(
     raise_if_user_has_no_permissions(
         token_user_ulid=current_user.ulid, request_user_ulid=user_ulid
     )
+    raise_if_item_of_another_user(
+        item_user_ulid=item.user_ulid, request_user_ulid=current_user.ulid
+    )
+
+    data_item = await select_item_by_ulid_async(current_user.ulid, ulid)
+
+    if data_item is None:
+        raise HTTPException(status_code=404, detail=f"Item '{ulid}' not found")
 
-    data_item = await DataItem.get(ulid=ulid, user_ulid=current_user.ulid)
     update_data_item_from_model(data_item, item)
-    await data_item.save()
+    await update_item_async(data_item)
 
     return StatusResponse(
         status_code=200,
@@ -135,9 +153,7 @@ async def delete_item(
         token_user_ulid=current_user.ulid, request_user_ulid=user_ulid
     )
 
-    deleted_count = await DataItem.filter(
-        ulid=ulid, user_ulid=current_user.ulid
-    ).delete()
+    deleted_count = await delete_item_by_ulid_async(current_user.ulid, ulid)
 
     if not deleted_count:
         raise HTTPException(status_code=404, detail=f"Item '{ulid}' not found")
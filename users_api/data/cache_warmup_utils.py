@@ -0,0 +1,30 @@
+from redis.asyncio import Redis
+
+from shared.lib.cache_warmup import warm_cache_async
+from users_api.data.entities.data_user import DataUser
+from users_api.data.mapper_utils import data_user_to_model
+from users_api.data.redis_query_utils import add_cached_users_many_async
+
+
+async def warm_user_cache_async(
+    redis_client: Redis, chunk_size: int, keys_per_second: float
+) -> int | None:
+    """
+    Caches the users missing from Redis, the most recently active first.
+    """
+    return await warm_cache_async(
+        redis_client,
+        "user",
+        DataUser.all(),
+        _add_cached_data_users_async,
+        chunk_size,
+        keys_per_second,
+    )
+
+
+async def _add_cached_data_users_async(
+    redis_client: Redis, data_users: list[DataUser]
+) -> int:
+    return await add_cached_users_many_async(
+        redis_client, [data_user_to_model(data_user) for data_user in data_users]
+    )
@@ -1,6 +1,8 @@
+from shared.lib.metrics.app_metrics import observe_db_query
 from users_api.data.entities.data_user import DataUser
 
 
+@observe_db_query
 async def select_user_by_ulid_async(ulid: str) -> DataUser | None:
     try:
         return await DataUser.filter(ulid=ulid).first()
@@ -22,3 +22,7 @@ class DataUser(Model):
 
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        # The cache warm-up's order, the most recently active first.
+        indexes = (("updated_at", "id"),)
@@ -1,15 +1,28 @@
 from redis.asyncio import Redis
 
-from shared.lib.constants import ONE_DAY_IN_SECONDS
+from shared.lib.cache_warmup import spread_ttl_seconds
+from shared.lib.metrics.app_metrics import cache_lookups_total
+from shared.lib.redis_client_cache import (
+    get_through_client_cache_async,
+    invalidate_client_cache,
+)
+from shared.lib.settings import get_settings
 from shared.models.user_dto import User
 
+_cache_hits_total = cache_lookups_total.labels("user", "hit")
+_cache_misses_total = cache_lookups_total.labels("user", "miss")
+
 
 async def get_cached_user_async(redis_client: Redis, user_ulid: str) -> User | None:
-    cached_user = await redis_client.get(f"user:{user_ulid}")
+    cached_user = await get_through_client_cache_async(
+        redis_client, f"user:{user_ulid}"
+    )
 
     if not cached_user:
+        _cache_misses_total.inc()
         return None
 
+    _cache_hits_total.inc()
     return User.model_validate_json(cached_user)
 
 
@@ -17,9 +30,55 @@ async def set_cached_user_async(redis_client: Redis, user_ulid: str, user: User)
     await redis_client.set(
         f"user:{user_ulid}",
         user.model_dump_json(),
-        ex=ONE_DAY_IN_SECONDS,
+        ex=get_settings().user_cache_ttl_seconds,
     )
+    invalidate_client_cache(f"user:{user_ulid}")
 
 
 async def delete_cached_user_async(redis_client: Redis, user_ulid: str):
-    return await redis_client.delete(f"user:{user_ulid}")
+    deleted_count = await redis_client.delete(f"user:{user_ulid}")
+    invalidate_client_cache(f"user:{user_ulid}")
+
+    return deleted_count
+
+
+async def set_cached_users_many_async(redis_client: Redis, users: list[User]):
+    ttl_seconds = get_settings().user_cache_ttl_seconds
+    async with redis_client.pipeline(transaction=False) as pipeline:
+        for user in users:
+            pipeline.set(f"user:{user.ulid}", user.model_dump_json(), ex=ttl_seconds)
+
+        await pipeline.execute()
+
+    invalidate_client_cache(*(f"user:{user.ulid}" for user in users))
+
+
+async def add_cached_users_many_async(redis_client: Redis, users: list[User]) -> int:
+    """
+    Caches the users not cached yet, keeping the cached ones, which may be fresher.
+
+    Returns:
+        int: The number of users added.
+    """
+    ttl_seconds = get_settings().user_cache_ttl_seconds
+    async with redis_client.pipeline(transaction=False) as pipeline:
+        for user in users:
+            pipeline.set(
+                f"user:{user.ulid}",
+                user.model_dump_json(),
+                ex=spread_ttl_seconds(ttl_seconds),
+                nx=True,
+            )
+
+        results = await pipeline.execute()
+
+    invalidate_client_cache(*(f"user:{user.ulid}" for user in users))
+    return sum(1 for result in results if result)
+
+
+async def delete_cached_users_many_async(redis_client: Redis, user_ulids: list[str]):
+    keys = [f"user:{user_ulid}" for user_ulid in user_ulids]
+    deleted_count = await redis_client.delete(*keys)
+    invalidate_client_cache(*keys)
+
+    return deleted_count
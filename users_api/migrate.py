@@ -0,0 +1,18 @@
+"""
+Creates the missing tables and indexes of users_api. Run it once before starting the
+workers, with `DB_GENERATE_SCHEMAS=false` so that they skip it.
+
+Usage (from the repository root): `python -m users_api.migrate`
+"""
+
+from users_api.data.entities import DB_MODULES
+from shared.lib.constants import APP_NAME_USERS_API
+from shared.lib.schema_migrations import run_schema_migrations
+
+
+def main():
+    run_schema_migrations(APP_NAME_USERS_API, DB_MODULES, use_outbox=True)
+
+
+if __name__ == "__main__":
+    main()
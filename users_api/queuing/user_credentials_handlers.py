@@ -2,26 +2,33 @@ from tortoise.transactions import in_transaction
 
 from shared.event_models.user_credentials import UserCredentialsCreated
 from shared.event_models.users import UserCreated
+from shared.lib.constants import DB_CONNECTION_DEFAULT
+from shared.lib.outbox.outbox_relay import notify_outbox_relay
 from shared.lib.redis_utils import get_redis_client
 from users_api.data.entities.data_user import DataUser
 from users_api.data.mapper_utils import data_user_to_model
 from users_api.data.redis_query_utils import (
     delete_cached_user_async,
+    delete_cached_users_many_async,
     set_cached_user_async,
+    set_cached_users_many_async,
+)
+from users_api.queuing.user_publisher import (
+    enqueue_user_created_async,
+    enqueue_user_created_many_async,
 )
-from users_api.queuing.user_publisher import publish_user_created_async
 
 
 async def handle_user_credentials_created_async(dto: UserCredentialsCreated):
     redis_client = get_redis_client()
 
-    async with in_transaction():
+    async with in_transaction(DB_CONNECTION_DEFAULT):
         new_user = await DataUser.create()
         user = data_user_to_model(new_user)
         await set_cached_user_async(redis_client, new_user.ulid, user)
 
         try:
-            await publish_user_created_async(
+            await enqueue_user_created_async(
                 UserCreated(
                     final_user_ulid=new_user.ulid, temp_user_ulid=dto.temp_user_ulid
                 )
@@ -29,3 +36,36 @@ async def handle_user_credentials_created_async(dto: UserCredentialsCreated):
         except Exception as e:
             await delete_cached_user_async(redis_client, new_user.ulid)
             raise e
+
+    notify_outbox_relay()
+
+
+async def handle_user_credentials_created_batch_async(
+    dtos: list[UserCredentialsCreated],
+):
+    redis_client = get_redis_client()
+
+    async with in_transaction(DB_CONNECTION_DEFAULT):
+        new_users = [DataUser() for _ in dtos]
+        await DataUser.bulk_create(new_users)
+
+        await set_cached_users_many_async(
+            redis_client, [data_user_to_model(new_user) for new_user in new_users]
+        )
+
+        try:
+            await enqueue_user_created_many_async(
+                [
+                    UserCreated(
+                        final_user_ulid=new_user.ulid, temp_user_ulid=dto.temp_user_ulid
+                    )
+                    for new_user, dto in zip(new_users, dtos)
+                ]
+            )
+        except Exception as e:
+            await delete_cached_users_many_async(
+                redis_client, [new_user.ulid for new_user in new_users]
+            )
+            raise e
+
+    notify_outbox_relay()
@@ -1,13 +1,37 @@
-from shared.event_models.users import UserCreated
-from shared.lib.constants import TOPIC_USER_CREATED
-from shared.lib.rabbitmq_client.rabbitmq_exchange_client import (
-    get_rabbit_mq_exchange_client,
+from shared.event_models.users import UserCreated, UserDeleted
+from shared.lib.constants import (
+    EXCHANGE_USERS,
+    TOPIC_USER_CREATED,
+    TOPIC_USER_DELETED,
 )
+from shared.lib.outbox.outbox_relay import (
+    enqueue_outbox_event_async,
+    enqueue_outbox_events_async,
+)
+
+
+async def enqueue_user_created_async(dto: UserCreated):
+    """
+    Must be called inside the transaction creating the user.
+    """
+    await enqueue_outbox_event_async(
+        exchange_name=EXCHANGE_USERS, topic_name=TOPIC_USER_CREATED, dto=dto
+    )
+
 
+async def enqueue_user_created_many_async(dtos: list[UserCreated]):
+    """
+    Must be called inside the transaction creating the users.
+    """
+    await enqueue_outbox_events_async(
+        exchange_name=EXCHANGE_USERS, topic_name=TOPIC_USER_CREATED, dtos=dtos
+    )
 
-async def publish_user_created_async(dto: UserCreated):
-    rabbit_mq_exchange_client = get_rabbit_mq_exchange_client()
 
-    await rabbit_mq_exchange_client.publish_async(
-        topic_name=TOPIC_USER_CREATED, dto=dto
+async def enqueue_user_deleted_async(dto: UserDeleted):
+    """
+    Must be called inside the transaction deleting the user.
+    """
+    await enqueue_outbox_event_async(
+        exchange_name=EXCHANGE_USERS, topic_name=TOPIC_USER_DELETED, dto=dto
     )
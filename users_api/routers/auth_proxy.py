@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 
 from shared.http_clients.auth_client import login_user_async
+from shared.lib.fastapi_utils import FastStatusResponseRoute
 from shared.models.jwt_dtos import JwtToken
 
-api_auth_router = APIRouter(prefix="/auth")
+api_auth_router = APIRouter(prefix="/auth", route_class=FastStatusResponseRoute)
 
 
 @api_auth_router.post(
@@ -7,8 +7,13 @@ from pydantic import AfterValidator
 from redis.asyncio import Redis
 from tortoise.transactions import in_transaction
 
+from shared.event_models.users import UserDeleted
 from shared.http_clients.auth_client import get_user_credentials_async
-from shared.lib.fastapi_utils import request_is_internal_api_key_valid
+from shared.lib.constants import DB_CONNECTION_DEFAULT
+from shared.lib.fastapi_utils import (
+    FastStatusResponseRoute,
+    request_is_internal_api_key_valid,
+)
 from shared.lib.HTTPException_utils import (
     invalid_credentials_exception,
     raise_if_user_has_no_permissions,
@@ -16,6 +21,7 @@ from shared.lib.HTTPException_utils import (
     user_not_found_exception,
 )
 from shared.lib.jwt_utils import decode_token, is_user_jwt_admin
+from shared.lib.outbox.outbox_relay import notify_outbox_relay
 from shared.lib.redis_utils import get_redis_client
 from shared.lib.ulid_validators import validate_str_ulid
 from shared.models.auth_dtos import UserCredentials
@@ -32,8 +38,9 @@ from users_api.data.redis_query_utils import (
     get_cached_user_async,
     set_cached_user_async,
 )
+from users_api.queuing.user_publisher import enqueue_user_deleted_async
 
-api_users_router = APIRouter(prefix="/users")
+api_users_router = APIRouter(prefix="/users", route_class=FastStatusResponseRoute)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/logins/openapi")
 
@@ -122,7 +129,7 @@ async def update_user(
 
     update_data_user_from_model(current_data_user, user_model)
 
-    async with in_transaction():
+    async with in_transaction(DB_CONNECTION_DEFAULT):
         try:
             await current_data_user.save()
             user = data_user_to_model(current_data_user)
@@ -153,9 +160,11 @@ async def delete_user(
     if not user:
         raise user_not_found_exception(user_ulid)
 
-    async with in_transaction():
+    async with in_transaction(DB_CONNECTION_DEFAULT):
         try:
             await user.delete()
+            # The other services clean up the user's data when they receive it.
+            await enqueue_user_deleted_async(UserDeleted(user_ulid=user_ulid))
             await delete_cached_user_async(redis, user_ulid)
 
         except Exception:
@@ -163,6 +172,8 @@ async def delete_user(
                 status_code=500, detail="Something went wrong during user creation."
             )
 
+    notify_outbox_relay()
+
     return StatusResponse(
         status_code=204,
         message=f"User '{user_ulid}' deleted",
@@ -0,0 +1,22 @@
+"""
+Caches the users missing from Redis, the most recently active first, e.g. after a Redis
+flush or failover. Run it before sending the traffic back to users_api, so that it
+doesn't all fall through to the database. Only one run at a time per cache.
+
+Usage (from the repository root):
+    `python -m users_api.warm_cache`
+    `python -m users_api.warm_cache --chunk-size 500 --keys-per-second 0`
+"""
+
+from users_api.data.cache_warmup_utils import warm_user_cache_async
+from users_api.data.entities import DB_MODULES
+from shared.lib.cache_warmup import run_cache_warmup
+from shared.lib.constants import APP_NAME_USERS_API
+
+
+def main():
+    run_cache_warmup(APP_NAME_USERS_API, DB_MODULES, warm_user_cache_async, __doc__)
+
+
+if __name__ == "__main__":
+    main()